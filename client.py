@@ -1,11 +1,28 @@
+import argparse
 import asyncio
 import websockets
-import json
 import os
+import random
+import shutil
+import sys
+import threading
+import time
+from collections import deque
 from datetime import datetime
+from game.engine import Player, choose_guess
+from game.protocol import (Command, Error, GameOver, Info, InputRequest, LeaderboardPage,
+                           ProtocolError, Rank, Response, RoleReveal, RoundEnd, RoundStart,
+                           Scoreboard, SipahiTurn, Standings, TournamentOver, decode)
 
 SERVER_URL = "ws://localhost:8765"
 
+# Reconnecting after a server restart (seconds, random within range)
+RECONNECT_DELAY = (1.0, 5.0)
+RECONNECT_ATTEMPTS = 10
+
+# Guessing policies for headless sessions ("mixed" picks one per session)
+POLICIES = ["random", "tracker", "hunter"]
+
 # ANSI color codes
 class Colors:
     HEADER = '\033[95m'
@@ -24,28 +41,195 @@ class Colors:
     SIPAHI = '\033[91m'    # Red
     CHOR = '\033[90m'      # Dark Gray
 
+class Renderer:
+    """
+    Writes to the terminal with ANSI escapes instead of shelling out.
+    Keeps the active input prompt on the last line, and a fixed panel
+    (the scoreboard) at the top of the screen: everything else scrolls
+    below it, and an update rewrites only the panel lines that changed.
+    """
+    CLEAR = '\033[H\033[2J'      # Cursor home + clear screen
+    ERASE_LINE = '\r\033[2K'     # Back to column 0 + clear line
+    ERASE_BELOW = '\033[J'        # Clear from the cursor to the end of the screen
+    SAVE = '\0337'                # Save / restore the cursor position
+    RESTORE = '\0338'
+    HISTORY_LINES = 200          # Lines kept to redraw the screen when the panel resizes
+
+    def __init__(self, out=None):
+        self.out = out or sys.stdout
+        # Prompt text currently waiting for the user (None if not asking)
+        self.prompt = None
+        # Lines of the panel at the top of the screen ([] = no panel)
+        self.panel_lines = []
+        # Lines written below the panel since the last clear
+        self.history = deque(maxlen=self.HISTORY_LINES)
+        try:
+            self.tty = self.out.isatty()
+        except (AttributeError, ValueError):
+            self.tty = False
+
+        if os.name == 'nt':
+            # Enables ANSI escape handling in the Windows console (once, at startup)
+            os.system('')
+
+    def clear(self):
+        """Clear the terminal screen (the panel stays)"""
+        if self.panel_lines:
+            self.out.write(f"\033[{len(self.panel_lines) + 1};1H{self.ERASE_BELOW}")
+        else:
+            self.out.write(self.CLEAR)
+        self.history.clear()
+        if self.prompt is not None:
+            self.out.write(self.prompt)
+        self.out.flush()
+
+    def write(self, text=""):
+        """Print text above the active prompt (same semantics as print)"""
+        if self.prompt is not None:
+            # Whatever the user typed so far stays in the terminal's line buffer
+            self.out.write(self.ERASE_LINE)
+        self.out.write(f"{text}\n")
+        self.history.append(text)
+        if self.prompt is not None:
+            self.out.write(self.prompt)
+        self.out.flush()
+
+    def panel(self, lines):
+        """
+        Show `lines` in the panel at the top of the screen. The cursor
+        (and a half-typed answer) stays where it is; only lines that
+        differ from the panel on screen are rewritten.
+        """
+        rows = shutil.get_terminal_size().lines
+        if not self.tty or len(lines) > rows - 3:
+            # No room for a fixed panel: print it like any other text
+            for line in lines:
+                self.write(line)
+            return
+        if len(lines) != len(self.panel_lines):
+            self.layout(lines, rows)
+        else:
+            self.out.write(self.SAVE)
+            for row, (old, new) in enumerate(zip(self.panel_lines, lines), 1):
+                if old != new:
+                    self.out.write(f"\033[{row};1H\033[2K{new}")
+            self.out.write(self.RESTORE)
+            self.out.flush()
+        self.panel_lines = list(lines)
+
+    def layout(self, lines, rows):
+        """The panel appeared or changed size: redraw the screen around it"""
+        top = len(lines) + 1
+        self.out.write(f"\033[r{self.CLEAR}")
+        for row, line in enumerate(lines, 1):
+            self.out.write(f"\033[{row};1H{line}")
+        # Scrolling region: the rows below the panel
+        self.out.write(f"\033[{top};{rows}r\033[{top};1H")
+        for text in self.history:
+            self.out.write(f"{text}\n")
+        if self.prompt is not None:
+            self.out.write(self.prompt)
+        self.out.flush()
+
+    def close(self):
+        """Give the whole screen back to the terminal"""
+        if self.panel_lines:
+            rows = shutil.get_terminal_size().lines
+            self.out.write(f"\033[r\033[{rows};1H\n")
+            self.out.flush()
+            self.panel_lines = []
+
+    def set_prompt(self, prompt):
+        """Show a prompt on the bottom line"""
+        self.prompt = prompt
+        self.out.write(prompt)
+        self.out.flush()
+
+    def clear_prompt(self):
+        """The user pressed Enter, the terminal already moved to a new line"""
+        self.prompt = None
+
+screen = Renderer()
+
+class AsyncInput:
+    """
+    Reads lines from stdin without blocking the event loop, so pings
+    and broadcasts keep flowing while a human is typing.
+    """
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.lines = asyncio.Queue()
+        self.buffer = b""
+        self.fd = None
+
+        try:
+            fd = sys.stdin.fileno()
+            self.loop.add_reader(fd, self._on_readable)
+            self.fd = fd
+        except (NotImplementedError, OSError, ValueError, AttributeError):
+            # Windows' event loop (and regular files) cannot be watched;
+            # fall back to a daemon thread feeding the same queue.
+            threading.Thread(target=self._read_thread, daemon=True).start()
+
+    def _on_readable(self):
+        data = os.read(self.fd, 4096)
+        if not data:
+            # EOF (Ctrl-D or closed pipe)
+            self.close()
+            self.lines.put_nowait(None)
+            return
+        self.buffer += data
+        while b"\n" in self.buffer:
+            line, self.buffer = self.buffer.split(b"\n", 1)
+            self.lines.put_nowait(line.decode(errors="replace"))
+
+    def _read_thread(self):
+        for line in sys.stdin:
+            self.loop.call_soon_threadsafe(self.lines.put_nowait, line.rstrip("\n"))
+        self.loop.call_soon_threadsafe(self.lines.put_nowait, None)
+
+    async def input(self, prompt=""):
+        """Async replacement for the built-in `input()`"""
+        # Drop anything typed before the prompt appeared
+        while not self.lines.empty():
+            if self.lines.get_nowait() is None:
+                raise EOFError
+        screen.set_prompt(prompt)
+        try:
+            line = await self.lines.get()
+        finally:
+            screen.clear_prompt()
+        if line is None:
+            raise EOFError
+        return line.rstrip("\r")
+
+    def close(self):
+        if self.fd is not None:
+            self.loop.remove_reader(self.fd)
+            self.fd = None
+
 def clear_screen():
     """Clear the terminal screen"""
-    os.system('cls' if os.name == 'nt' else 'clear')
+    screen.clear()
 
 def print_header(text):
     """Print a styled header"""
-    print(f"\n{Colors.BOLD}{Colors.CYAN}{'='*60}{Colors.ENDC}")
-    print(f"{Colors.BOLD}{Colors.CYAN}{text.center(60)}{Colors.ENDC}")
-    print(f"{Colors.BOLD}{Colors.CYAN}{'='*60}{Colors.ENDC}\n")
+    screen.write(f"\n{Colors.BOLD}{Colors.CYAN}{'='*60}{Colors.ENDC}")
+    screen.write(f"{Colors.BOLD}{Colors.CYAN}{text.center(60)}{Colors.ENDC}")
+    screen.write(f"{Colors.BOLD}{Colors.CYAN}{'='*60}{Colors.ENDC}\n")
 
 def print_info(message):
     """Print an info message"""
     timestamp = datetime.now().strftime("%H:%M:%S")
-    print(f"{Colors.BLUE}[{timestamp}]{Colors.ENDC} {message}")
+    screen.write(f"{Colors.BLUE}[{timestamp}]{Colors.ENDC} {message}")
 
 def print_success(message):
     """Print a success message"""
-    print(f"{Colors.GREEN}✓{Colors.ENDC} {message}")
+    screen.write(f"{Colors.GREEN}✓{Colors.ENDC} {message}")
 
 def print_error(message):
     """Print an error message"""
-    print(f"{Colors.RED}✗ Error:{Colors.ENDC} {message}")
+    screen.write(f"{Colors.RED}✗ Error:{Colors.ENDC} {message}")
 
 def print_role(role):
     """Print role with appropriate color"""
@@ -56,225 +240,592 @@ def print_role(role):
         'Chor': Colors.CHOR
     }
     color = color_map.get(role, Colors.ENDC)
-    print(f"\n{Colors.BOLD}{color}{'*'*60}{Colors.ENDC}")
-    print(f"{Colors.BOLD}{color}{'YOUR ROLE:'.center(60)}{Colors.ENDC}")
-    print(f"{Colors.BOLD}{color}{role.center(60)}{Colors.ENDC}")
-    print(f"{Colors.BOLD}{color}{'*'*60}{Colors.ENDC}")
-    print(f"{Colors.YELLOW}(Keep it secret! 🤫){Colors.ENDC}\n")
+    screen.write(f"\n{Colors.BOLD}{color}{'*'*60}{Colors.ENDC}")
+    screen.write(f"{Colors.BOLD}{color}{'YOUR ROLE:'.center(60)}{Colors.ENDC}")
+    screen.write(f"{Colors.BOLD}{color}{role.center(60)}{Colors.ENDC}")
+    screen.write(f"{Colors.BOLD}{color}{'*'*60}{Colors.ENDC}")
+    screen.write(f"{Colors.YELLOW}(Keep it secret! 🤫){Colors.ENDC}\n")
 
 def print_divider():
     """Print a simple divider"""
-    print(f"{Colors.CYAN}{'-'*60}{Colors.ENDC}")
+    screen.write(f"{Colors.CYAN}{'-'*60}{Colors.ENDC}")
+
+async def answer_prompt(websocket, stdin, request, session):
+    """Runs as its own task while the receive loop keeps going"""
+    try:
+        await ask_prompt(websocket, stdin, request, session)
+    except EOFError:
+        print_error("Input closed")
+        await websocket.close()
+    except websockets.exceptions.ConnectionClosed:
+        pass
+
+async def ask_prompt(websocket, stdin, request, session):
+    """Ask the human for an `input_request` and send the reply"""
+    prompt = request.prompt
+    
+    if prompt == "name":
+        if session["name"] is not None:
+            # Reconnecting: claim our old seat
+            await websocket.send(Response(session["name"]).encode())
+            print_info(f"Re-joining as {session['name']}...")
+            return
+        screen.write()
+        user_input = await stdin.input(f"{Colors.BOLD}Enter your name:{Colors.ENDC} ")
+        session["name"] = user_input
+        await websocket.send(Response(user_input).encode())
+        print_info("Waiting for other players...")
+        print_divider()
+        
+    elif prompt == "choose_chor":
+        options = request.options or []
+        title = request.title or "Who is the Chor?"
+        
+        screen.write(f"\n{Colors.BOLD}{Colors.YELLOW}{title}{Colors.ENDC}")
+        for i, name in enumerate(options, 1):
+            screen.write(f"{Colors.CYAN}{i}.{Colors.ENDC} {name}")
+        
+        while True:
+            try:
+                screen.write()
+                choice_input = await stdin.input(f"{Colors.BOLD}Enter number (1-{len(options)}):{Colors.ENDC} ")
+                choice = int(choice_input)
+                if 1 <= choice <= len(options):
+                    selected = options[choice-1]
+                    await websocket.send(Response(selected).encode())
+                    print_divider()
+                    break
+                else:
+                    print_error(f"Please enter a number between 1 and {len(options)}")
+            except ValueError:
+                print_error("Please enter a valid number")
+
+    elif prompt == "number_input":
+        title = request.title or "Enter number:"
+        min_val = request.min
+        max_val = request.max
+        
+        screen.write(f"\n{Colors.BOLD}{Colors.YELLOW}{title}{Colors.ENDC}")
+        if min_val is not None and max_val is not None:
+            screen.write(f"{Colors.CYAN}Range: {min_val} - {max_val}{Colors.ENDC}")
+            
+        while True:
+            try:
+                screen.write()
+                user_str = await stdin.input(f"{Colors.BOLD}Enter number:{Colors.ENDC} ")
+                val = int(user_str)
+                
+                if min_val is not None and val < min_val:
+                    print_error(f"Too low! Minimum is {min_val}")
+                    continue
+                if max_val is not None and val > max_val:
+                    print_error(f"Too high! Maximum is {max_val}")
+                    continue
+                    
+                await websocket.send(Response(val).encode())
+                print_divider()
+                break
+            except ValueError:
+                print_error("Please enter a valid number")
+
+class GameView:
+    """
+    Shows server messages to the player. Every message type has its own
+    handler in `handlers`; a handler returns True when the game is over.
+    """
+    def __init__(self, stdin, session):
+        self.stdin = stdin
+        self.session = session
+        self.websocket = None
+        self.prompt_task = None
+        # "round / total" shown in the scoreboard panel
+        self.round = ""
+        # Map: message class -> coroutine(message)
+        self.handlers = {
+            InputRequest: self.on_input_request,
+            Info: self.on_info,
+            RoundStart: self.on_round_start,
+            RoleReveal: self.on_role_reveal,
+            SipahiTurn: self.on_sipahi_turn,
+            RoundEnd: self.on_round_end,
+            Scoreboard: self.on_scoreboard,
+            GameOver: self.on_game_over,
+            Standings: self.on_standings,
+            TournamentOver: self.on_tournament_over,
+            Error: self.on_error,
+        }
+
+    async def handle(self, message):
+        handler = self.handlers.get(type(message))
+        if handler:
+            return await handler(message)
+        return False
+
+    def cancel_prompt(self):
+        if self.prompt_task and not self.prompt_task.done():
+            self.prompt_task.cancel()
+
+    async def on_input_request(self, message):
+        # Answer in the background so we keep reading frames
+        self.cancel_prompt()
+        self.prompt_task = asyncio.create_task(
+            answer_prompt(self.websocket, self.stdin, message, self.session))
+
+    async def on_info(self, message):
+        print_info(message.message)
+
+    async def on_round_start(self, message):
+        self.round = f"{message.round} / {message.total}"
+        clear_screen()
+        print_header(f"ROUND {message.round} / {message.total}")
+
+    async def on_role_reveal(self, message):
+        print_role(message.role)
+
+    async def on_sipahi_turn(self, message):
+        screen.write(f"\n{Colors.BOLD}{Colors.RED}🔍 {message.sipahi} is the Sipahi!{Colors.ENDC}")
+        if message.chor_options is not None:
+            chor_list = ", ".join(message.chor_options)
+            screen.write(f"{Colors.CYAN}Possible Chors: {chor_list}{Colors.ENDC}\n")
+        print_divider()
+
+    async def on_round_end(self, message):
+        # Build suspense
+        screen.write("\n")
+        print_info("The Sipahi is making their guess...")
+        await asyncio.sleep(1)
+        print_info("...")
+        await asyncio.sleep(1)
+        
+        if message.correct:
+            screen.write(f"\n{Colors.BOLD}{Colors.GREEN}✅ CORRECT!{Colors.ENDC}")
+            screen.write(f"{Colors.GREEN}The Sipahi caught the Chor!{Colors.ENDC}\n")
+        else:
+            screen.write(f"\n{Colors.BOLD}{Colors.RED}❌ WRONG!{Colors.ENDC}")
+            screen.write(f"{Colors.RED}The Chor escaped!{Colors.ENDC}\n")
+        
+        await asyncio.sleep(1)
+        
+        print_divider()
+        screen.write(f"{Colors.BOLD}ROLES REVEALED:{Colors.ENDC}\n")
+        
+        role_colors = {
+            'Raja': Colors.RAJA,
+            'Mantri': Colors.MANTRI,
+            'Sipahi': Colors.SIPAHI,
+            'Chor': Colors.CHOR
+        }
+        
+        for name, role in message.all_roles.items():
+            color = role_colors.get(role, Colors.ENDC)
+            screen.write(f"  {color}{name}{Colors.ENDC}: {color}{role}{Colors.ENDC}")
+        screen.write()
+        print_divider()
+
+    async def on_scoreboard(self, message):
+        lines = [f"{Colors.BOLD}{Colors.YELLOW}📊 SCOREBOARD{Colors.ENDC}  {Colors.CYAN}Round {self.round}{Colors.ENDC}"]
+        
+        # Sort by score descending
+        sorted_scores = sorted(message.scores.items(), key=lambda x: x[1], reverse=True)
+        
+        for rank, (name, score) in enumerate(sorted_scores, 1):
+            medal = ""
+            if rank == 1:
+                medal = "🥇"
+            elif rank == 2:
+                medal = "🥈"
+            elif rank == 3:
+                medal = "🥉"
+            else:
+                medal = "  "
+                
+            lines.append(f"  {medal} {Colors.BOLD}{name}{Colors.ENDC}: {Colors.YELLOW}{score}{Colors.ENDC}")
+        
+        lines.append(f"{Colors.CYAN}{'-'*60}{Colors.ENDC}")
+        # Pinned at the top; only the rows whose score changed get redrawn
+        screen.panel(lines)
+
+    async def on_game_over(self, message):
+        screen.write("\n")
+        print_header("GAME OVER")
+        screen.write(f"\n{Colors.BOLD}{Colors.YELLOW}🏆 WINNER: {message.winner} 🏆{Colors.ENDC}\n")
+        
+        # Final scores
+        screen.write(f"{Colors.BOLD}FINAL SCORES:{Colors.ENDC}\n")
+        
+        sorted_final = sorted(message.final_scores.items(), key=lambda x: x[1], reverse=True)
+        for rank, (name, score) in enumerate(sorted_final, 1):
+            medal = ""
+            if rank == 1:
+                medal = "🥇"
+            elif rank == 2:
+                medal = "🥈"
+            elif rank == 3:
+                medal = "🥉"
+            else:
+                medal = f"{rank}."
+                
+            screen.write(f"  {medal} {Colors.BOLD}{name}{Colors.ENDC}: {Colors.YELLOW}{score}{Colors.ENDC}")
+        
+        # Rating changes (only humans are rated)
+        if message.ratings:
+            screen.write(f"\n{Colors.BOLD}RATINGS:{Colors.ENDC}\n")
+            for name, info in message.ratings.items():
+                color = Colors.GREEN if info["change"] >= 0 else Colors.RED
+                screen.write(f"  {name}: {info['rating']:.0f} {color}({info['change']:+.1f}){Colors.ENDC}")
+        
+        screen.write("\n")
+        print_divider()
+        if message.tournament:
+            # Stay checked in for the next tournament round
+            print_info("Waiting for the other tables...")
+            return False
+        print_info("Thanks for playing!")
+        return True
+
+    async def on_standings(self, message):
+        title = "FINAL STANDINGS" if message.final else \
+            f"STANDINGS AFTER ROUND {message.round} / {message.total}"
+        print_header(title)
+        entries = message.entries
+        you = message.you
+        if you and all(e["name"] != you["name"] for e in entries):
+            entries = entries + [you]
+        for entry in entries:
+            mark = f"{Colors.GREEN}>{Colors.ENDC}" if you and entry["name"] == you["name"] else " "
+            status = f"{Colors.RED}  out{Colors.ENDC}" if entry["eliminated"] else ""
+            screen.write(f" {mark}{entry['rank']:>4}. {Colors.BOLD}{entry['name']:<20}{Colors.ENDC}"
+                         f"{Colors.YELLOW}{entry['points']:>4} pts{Colors.ENDC}"
+                         f"  score {entry['score']:>6}  {entry['wins']}/{entry['games']} wins{status}")
+        print_divider()
+
+    async def on_tournament_over(self, message):
+        screen.write(f"\n{Colors.BOLD}{Colors.YELLOW}🏆 TOURNAMENT WINNER: {message.winner} 🏆{Colors.ENDC}\n")
+        print_info("Thanks for playing!")
+        return True
+
+    async def on_error(self, message):
+        print_error(message.message)
+        return True
 
 async def connect():
     """Connect to the game server and handle messages"""
     print_header("Raja Mantri Chor Sipahi")
     print_info(f"Connecting to {SERVER_URL}...")
     
-    try:
-        async with websockets.connect(SERVER_URL) as websocket:
-            print_success("Connected to server!")
-            print_divider()
-            
-            while True:
-                try:
-                    message = await websocket.recv()
-                    data = json.loads(message)
-                    msg_type = data.get("type")
-                    
-                    # Handle different message types
-                    if msg_type == "input_request":
-                        prompt = data.get("prompt")
-                        
-                        if prompt == "name":
-                            print()
-                            user_input = input(f"{Colors.BOLD}Enter your name:{Colors.ENDC} ")
-                            await websocket.send(json.dumps({"type": "response", "value": user_input}))
-                            print_info("Waiting for other players...")
-                            print_divider()
-                            
-                        elif prompt == "choose_chor":
-                            options = data.get("options", [])
-                            title = data.get("title", "Who is the Chor?")
-                            
-                            print(f"\n{Colors.BOLD}{Colors.YELLOW}{title}{Colors.ENDC}")
-                            for i, name in enumerate(options, 1):
-                                print(f"{Colors.CYAN}{i}.{Colors.ENDC} {name}")
-                            
-                            while True:
-                                try:
-                                    choice_input = input(f"\n{Colors.BOLD}Enter number (1-{len(options)}):{Colors.ENDC} ")
-                                    choice = int(choice_input)
-                                    if 1 <= choice <= len(options):
-                                        selected = options[choice-1]
-                                        await websocket.send(json.dumps({"type": "response", "value": selected}))
-                                        print_divider()
-                                        break
-                                    else:
-                                        print_error(f"Please enter a number between 1 and {len(options)}")
-                                except ValueError:
-                                    print_error("Please enter a valid number")
-
-                        elif prompt == "number_input":
-                            title = data.get("title", "Enter number:")
-                            min_val = data.get("min")
-                            max_val = data.get("max")
-                            
-                            print(f"\n{Colors.BOLD}{Colors.YELLOW}{title}{Colors.ENDC}")
-                            if min_val is not None and max_val is not None:
-                                print(f"{Colors.CYAN}Range: {min_val} - {max_val}{Colors.ENDC}")
-                                
-                            while True:
-                                try:
-                                    user_str = input(f"\n{Colors.BOLD}Enter number:{Colors.ENDC} ")
-                                    val = int(user_str)
-                                    
-                                    if min_val is not None and val < min_val:
-                                        print_error(f"Too low! Minimum is {min_val}")
-                                        continue
-                                    if max_val is not None and val > max_val:
-                                        print_error(f"Too high! Maximum is {max_val}")
-                                        continue
-                                        
-                                    await websocket.send(json.dumps({"type": "response", "value": val}))
-                                    print_divider()
-                                    break
-                                except ValueError:
-                                    print_error("Please enter a valid number")
-                    
-                    elif msg_type == "info":
-                        print_info(data.get('message'))
-                        
-                    elif msg_type == "round_start":
-                        round_num = data.get("round")
-                        total = data.get("total")
-                        clear_screen()
-                        print_header(f"ROUND {round_num} / {total}")
-                        
-                    elif msg_type == "role_reveal":
-                        role = data.get("role")
-                        print_role(role)
-                        
-                    elif msg_type == "sipahi_turn":
-                        sipahi = data.get("sipahi")
-                        print(f"\n{Colors.BOLD}{Colors.RED}🔍 {sipahi} is the Sipahi!{Colors.ENDC}")
-                        if "chor_options" in data:
-                            chor_list = ", ".join(data['chor_options'])
-                            print(f"{Colors.CYAN}Possible Chors: {chor_list}{Colors.ENDC}\n")
-                        print_divider()
+    # Remembered so we can re-attach to our seat after a server restart
+    session = {"name": None}
+    view = None
+    attempt = 0
+    
+    while True:
+        restart = False
+        try:
+            async with websockets.connect(SERVER_URL) as websocket:
+                attempt = 0
+                print_success("Connected to server!")
+                print_divider()
+                
+                if view is None:
+                    view = GameView(AsyncInput(), session)
+                view.websocket = websocket
+                
+                while True:
+                    try:
+                        # One decode per frame, then the handler for its type
+                        message = decode(await websocket.recv())
+                        if await view.handle(message):
+                            return  # Exit game loop
                             
-                    elif msg_type == "round_end":
-                        correct = data.get("correct")
-                        roles = data.get("all_roles")
-                        
-                        # Build suspense
-                        print("\n")
-                        print_info("The Sipahi is making their guess...")
-                        await asyncio.sleep(1)
-                        print_info("...")
-                        await asyncio.sleep(1)
-                        
-                        if correct:
-                            print(f"\n{Colors.BOLD}{Colors.GREEN}✅ CORRECT!{Colors.ENDC}")
-                            print(f"{Colors.GREEN}The Sipahi caught the Chor!{Colors.ENDC}\n")
+                    except ProtocolError as e:
+                        print_error(f"Bad message from server: {e}")
+                    except websockets.exceptions.ConnectionClosed as e:
+                        if e.rcvd is not None and e.rcvd.code == 1012:
+                            # Server restart: our seat is kept, come back later
+                            restart = True
+                        elif (e.rcvd is not None and e.rcvd.code == 1013
+                              and 0 < attempt < RECONNECT_ATTEMPTS):
+                            # Our room is still held for the restarted server
+                            restart = True
                         else:
-                            print(f"\n{Colors.BOLD}{Colors.RED}❌ WRONG!{Colors.ENDC}")
-                            print(f"{Colors.RED}The Chor escaped!{Colors.ENDC}\n")
-                        
-                        await asyncio.sleep(1)
-                        
-                        print_divider()
-                        print(f"{Colors.BOLD}ROLES REVEALED:{Colors.ENDC}\n")
-                        
-                        role_colors = {
-                            'Raja': Colors.RAJA,
-                            'Mantri': Colors.MANTRI,
-                            'Sipahi': Colors.SIPAHI,
-                            'Chor': Colors.CHOR
-                        }
-                        
-                        for name, role in roles.items():
-                            color = role_colors.get(role, Colors.ENDC)
-                            print(f"  {color}{name}{Colors.ENDC}: {color}{role}{Colors.ENDC}")
-                        print()
-                        print_divider()
-                            
-                    elif msg_type == "scoreboard":
-                        scores = data.get("scores")
-                        print(f"\n{Colors.BOLD}{Colors.YELLOW}📊 SCOREBOARD{Colors.ENDC}\n")
-                        
-                        # Sort by score descending
-                        sorted_scores = sorted(scores.items(), key=lambda x: x[1], reverse=True)
-                        
-                        for rank, (name, score) in enumerate(sorted_scores, 1):
-                            medal = ""
-                            if rank == 1:
-                                medal = "🥇"
-                            elif rank == 2:
-                                medal = "🥈"
-                            elif rank == 3:
-                                medal = "🥉"
-                            else:
-                                medal = "  "
-                                
-                            print(f"  {medal} {Colors.BOLD}{name}{Colors.ENDC}: {Colors.YELLOW}{score}{Colors.ENDC}")
-                        
-                        print()
-                        print_divider()
-                            
-                    elif msg_type == "game_over":
-                        winner = data.get("winner")
-                        print("\n")
-                        print_header("GAME OVER")
-                        print(f"\n{Colors.BOLD}{Colors.YELLOW}🏆 WINNER: {winner} 🏆{Colors.ENDC}\n")
+                            print_error("Disconnected from server")
+                        break
+                    except Exception as e:
+                        print_error(f"Unexpected error: {e}")
+                        break
                         
-                        # Final scores
-                        final_scores = data.get("final_scores", {})
-                        print(f"{Colors.BOLD}FINAL SCORES:{Colors.ENDC}\n")
-                        
-                        sorted_final = sorted(final_scores.items(), key=lambda x: x[1], reverse=True)
-                        for rank, (name, score) in enumerate(sorted_final, 1):
-                            medal = ""
-                            if rank == 1:
-                                medal = "🥇"
-                            elif rank == 2:
-                                medal = "🥈"
-                            elif rank == 3:
-                                medal = "🥉"
-                            else:
-                                medal = f"{rank}."
-                                
-                            print(f"  {medal} {Colors.BOLD}{name}{Colors.ENDC}: {Colors.YELLOW}{score}{Colors.ENDC}")
-                        
-                        print("\n")
-                        print_divider()
-                        print_info("Thanks for playing!")
-                        return  # Exit game loop
-                        
-                    elif msg_type == "error":
-                        print_error(data.get('message'))
-                        return
-                        
-                except websockets.exceptions.ConnectionClosed:
-                    print_error("Disconnected from server")
-                    break
-                except Exception as e:
-                    print_error(f"Unexpected error: {e}")
-                    break
-                    
-    except ConnectionRefusedError:
-        print_error("Could not connect to server")
-        print_info("Make sure the server is running on ws://localhost:8765")
-    except Exception as e:
-        print_error(f"Connection error: {e}")
+        except OSError as e:
+            if session["name"] and 0 < attempt < RECONNECT_ATTEMPTS:
+                # The restarted server is not up yet
+                restart = True
+            elif isinstance(e, ConnectionRefusedError):
+                print_error("Could not connect to server")
+                print_info(f"Make sure the server is running on {SERVER_URL}")
+            else:
+                print_error(f"Connection error: {e}")
+        except Exception as e:
+            print_error(f"Connection error: {e}")
+            
+        if not restart:
+            return
+            
+        view.cancel_prompt()
+        attempt += 1
+        # Random delay so a restart is not followed by every client at once
+        delay = random.uniform(RECONNECT_DELAY[0], RECONNECT_DELAY[1]) * min(attempt, 4)
+        print_info(f"Server restarting, reconnecting in {delay:.1f}s...")
+        await asyncio.sleep(delay)
+
+# -- HEADLESS MODE --
+# Many scripted clients in one process, speaking the real protocol.
+
+class HeadlessStats:
+    """Counters shared by every headless session"""
+    def __init__(self):
+        self.started = time.monotonic()
+        self.frames = 0
+        self.prompts = 0
+        self.answer_time = 0.0
+        self.games = 0       # game_over frames seen (one per seat)
+        self.rejected = 0    # server closed us before the game ended
+        self.errors = 0
+        self.bad_frames = 0  # frames that did not decode (skipped)
+
+    def summary(self):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        avg_ms = (self.answer_time / self.prompts * 1000) if self.prompts else 0.0
+        return (f"{elapsed:7.1f}s | games: {self.games} ({self.games / elapsed * 60:.1f}/min) | "
+                f"frames: {self.frames} ({self.frames / elapsed:.1f}/s) | "
+                f"prompts: {self.prompts} (avg {avg_ms:.3f} ms) | "
+                f"rejected: {self.rejected} | errors: {self.errors} | bad frames: {self.bad_frames}")
+
+class BotSession:
+    """One scripted player that answers `input_request` prompts with a policy"""
+    def __init__(self, name, policy, stats, url=SERVER_URL, humans=4, rounds=5):
+        self.name = name
+        self.policy = policy
+        self.stats = stats
+        self.url = url
+        # Used if this session ends up being the host
+        self.humans = humans
+        self.rounds = rounds
+        # Map: name -> Player mirror of what the broadcasts told us
+        self.players = {}
+
+    def player(self, name):
+        if name not in self.players:
+            self.players[name] = Player(name)
+        return self.players[name]
+
+    def answer(self, request):
+        """Returns the value to send back for an `input_request`"""
+        prompt = request.prompt
+        
+        if prompt == "name":
+            return self.name
+            
+        elif prompt == "number_input":
+            low = self.rounds if request.min is None else request.min
+            high = self.rounds if request.max is None else request.max
+            return max(low, min(high, self.rounds))
+            
+        elif prompt == "choose_chor":
+            options = request.options or []
+            # The host setup reuses `choose_chor` with "N Humans" options;
+            # take the largest count that does not exceed ours.
+            if options and all(option.endswith(("Human", "Humans")) for option in options):
+                fitting = [o for o in options if int(o.split()[0]) <= self.humans]
+                return fitting[-1] if fitting else options[0]
+            suspects = [self.player(name) for name in options]
+            return choose_guess(self.policy, suspects).name
+            
+        return None
+
+    async def on_input_request(self, websocket, message):
+        started = time.perf_counter()
+        value = self.answer(message)
+        self.stats.answer_time += time.perf_counter() - started
+        self.stats.prompts += 1
+        await websocket.send(Response(value).encode())
+
+    async def on_round_end(self, websocket, message):
+        # Keep chor counts so tracker has something to go on; `scores`
+        # here are this round's points, the totals come with `scoreboard`
+        for name, role in message.all_roles.items():
+            if role == "Chor":
+                self.player(name).chor_count += 1
+
+    async def on_scoreboard(self, websocket, message):
+        for name, score in message.scores.items():
+            self.player(name).score = score
+
+    async def on_game_over(self, websocket, message):
+        self.stats.games += 1
+        # Tournament players keep the connection until the event ends
+        if not message.tournament:
+            return True
+
+    async def on_tournament_over(self, websocket, message):
+        return True
+
+    async def on_error(self, websocket, message):
+        return False
+
+    async def play(self):
+        """Plays one game. Returns True if it reached `game_over`."""
+        self.players = {}
+        # Map: message class -> coroutine(websocket, message); a result
+        # other than None ends the game with that result
+        handlers = {
+            InputRequest: self.on_input_request,
+            RoundEnd: self.on_round_end,
+            Scoreboard: self.on_scoreboard,
+            GameOver: self.on_game_over,
+            TournamentOver: self.on_tournament_over,
+            Error: self.on_error,
+        }
+        async with websockets.connect(self.url) as websocket:
+            async for frame in websocket:
+                self.stats.frames += 1
+                try:
+                    message = decode(frame)
+                except ProtocolError as e:
+                    # One bad frame must not end the session (or its game)
+                    self.stats.bad_frames += 1
+                    print(f"{self.name}: skipped bad frame: {e}", flush=True)
+                    continue
+                handler = handlers.get(type(message))
+                if handler:
+                    result = await handler(websocket, message)
+                    if result is not None:
+                        return result
+        return False
+
+    async def run(self, games, retry_delay=1.0):
+        """Keep playing until `games` games are done (0 = forever)"""
+        played = 0
+        while games == 0 or played < games:
+            try:
+                if await self.play():
+                    played += 1
+                    continue
+                self.stats.rejected += 1
+            except (OSError, websockets.exceptions.WebSocketException):
+                self.stats.errors += 1
+            # Jitter keeps sessions from reconnecting in lockstep after a restart
+            await asyncio.sleep(retry_delay * random.uniform(0.5, 1.5))
+
+async def run_headless(args):
+    """Drive `args.bots` concurrent sessions and report throughput"""
+    stats = HeadlessStats()
+    humans = args.humans or args.bots
+    
+    tasks = []
+    for i in range(args.bots):
+        policy = random.choice(POLICIES) if args.policy == "mixed" else args.policy
+        session = BotSession(f"{args.name}_{i+1}", policy, stats,
+                             url=args.url, humans=humans, rounds=args.rounds)
+        tasks.append(asyncio.create_task(session.run(args.games)))
+        # Give the host a head start so only one session configures the game
+        await asyncio.sleep(args.stagger)
+    
+    async def report():
+        while True:
+            await asyncio.sleep(args.report)
+            print(stats.summary(), flush=True)
+    
+    reporter = asyncio.create_task(report())
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        reporter.cancel()
+        for task in tasks:
+            task.cancel()
+        print(f"DONE {stats.summary()}", flush=True)
+
+async def query_leaderboard(count=10, name=None):
+    """One-shot leaderboard (or single player rank) query"""
+    async with websockets.connect(SERVER_URL) as websocket:
+        if name:
+            await websocket.send(Command("rank", name=name).encode())
+        else:
+            await websocket.send(Command("leaderboard", count=count).encode())
+            
+        async for frame in websocket:
+            try:
+                message = decode(frame)
+            except ProtocolError as e:
+                print_error(f"Bad message from server: {e}")
+                continue
+            
+            if isinstance(message, LeaderboardPage):
+                print_header(f"LEADERBOARD ({message.total} players)")
+                for entry in message.entries:
+                    screen.write(f"  {entry['rank']:>4}. {Colors.BOLD}{entry['name']:<20}{Colors.ENDC}"
+                                 f"{Colors.YELLOW}{entry['rating']:>7.0f}{Colors.ENDC}"
+                                 f"   {entry['wins']}/{entry['games']} wins")
+                return
+            elif isinstance(message, Rank):
+                entry = message.entry
+                if entry:
+                    print_info(f"{entry['name']} is #{entry['rank']} with a rating of {entry['rating']:.0f} "
+                               f"({entry['wins']}/{entry['games']} wins)")
+                else:
+                    print_info(f"{message.name} has no rating yet")
+                return
+            elif isinstance(message, Error):
+                print_error(message.message)
+                return
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Raja Mantri Chor Sipahi client")
+    parser.add_argument("--url", default=SERVER_URL, help="server websocket URL")
+    parser.add_argument("--leaderboard", type=int, default=0, metavar="N",
+                        help="show the top N players and exit")
+    parser.add_argument("--rank", default=None, metavar="NAME",
+                        help="show the leaderboard rank of one player and exit")
+    parser.add_argument("--bots", type=int, default=0,
+                        help="run this many headless sessions instead of the interactive client")
+    parser.add_argument("--policy", default="mixed", choices=POLICIES + ["mixed"],
+                        help="guessing policy for headless sessions")
+    parser.add_argument("--games", type=int, default=1,
+                        help="games per headless session (0 = keep playing)")
+    parser.add_argument("--humans", type=int, default=0,
+                        help="humans a headless host asks for (default: bots, capped by the server)")
+    parser.add_argument("--rounds", type=int, default=3, help="rounds a headless host asks for")
+    parser.add_argument("--name", default="Sim", help="name prefix for headless sessions")
+    parser.add_argument("--stagger", type=float, default=0.1, help="seconds between session starts")
+    parser.add_argument("--report", type=float, default=5.0, help="seconds between throughput reports")
+    return parser.parse_args(argv)
 
 def main():
     """Main entry point"""
+    global SERVER_URL
+    args = parse_args()
+    SERVER_URL = args.url
+    
+    if args.leaderboard or args.rank:
+        try:
+            asyncio.run(query_leaderboard(args.leaderboard or 10, args.rank))
+        except OSError as e:
+            print_error(f"Connection error: {e}")
+        return
+    
+    if args.bots > 0:
+        try:
+            asyncio.run(run_headless(args))
+        except KeyboardInterrupt:
+            pass
+        return
+    
     try:
         asyncio.run(connect())
     except KeyboardInterrupt:
+        screen.close()
         print(f"\n\n{Colors.YELLOW}Exiting game...{Colors.ENDC}")
         print_info("Goodbye! 👋\n")
+    finally:
+        screen.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,190 @@
+"""
+Read-only admin API.
+
+A publisher task asks the node for its status every PUBLISH_INTERVAL
+seconds and freezes the answer into an AdminSnapshot: tuples of rooms,
+each already encoded as JSON. HTTP requests only ever read the latest
+snapshot (swapped in as one reference), so admin traffic never touches
+a GameServer, never waits on a game coroutine and costs the game loop
+nothing but the periodic publish.
+
+    GET /health                       liveness
+    GET /stats                        node summary and room counts
+    GET /rooms?offset=&limit=         rooms, sorted by name
+          &state=lobby|playing|parked|empty  &variant=  &player=  &pending=1
+    GET /rooms/<name>                 one room
+    GET /fairness                     role assignment audit (see game/fairness.py)
+
+Every response carries `published_at` and `age` (seconds) of the snapshot.
+"""
+import asyncio
+import json
+import time
+from collections import Counter
+from urllib.parse import parse_qs, unquote, urlsplit
+
+# -- CONFIGURATION --
+ADMIN_PORT = 8790
+PUBLISH_INTERVAL = 1.0  # Seconds between snapshots
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+MAX_REQUEST_BYTES = 8192
+REQUEST_TIMEOUT = 5.0
+
+
+class RoomEntry:
+    __slots__ = ("name", "state", "variant", "players", "pending", "json")
+
+    def __init__(self, name, status):
+        self.name = name
+        self.state = status["state"]
+        self.variant = status["variant"]
+        # Lower-case names for the `player` filter
+        self.players = tuple(p["name"].lower() for p in status["players"])
+        self.pending = bool(status["pending_inputs"])
+        self.json = json.dumps(dict(status, room=name), separators=(",", ":"))
+
+    def matches(self, state, variant, player, pending):
+        if state and self.state != state:
+            return False
+        if variant and self.variant != variant:
+            return False
+        if player and not any(player in name for name in self.players):
+            return False
+        if pending and not self.pending:
+            return False
+        return True
+
+
+class AdminSnapshot:
+    """Immutable view of a node at one moment"""
+    __slots__ = ("published_at", "rooms", "by_name", "stats_json", "fairness_json")
+
+    def __init__(self, node_status, rooms, published_at, fairness=None):
+        self.published_at = published_at
+        self.rooms = tuple(sorted((RoomEntry(name, status) for name, status in rooms),
+                                  key=lambda entry: entry.name))
+        self.by_name = {entry.name: entry for entry in self.rooms}
+
+        states = Counter(entry.state for entry in self.rooms)
+        stats = dict(node_status,
+                     rooms=len(self.rooms),
+                     rooms_by_state=dict(states),
+                     players=sum(len(entry.players) for entry in self.rooms),
+                     pending_inputs=sum(1 for entry in self.rooms if entry.pending))
+        self.stats_json = json.dumps(stats, separators=(",", ":"))
+        self.fairness_json = json.dumps(fairness, separators=(",", ":"))
+
+    def page(self, offset, limit, state=None, variant=None, player=None, pending=False):
+        """(total matching, entries of the requested page)"""
+        if state or variant or player or pending:
+            player = player.lower() if player else None
+            matching = [e for e in self.rooms if e.matches(state, variant, player, pending)]
+        else:
+            matching = self.rooms
+        return len(matching), matching[offset:offset + limit]
+
+
+class AdminServer:
+    """
+    Serves AdminSnapshots of `node` (anything with a `status()` returning
+    (node summary, [(room name, room status), ...]), and optionally a
+    `fairness` auditor) over plain HTTP.
+    """
+    def __init__(self, node, interval=PUBLISH_INTERVAL, clock=time.time):
+        self.node = node
+        self.interval = interval
+        self.clock = clock
+        self.snapshot = None
+        self.publish()
+
+    def publish(self):
+        node_status, rooms = self.node.status()
+        auditor = getattr(self.node, "fairness", None)
+        # Per-player rows can be many; they stay in the exported file
+        fairness = auditor.summary(players=False) if auditor else None
+        # One reference swap; requests holding the old snapshot keep using it
+        self.snapshot = AdminSnapshot(node_status, rooms, self.clock(), fairness)
+
+    async def publisher(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.publish()
+            except Exception as e:
+                # Keep serving the last good snapshot
+                print(f"Admin snapshot failed: {e}")
+
+    def respond(self, target):
+        """Returns (HTTP status, JSON body) for a GET of `target`"""
+        snapshot = self.snapshot
+        url = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        path = url.path.rstrip("/") or "/"
+        meta = (f'"published_at":{snapshot.published_at:.3f},'
+                f'"age":{self.clock() - snapshot.published_at:.3f}')
+
+        if path == "/health":
+            return 200, '{"ok":true,' + meta + '}'
+
+        if path == "/stats":
+            return 200, '{' + meta + ',"stats":' + snapshot.stats_json + '}'
+
+        if path == "/fairness":
+            return 200, '{' + meta + ',"fairness":' + snapshot.fairness_json + '}'
+
+        if path == "/rooms":
+            try:
+                offset = max(0, int(query.get("offset", 0)))
+                limit = max(1, min(int(query.get("limit", PAGE_SIZE)), MAX_PAGE_SIZE))
+            except ValueError:
+                return 400, '{"error":"offset and limit must be integers"}'
+            total, entries = snapshot.page(offset, limit, query.get("state"), query.get("variant"),
+                                           query.get("player"), query.get("pending") in ("1", "true"))
+            return 200, ('{' + meta + f',"total":{total},"offset":{offset},"limit":{limit},"rooms":['
+                         + ",".join(entry.json for entry in entries) + ']}')
+
+        if path.startswith("/rooms/"):
+            entry = snapshot.by_name.get(unquote(path[len("/rooms/"):]))
+            if entry is None:
+                return 404, '{"error":"no such room"}'
+            return 200, '{' + meta + ',"room":' + entry.json + '}'
+
+        return 404, '{"error":"not found"}'
+
+    async def handle(self, reader, writer):
+        """One HTTP/1.1 request per connection"""
+        try:
+            # Headers beyond `limit` bytes raise LimitOverrunError
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), REQUEST_TIMEOUT)
+            method, target, _ = head.split(b"\r\n", 1)[0].decode("latin-1").split(" ", 2)
+            if method != "GET":
+                status, body = 405, '{"error":"read-only API, use GET"}'
+            else:
+                status, body = self.respond(target)
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            status, body = 400, '{"error":"bad request"}'
+
+        data = body.encode("utf-8")
+        reason = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}[status]
+        writer.write(f"HTTP/1.1 {status} {reason}\r\n"
+                     f"Content-Type: application/json\r\n"
+                     f"Content-Length: {len(data)}\r\n"
+                     f"Cache-Control: no-store\r\n"
+                     f"Connection: close\r\n\r\n".encode("latin-1") + data)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host, port):
+        """Publishes snapshots and answers requests until cancelled"""
+        publisher = asyncio.create_task(self.publisher())
+        server = await asyncio.start_server(self.handle, host, port, limit=MAX_REQUEST_BYTES)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            publisher.cancel()
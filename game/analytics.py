@@ -0,0 +1,309 @@
+"""
+Statistics over the game history (see `game/history.py`).
+
+    python -m game.analytics nodes/localhost_8765/history.bin [--workers N] [--player NAME] [--json]
+
+The history file is memory-mapped and scanned in fixed-size chunks by a
+pool of worker processes. Each chunk is split into column slices and
+counted with C-implemented iterators (Counter, compress, map) instead of
+a Python loop per record. Workers only return small per-player/strategy
+totals, so memory stays the same no matter how long the history is.
+"""
+import argparse
+import json
+import mmap
+import os
+import sys
+from array import array
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import compress
+from operator import and_
+
+from game.history import (COLUMNS, FIELDS, FLAG_LAST_ROUND, FLAG_WON,
+                          HEADER_SIZE, RECORD_SIZE, StringTable, check_header,
+                          record_count)
+
+CHUNK_RECORDS = 1 << 16   # Records per chunk (~2.5 MB)
+SCORE_BUCKET = 1000       # Width of the final score histogram buckets
+WON_LAST = FLAG_WON | FLAG_LAST_ROUND
+
+
+def sum_by_key(pairs):
+    """Counter of (key, value) pairs -> Counter of key -> sum(value)"""
+    totals = Counter()
+    for (key, value), n in pairs.items():
+        totals[key] += value * n
+    return totals
+
+
+class Streak:
+    """
+    Longest run of wins, mergeable across chunks:
+    wins at the start, wins at the end, best run and games seen.
+    """
+    __slots__ = ("games", "prefix", "suffix", "best")
+
+    def __init__(self, games=0, prefix=0, suffix=0, best=0):
+        self.games = games
+        self.prefix = prefix
+        self.suffix = suffix
+        self.best = best
+
+    def add(self, won):
+        if won:
+            if self.prefix == self.games:
+                self.prefix += 1
+            self.suffix += 1
+            self.best = max(self.best, self.suffix)
+        else:
+            self.suffix = 0
+        self.games += 1
+
+    def merge(self, later):
+        """Append a streak that happened after this one"""
+        best = max(self.best, later.best, self.suffix + later.prefix)
+        prefix = self.prefix if self.prefix < self.games else self.games + later.prefix
+        suffix = later.suffix if later.suffix < later.games else later.games + self.suffix
+        self.games += later.games
+        self.prefix, self.suffix, self.best = prefix, suffix, best
+
+
+class Totals:
+    """Counters for a slice of the history; merge() combines slices in order"""
+    def __init__(self):
+        self.records = 0
+        self.games = 0
+        # Game ids of the first and last final-round rows: a game whose
+        # rows straddle two chunks must only be counted once
+        self.first_game = None
+        self.last_game = None
+        self.rounds = Counter()          # player -> rounds played
+        self.points = Counter()          # player -> points earned
+        self.games_played = Counter()    # player -> games
+        self.wins = Counter()            # player -> games won
+        self.guesses = Counter()         # player -> rounds as guesser
+        self.correct = Counter()         # player -> correct guesses
+        self.strategy_rounds = Counter()
+        self.strategy_points = Counter()
+        self.strategy_games = Counter()
+        self.strategy_wins = Counter()
+        self.strategy_guesses = Counter()
+        self.strategy_correct = Counter()
+        self.final_scores = Counter()    # bucket -> games
+        self.streaks = {}                # player -> Streak
+
+    def merge(self, other):
+        self.records += other.records
+        self.games += other.games
+        if other.first_game is not None:
+            if self.last_game is not None and self.last_game == other.first_game:
+                self.games -= 1
+            if self.first_game is None:
+                self.first_game = other.first_game
+            self.last_game = other.last_game
+        for name in ("rounds", "points", "games_played", "wins", "guesses", "correct",
+                     "strategy_rounds", "strategy_points", "strategy_games",
+                     "strategy_wins", "strategy_guesses", "strategy_correct",
+                     "final_scores"):
+            getattr(self, name).update(getattr(other, name))
+        for player, streak in other.streaks.items():
+            if player in self.streaks:
+                self.streaks[player].merge(streak)
+            else:
+                self.streaks[player] = streak
+
+
+def read_chunk(path, start, count):
+    """Copy `count` records starting at record `start` out of the mapped file"""
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            begin = HEADER_SIZE + start * RECORD_SIZE
+            values = array("i")
+            values.frombytes(mm[begin:begin + count * RECORD_SIZE])
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def scan_chunk(path, start, count):
+    """Aggregate one chunk of records (runs in a worker process)"""
+    values = read_chunk(path, start, count)
+    width = len(FIELDS)
+
+    def column(name):
+        return values[COLUMNS[name]::width]
+
+    game = column("game")
+    player = column("player")
+    strategy = column("strategy")
+    guesser = column("guesser")
+    correct = column("correct")
+    points = column("points")
+    score = column("score")
+    flags = column("flags")
+
+    guessed_right = array("i", map(and_, guesser, correct))
+    last = array("i", map(FLAG_LAST_ROUND.__and__, flags))
+    won = array("i", map(WON_LAST.__eq__, flags))
+
+    totals = Totals()
+    totals.records = count
+    # One final-round row per seat: count each game id once, however
+    # many players tied for the win
+    finished = list(compress(game, last))
+    totals.games = len(set(finished))
+    if finished:
+        totals.first_game = finished[0]
+        totals.last_game = finished[-1]
+
+    totals.rounds = Counter(player)
+    totals.points = sum_by_key(Counter(zip(player, points)))
+    totals.games_played = Counter(compress(player, last))
+    totals.wins = Counter(compress(player, won))
+    totals.guesses = Counter(compress(player, guesser))
+    totals.correct = Counter(compress(player, guessed_right))
+
+    totals.strategy_rounds = Counter(strategy)
+    totals.strategy_points = sum_by_key(Counter(zip(strategy, points)))
+    totals.strategy_games = Counter(compress(strategy, last))
+    totals.strategy_wins = Counter(compress(strategy, won))
+    totals.strategy_guesses = Counter(compress(strategy, guesser))
+    totals.strategy_correct = Counter(compress(strategy, guessed_right))
+
+    totals.final_scores = Counter(map(SCORE_BUCKET.__rfloordiv__, compress(score, last)))
+
+    # Streaks depend on order; only one row per player per game is visited
+    for p, w in zip(compress(player, last), compress(won, last)):
+        if p not in totals.streaks:
+            totals.streaks[p] = Streak()
+        totals.streaks[p].add(w)
+
+    return totals
+
+
+def analyze(path, workers=None, chunk_records=CHUNK_RECORDS):
+    """Scan the whole history and return merged Totals"""
+    with open(path, "rb") as f:
+        check_header(f)
+
+    total = record_count(path)
+    workers = workers or os.cpu_count() or 1
+    chunks = ((start, min(chunk_records, total - start))
+              for start in range(0, total, chunk_records))
+
+    result = Totals()
+    if workers == 1:
+        for start, count in chunks:
+            result.merge(scan_chunk(path, start, count))
+        return result
+
+    with ProcessPoolExecutor(workers) as pool:
+        # Keep a bounded number of chunks in flight, merge in file order
+        pending = deque()
+        for start, count in chunks:
+            pending.append(pool.submit(scan_chunk, path, start, count))
+            if len(pending) >= workers * 2:
+                result.merge(pending.popleft().result())
+        while pending:
+            result.merge(pending.popleft().result())
+    return result
+
+
+def ratio(a, b):
+    return a / b if b else 0.0
+
+
+def summarize(totals, strings):
+    """Turns Totals into plain dicts keyed by name"""
+    players = {}
+    for pid, rounds in totals.rounds.items():
+        streak = totals.streaks.get(pid, Streak())
+        players[strings[pid]] = {
+            "games": totals.games_played[pid],
+            "wins": totals.wins[pid],
+            "win_rate": ratio(totals.wins[pid], totals.games_played[pid]),
+            "rounds": rounds,
+            "points_per_round": ratio(totals.points[pid], rounds),
+            "sipahi_rounds": totals.guesses[pid],
+            "sipahi_accuracy": ratio(totals.correct[pid], totals.guesses[pid]),
+            "best_win_streak": streak.best,
+            "current_win_streak": streak.suffix,
+        }
+
+    strategies = {}
+    for sid, rounds in totals.strategy_rounds.items():
+        strategies[strings[sid]] = {
+            "games": totals.strategy_games[sid],
+            "wins": totals.strategy_wins[sid],
+            "win_rate": ratio(totals.strategy_wins[sid], totals.strategy_games[sid]),
+            "points_per_round": ratio(totals.strategy_points[sid], rounds),
+            "sipahi_rounds": totals.strategy_guesses[sid],
+            "sipahi_accuracy": ratio(totals.strategy_correct[sid], totals.strategy_guesses[sid]),
+        }
+
+    guesses = sum(totals.guesses.values())
+    return {
+        "records": totals.records,
+        "games": totals.games,
+        "sipahi_accuracy": ratio(sum(totals.correct.values()), guesses),
+        "players": players,
+        "strategies": strategies,
+        "final_scores": {bucket * SCORE_BUCKET: n for bucket, n in sorted(totals.final_scores.items())},
+    }
+
+
+def print_report(summary, top=20, player=None):
+    print(f"Games: {summary['games']}  Records: {summary['records']}  "
+          f"Sipahi accuracy: {summary['sipahi_accuracy']:.1%}")
+
+    players = summary["players"]
+    if player is not None:
+        players = {player: players[player]} if player in players else {}
+
+    print(f"\n{'PLAYER':<20}{'GAMES':>7}{'WINS':>7}{'WIN%':>7}{'PTS/RND':>9}{'SIPAHI':>8}{'ACC%':>7}{'STREAK':>8}")
+    ranked = sorted(players.items(), key=lambda item: item[1]["wins"], reverse=True)
+    for name, s in ranked[:top]:
+        print(f"{name[:19]:<20}{s['games']:>7}{s['wins']:>7}{s['win_rate']:>7.1%}"
+              f"{s['points_per_round']:>9.0f}{s['sipahi_rounds']:>8}{s['sipahi_accuracy']:>7.1%}"
+              f"{s['best_win_streak']:>8}")
+
+    if player is None:
+        print(f"\n{'STRATEGY':<20}{'GAMES':>7}{'WINS':>7}{'WIN%':>7}{'PTS/RND':>9}{'SIPAHI':>8}{'ACC%':>7}")
+        for name, s in sorted(summary["strategies"].items()):
+            print(f"{name:<20}{s['games']:>7}{s['wins']:>7}{s['win_rate']:>7.1%}"
+                  f"{s['points_per_round']:>9.0f}{s['sipahi_rounds']:>8}{s['sipahi_accuracy']:>7.1%}")
+
+        print("\nFINAL SCORE DISTRIBUTION")
+        scores = summary["final_scores"]
+        peak = max(scores.values(), default=0)
+        for low, n in scores.items():
+            bar = "#" * max(1, round(40 * n / peak))
+            print(f"  {low:>6}-{low + SCORE_BUCKET - 1:<6} {n:>8} {bar}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Statistics over the game history")
+    parser.add_argument("path", help="history file (server.py writes nodes/<node id>/history.bin)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--chunk", type=int, default=CHUNK_RECORDS, help="records per chunk")
+    parser.add_argument("--player", default=None, help="only show this player")
+    parser.add_argument("--top", type=int, default=20, help="players to list")
+    parser.add_argument("--json", action="store_true", help="print JSON instead of tables")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.path):
+        print(f"No history at {args.path}")
+        return
+
+    totals = analyze(args.path, workers=args.workers, chunk_records=args.chunk)
+    summary = summarize(totals, StringTable(args.path + ".strings"))
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print_report(summary, top=args.top, player=args.player)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+"""
+Per-message compression policy for server websockets.
+
+    python -m game.compression [--variant mahal] [--recording session.rec] [--min-size 128]
+
+`permessage-deflate` normally compresses every frame. Most of our
+frames are a few dozen bytes of JSON (`info`, `round_start`,
+`role_reveal`) where deflate costs CPU and barely saves a byte, while
+`game_over`, `scoreboard` and tournament `standings` of big tables do
+shrink. AdaptiveDeflate sends frames shorter than `min_size` as they
+are (RFC 7692 lets any message skip compression), and CompressionPolicy
+sets the window and memory level, which decide the per-connection
+deflate memory.
+
+A client opts out of server compression with `?compress=0` in its URL;
+the encoder of that connection is dropped.
+
+Run as a module, it replays typical frame streams (or the server frames
+of a session recording) through each setting and reports CPU time
+against bytes saved per message type.
+"""
+import argparse
+import json
+import random
+import time
+import zlib
+from collections import defaultdict
+from urllib.parse import parse_qs, urlsplit
+
+from websockets.extensions.permessage_deflate import PerMessageDeflate, ServerPerMessageDeflateFactory
+from websockets.frames import CTRL_OPCODES, Opcode
+
+from game.protocol import (GameOver, Info, InputRequest, RoleReveal, RoundEnd, RoundStart,
+                           Scoreboard, SipahiTurn, Standings)
+from game.recorder import OUT, read_session
+from game.rules import VARIANTS
+
+# -- CONFIGURATION --
+MODES = ("adaptive", "deflate", "off")
+MIN_SIZE = 128        # Frames shorter than this (bytes) are sent uncompressed
+WINDOW_BITS = 11      # LZ77 window of the server's encoder: 2 KiB
+CLIENT_WINDOW_BITS = 12
+MEM_LEVEL = 4         # zlib hash table size, 1-9
+LEVEL = 6             # zlib compression level, 1-9
+OPT_OUT_VALUES = ("0", "off", "false", "no")
+
+
+def deflate_memory(window_bits, mem_level):
+    """Bytes zlib allocates for one compressor (see zlib's zconf.h)"""
+    return (1 << (window_bits + 2)) + (1 << (mem_level + 9))
+
+
+class AdaptiveDeflate(PerMessageDeflate):
+    """permessage-deflate that leaves small messages (or every message once disabled) uncompressed"""
+    def __init__(self, *args, min_size=MIN_SIZE, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.min_size = min_size
+        self.enabled = True
+        # True while the frames of the current message go out as they are
+        self.skipping = False
+        self.compressed = 0
+        self.skipped = 0
+
+    def encode(self, frame):
+        if frame.opcode in CTRL_OPCODES:
+            return frame
+        if frame.opcode is not Opcode.CONT:
+            # First frame of a message decides for the whole message
+            self.skipping = not self.enabled or len(frame.data) < self.min_size
+            if self.skipping:
+                self.skipped += 1
+            else:
+                self.compressed += 1
+        if self.skipping:
+            return frame
+        return super().encode(frame)
+
+    def disable(self):
+        """Stop compressing for good and free the encoder"""
+        self.enabled = False
+        if hasattr(self, "encoder"):
+            del self.encoder
+
+
+class AdaptiveDeflateFactory(ServerPerMessageDeflateFactory):
+    """Negotiates permessage-deflate like websockets does, with AdaptiveDeflate on our side"""
+    def __init__(self, min_size=MIN_SIZE, **kwargs):
+        super().__init__(**kwargs)
+        self.min_size = min_size
+
+    def process_request_params(self, params, accepted_extensions):
+        response, extension = super().process_request_params(params, accepted_extensions)
+        return response, AdaptiveDeflate(
+            extension.remote_no_context_takeover,
+            extension.local_no_context_takeover,
+            extension.remote_max_window_bits,
+            extension.local_max_window_bits,
+            extension.compress_settings,
+            min_size=self.min_size,
+        )
+
+
+class CompressionPolicy:
+    """How server websockets compress outgoing frames"""
+    def __init__(self, mode="adaptive", min_size=MIN_SIZE, window_bits=WINDOW_BITS,
+                 client_window_bits=CLIENT_WINDOW_BITS, mem_level=MEM_LEVEL, level=LEVEL,
+                 context_takeover=True):
+        if mode not in MODES:
+            raise ValueError(f"Unknown compression mode: {mode}")
+        self.mode = mode
+        self.min_size = min_size if mode == "adaptive" else 0
+        self.window_bits = window_bits
+        self.client_window_bits = client_window_bits
+        self.mem_level = mem_level
+        self.level = level
+        # Off: a fresh encoder per message, freed in between (less memory, more CPU)
+        self.context_takeover = context_takeover
+
+    def serve_kwargs(self):
+        """Keyword arguments for `websockets.serve`"""
+        if self.mode == "off":
+            return {"compression": None}
+        if self.mode == "deflate":
+            # websockets' own defaults
+            return {}
+        return {"extensions": [AdaptiveDeflateFactory(
+            self.min_size,
+            server_no_context_takeover=not self.context_takeover,
+            server_max_window_bits=self.window_bits,
+            client_max_window_bits=self.client_window_bits,
+            compress_settings={"memLevel": self.mem_level, "level": self.level},
+        )]}
+
+    def memory_per_connection(self):
+        """Encoder bytes held by an idle connection"""
+        if self.mode == "off" or not self.context_takeover:
+            return 0
+        if self.mode == "deflate":
+            return deflate_memory(12, 5)
+        return deflate_memory(self.window_bits, self.mem_level)
+
+
+def add_arguments(parser):
+    """The --compression* options of server.py and gateway.py"""
+    parser.add_argument("--compression", default="adaptive", choices=MODES,
+                        help="adaptive: skip small frames, tuned deflate; deflate: websockets defaults; off")
+    parser.add_argument("--compress-min-size", type=int, default=MIN_SIZE, metavar="BYTES",
+                        help="adaptive: frames shorter than this are sent uncompressed")
+    parser.add_argument("--compress-window-bits", type=int, default=WINDOW_BITS,
+                        help="adaptive: deflate window of the server (9-15, memory per connection)")
+    parser.add_argument("--compress-mem-level", type=int, default=MEM_LEVEL,
+                        help="adaptive: zlib memLevel (1-9, memory per connection)")
+
+
+def policy_from_args(args):
+    """CompressionPolicy for the options added by `add_arguments`"""
+    return CompressionPolicy(args.compression, args.compress_min_size,
+                             args.compress_window_bits, mem_level=args.compress_mem_level)
+
+
+def opted_out(path):
+    """True if the URL asks for uncompressed frames (`?compress=0`)"""
+    values = parse_qs(urlsplit(path or "/").query).get("compress")
+    return bool(values) and values[-1].lower() in OPT_OUT_VALUES
+
+
+def disable_compression(websocket):
+    """Send everything uncompressed on this connection (no-op without AdaptiveDeflate)"""
+    protocol = getattr(websocket, "protocol", None)
+    for extension in getattr(protocol, "extensions", ()):
+        if isinstance(extension, AdaptiveDeflate):
+            extension.disable()
+
+
+# -- Benchmark --
+
+def sample_streams(rules, rounds=5, games=20):
+    """
+    Frames one connection receives over a game, like handle_game_loop
+    sends them, for `games` tables of `rules`. Returns a list of streams.
+    """
+    rng = random.Random(0)
+    streams = []
+    for game in range(games):
+        names = [f"Player{rng.randrange(1000)}" for _ in range(rules.player_count // 2)]
+        names += [f"Bot_{i + 1}" for i in range(rules.player_count - len(names))]
+        scores = dict.fromkeys(names, 0)
+        frames = [InputRequest("name"), Info(f"{names[0]} joined! (1/{len(names) // 2})"),
+                  Info(f"Game Starting! {rules.player_count - len(names) // 2} Bots added.")]
+        for number in range(1, rounds + 1):
+            roles = list(rules.roles)
+            rng.shuffle(roles)
+            sipahi = names[roles.index(rules.guesser)]
+            suspects = [n for n in names if n != sipahi]
+            guess = rng.choice(suspects)
+            correct = roles[names.index(guess)] == rules.target
+            table = rules.score_table(correct)
+            updates = {n: table[r] for n, r in zip(names, roles)}
+            for n in names:
+                scores[n] += updates[n]
+            frames += [RoundStart(number, rounds), RoleReveal(roles[0]), SipahiTurn(sipahi, suspects),
+                       Info(f"{sipahi} guessed: {guess}"),
+                       RoundEnd(correct, dict(zip(names, roles)), updates), Scoreboard(dict(scores))]
+        ratings = {n: {"rating": 1500 + rng.uniform(-200, 200), "change": rng.uniform(-20, 20)}
+                   for n in names if not n.startswith("Bot_")}
+        frames.append(GameOver(max(scores, key=scores.get), dict(scores), ratings))
+        entries = [{"rank": i + 1, "name": f"Entrant{i}", "bot": i % 3 == 0, "points": 30 - i,
+                    "score": 40000 - 900 * i, "wins": 5 - i // 3, "games": 6, "eliminated": False}
+                   for i in range(10)]
+        frames.append(Standings(3, 5, False, entries, entries[4]))
+        streams.append([message.encode() for message in frames])
+    return streams
+
+
+def recorded_streams(path):
+    """Server frames of a session recording, one stream per connection"""
+    streams = defaultdict(list)
+    for _, conn_id, kind, payload in read_session(path):
+        if kind == OUT and isinstance(payload, str):
+            streams[conn_id].append(payload)
+    return list(streams.values())
+
+
+def message_type(frame):
+    try:
+        return json.loads(frame).get("type", "?")
+    except (ValueError, AttributeError):
+        return "?"
+
+
+class TypeStats:
+    __slots__ = ("frames", "raw", "sent", "compressed", "ns")
+
+    def __init__(self):
+        self.frames = 0
+        self.raw = 0
+        self.sent = 0
+        self.compressed = 0
+        self.ns = 0
+
+
+def measure(streams, policy):
+    """Compress every stream as one connection would. Returns type -> TypeStats."""
+    stats = defaultdict(TypeStats)
+    settings = {"memLevel": policy.mem_level, "level": policy.level}
+    window_bits = policy.window_bits
+    if policy.mode == "deflate":
+        settings, window_bits = {"memLevel": 5}, 12
+    for stream in streams:
+        encoder = zlib.compressobj(wbits=-window_bits, **settings)
+        for frame in stream:
+            data = frame.encode("utf-8")
+            entry = stats[message_type(frame)]
+            entry.frames += 1
+            entry.raw += len(data)
+            if policy.mode == "off" or len(data) < policy.min_size:
+                entry.sent += len(data)
+                continue
+            started = time.perf_counter_ns()
+            if not policy.context_takeover:
+                encoder = zlib.compressobj(wbits=-window_bits, **settings)
+            out = encoder.compress(data) + encoder.flush(zlib.Z_SYNC_FLUSH)
+            entry.ns += time.perf_counter_ns() - started
+            entry.sent += len(out) - 4  # Trailing 00 00 ff ff is not sent
+            entry.compressed += 1
+    return stats
+
+
+def print_stats(name, policy, stats):
+    total = TypeStats()
+    print(f"\n{name}: {policy.memory_per_connection() / 1024:.0f} KiB encoder memory per connection")
+    print(f"  {'type':<16}{'frames':>8}{'avg bytes':>11}{'avg sent':>10}{'saved':>8}"
+          f"{'compressed':>12}{'us/frame':>10}{'us/KiB saved':>14}")
+    for kind, entry in sorted(stats.items(), key=lambda item: -item[1].raw):
+        row(kind, entry)
+        for field in TypeStats.__slots__:
+            setattr(total, field, getattr(total, field) + getattr(entry, field))
+    row("total", total)
+
+
+def row(kind, entry):
+    saved = entry.raw - entry.sent
+    per_kib = f"{entry.ns / 1000 / (saved / 1024):.2f}" if saved > 0 else "-"
+    print(f"  {kind:<16}{entry.frames:>8}{entry.raw / entry.frames:>11.0f}{entry.sent / entry.frames:>10.0f}"
+          f"{saved / entry.raw * 100 if entry.raw else 0:>7.1f}%{entry.compressed:>12}"
+          f"{entry.ns / 1000 / entry.frames:>10.2f}{per_kib:>14}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CPU against bytes saved per message type for each compression setting")
+    parser.add_argument("--variant", default="classic", choices=sorted(VARIANTS), help="table size of the sample games")
+    parser.add_argument("--rounds", type=int, default=5, help="rounds per sample game")
+    parser.add_argument("--games", type=int, default=200, help="sample connections")
+    parser.add_argument("--recording", default=None, metavar="FILE",
+                        help="use the server frames of a session recording instead")
+    parser.add_argument("--min-size", type=int, default=MIN_SIZE, help="adaptive: smallest frame to compress")
+    parser.add_argument("--window-bits", type=int, default=WINDOW_BITS, help="adaptive: encoder window (9-15)")
+    parser.add_argument("--mem-level", type=int, default=MEM_LEVEL, help="adaptive: zlib memLevel (1-9)")
+    parser.add_argument("--level", type=int, default=LEVEL, help="adaptive: zlib level (1-9)")
+    args = parser.parse_args(argv)
+
+    if args.recording:
+        streams = recorded_streams(args.recording)
+    else:
+        streams = sample_streams(VARIANTS[args.variant], args.rounds, args.games)
+    print(f"{sum(len(s) for s in streams)} frames on {len(streams)} connection(s)")
+
+    adaptive = CompressionPolicy("adaptive", args.min_size, args.window_bits,
+                                 mem_level=args.mem_level, level=args.level)
+    for name, policy in (("off", CompressionPolicy("off")),
+                         ("deflate (websockets defaults, every frame)", CompressionPolicy("deflate")),
+                         (f"adaptive (frames >= {args.min_size} bytes)", adaptive),
+                         ("adaptive, no context takeover", CompressionPolicy(
+                             "adaptive", args.min_size, args.window_bits, mem_level=args.mem_level,
+                             level=args.level, context_takeover=False))):
+        print_stats(name, policy, measure(streams, policy))
+
+
+if __name__ == "__main__":
+    main()
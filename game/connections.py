@@ -0,0 +1,220 @@
+import asyncio
+import time
+
+from game.compression import CompressionPolicy
+
+# -- CONFIGURATION --
+PING_INTERVAL = 20.0        # Seconds between websocket pings
+PING_TIMEOUT = 20.0         # Seconds to wait for a pong before dropping the socket
+HANDSHAKE_TIMEOUT = 30.0    # Seconds a client may take to answer each `register` prompt
+IDLE_TIMEOUT = 300.0        # Seconds without an inbound frame (before taking a seat)
+LOBBY_TIMEOUT = 600.0       # Seconds a lobby may wait for `required_humans`
+REAP_INTERVAL = 15.0        # Seconds between reaper sweeps
+MAX_MESSAGE_SIZE = 64 * 1024  # Largest inbound frame we accept
+MAX_QUEUE = 16              # Inbound frames buffered per connection
+WRITE_BUDGET = 256 * 1024   # Unsent bytes a connection may hold on top of a full inbound queue
+
+
+def loop_clock():
+    """Time of the running event loop (virtual under game/simulation.py), else monotonic"""
+    try:
+        return asyncio.get_running_loop().time()
+    except RuntimeError:
+        return time.monotonic()
+
+
+def queued_bytes(websocket):
+    """Bytes of received frames the websockets library holds until we read them"""
+    # websockets >= 13 (asyncio): frames wait in the Assembler's queue
+    assembler = getattr(websocket, "recv_messages", None)
+    queue = getattr(getattr(assembler, "frames", None), "queue", None)
+    if queue is None:
+        # Legacy implementation: whole messages in a deque
+        queue = getattr(websocket, "messages", None)
+    if queue is None:
+        return 0
+    try:
+        return sum(len(getattr(item, "data", item)) for item in list(queue))
+    except TypeError:
+        return 0
+
+
+class ConnectionPolicy:
+    """Heartbeat, deadline and memory settings for client connections"""
+    def __init__(self, ping_interval=PING_INTERVAL, ping_timeout=PING_TIMEOUT,
+                 handshake_timeout=HANDSHAKE_TIMEOUT, idle_timeout=IDLE_TIMEOUT,
+                 lobby_timeout=LOBBY_TIMEOUT, reap_interval=REAP_INTERVAL,
+                 max_message_size=MAX_MESSAGE_SIZE, max_queue=MAX_QUEUE,
+                 memory_budget=None, compression=None):
+        self.ping_interval = ping_interval
+        self.ping_timeout = ping_timeout
+        self.handshake_timeout = handshake_timeout
+        self.idle_timeout = idle_timeout
+        self.lobby_timeout = lobby_timeout
+        self.reap_interval = reap_interval
+        self.max_message_size = max_message_size
+        self.max_queue = max_queue
+        # Default: what websockets may queue for us within protocol limits,
+        # plus WRITE_BUDGET; a smaller budget would drop well-behaved clients
+        if memory_budget is None:
+            memory_budget = self.inbound_queue_limit() + WRITE_BUDGET
+        elif memory_budget < self.inbound_queue_limit():
+            raise ValueError(f"memory_budget ({memory_budget} bytes) is smaller than the inbound queue "
+                             f"websockets may hold ({max_message_size} x {max_queue} bytes)")
+        self.memory_budget = memory_budget
+        # Per-message deflate settings (game/compression.py)
+        self.compression = compression or CompressionPolicy()
+
+    def inbound_queue_limit(self):
+        """Most bytes websockets buffers for a socket we do not read from"""
+        return self.max_message_size * self.max_queue
+
+    def serve_kwargs(self):
+        """Keyword arguments for `websockets.serve`"""
+        return dict({
+            "ping_interval": self.ping_interval,
+            "ping_timeout": self.ping_timeout,
+            "open_timeout": self.handshake_timeout,
+            "max_size": self.max_message_size,
+            "max_queue": self.max_queue,
+        }, **self.compression.serve_kwargs())
+
+
+def add_arguments(parser):
+    """The connection limit options of server.py"""
+    parser.add_argument("--ping-interval", type=float, default=PING_INTERVAL, metavar="SECONDS",
+                        help="seconds between websocket pings")
+    parser.add_argument("--ping-timeout", type=float, default=PING_TIMEOUT, metavar="SECONDS",
+                        help="seconds to wait for a pong before dropping the socket")
+    parser.add_argument("--handshake-timeout", type=float, default=HANDSHAKE_TIMEOUT, metavar="SECONDS",
+                        help="seconds a client may take to answer each registration prompt")
+    parser.add_argument("--idle-timeout", type=float, default=IDLE_TIMEOUT, metavar="SECONDS",
+                        help="seconds without a message before a socket without a seat is dropped")
+    parser.add_argument("--lobby-timeout", type=float, default=LOBBY_TIMEOUT, metavar="SECONDS",
+                        help="seconds a lobby may wait for the required humans")
+    parser.add_argument("--max-message-size", type=int, default=MAX_MESSAGE_SIZE, metavar="BYTES",
+                        help="largest inbound frame")
+    parser.add_argument("--max-queue", type=int, default=MAX_QUEUE,
+                        help="inbound frames buffered per connection")
+    parser.add_argument("--memory-budget", type=int, default=None, metavar="BYTES",
+                        help="bytes a connection may hold before it is dropped "
+                             "(default: max-message-size x max-queue + 256 KB)")
+
+
+def policy_from_args(args, compression=None):
+    """ConnectionPolicy for the options added by `add_arguments`"""
+    return ConnectionPolicy(args.ping_interval, args.ping_timeout, args.handshake_timeout,
+                            args.idle_timeout, args.lobby_timeout,
+                            max_message_size=args.max_message_size, max_queue=args.max_queue,
+                            memory_budget=args.memory_budget, compression=compression)
+
+
+class ConnectionStats:
+    """Bookkeeping for one open socket"""
+    __slots__ = ("connected_at", "last_seen", "frames_in", "frames_out",
+                 "bytes_in", "bytes_out")
+
+    def __init__(self, now):
+        self.connected_at = now
+        self.last_seen = now
+        self.frames_in = 0
+        self.frames_out = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+
+class ConnectionTracker:
+    """
+    Tracks activity and memory use of every open socket.
+    The server feeds it frames; the reaper asks it who is stale.
+    """
+    def __init__(self, policy=None, clock=loop_clock):
+        self.policy = policy or ConnectionPolicy()
+        self.clock = clock
+        # Map: websocket -> ConnectionStats
+        self.connections = {}
+        self.reaped = 0
+
+    def add(self, websocket):
+        self.connections[websocket] = ConnectionStats(self.clock())
+
+    def remove(self, websocket):
+        self.connections.pop(websocket, None)
+
+    def received(self, websocket, message):
+        """Record an inbound frame"""
+        stats = self.connections.get(websocket)
+        if stats:
+            stats.last_seen = self.clock()
+            stats.frames_in += 1
+            stats.bytes_in += len(message)
+
+    def sent(self, websocket, message):
+        """Record an outbound frame"""
+        stats = self.connections.get(websocket)
+        if stats:
+            stats.frames_out += 1
+            stats.bytes_out += len(message)
+
+    def memory_usage(self, websocket):
+        """
+        Bytes held for this socket: unsent frames in the transport
+        write buffer plus inbound frames the library has queued for us.
+        """
+        write_buffer = 0
+        transport = getattr(websocket, "transport", None)
+        if transport is not None:
+            try:
+                write_buffer = transport.get_write_buffer_size()
+            except Exception:
+                pass
+
+        return write_buffer + queued_bytes(websocket)
+
+    def stale(self, exempt=()):
+        """Returns list of (websocket, reason) that should be closed"""
+        now = self.clock()
+        result = []
+        for ws, stats in self.connections.items():
+            if self.memory_usage(ws) > self.policy.memory_budget:
+                result.append((ws, "Memory budget exceeded"))
+            elif ws not in exempt and now - stats.last_seen > self.policy.idle_timeout:
+                result.append((ws, "Idle timeout"))
+        return result
+
+    def report(self):
+        """Aggregate numbers across all open sockets"""
+        total_memory = 0
+        peak_memory = 0
+        frames_in = frames_out = bytes_in = bytes_out = 0
+        for ws, stats in self.connections.items():
+            used = self.memory_usage(ws)
+            total_memory += used
+            peak_memory = max(peak_memory, used)
+            frames_in += stats.frames_in
+            frames_out += stats.frames_out
+            bytes_in += stats.bytes_in
+            bytes_out += stats.bytes_out
+
+        return {
+            "connections": len(self.connections),
+            "memory_bytes": total_memory,
+            "peak_connection_bytes": peak_memory,
+            "memory_budget": self.policy.memory_budget,
+            # Worst case the websocket library may buffer per socket
+            "inbound_queue_limit": self.policy.inbound_queue_limit(),
+            "frames_in": frames_in,
+            "frames_out": frames_out,
+            "bytes_in": bytes_in,
+            "bytes_out": bytes_out,
+            "reaped": self.reaped,
+        }
+
+
+def request_path(websocket):
+    """Path the client connected to, e.g. '/room42'"""
+    # websockets >= 13 exposes the HTTP request, older versions only the path
+    request = getattr(websocket, "request", None)
+    if request is not None:
+        return request.path
+    return getattr(websocket, "path", "/")
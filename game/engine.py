@@ -1,10 +1,5 @@
 import random
-
-# -- CONFIGURATION --
-POINTS_RAJA = 1000
-POINTS_MANTRI = 800
-POINTS_SIPAHI = 500
-POINTS_CHOR = 0
+from game.rules import CLASSIC, VARIANTS
 
 class Player:
     def __init__(self, name, is_bot=False):
@@ -17,33 +12,85 @@ class Player:
         # WebSocket connection (None for bots)
         self.websocket = None
 
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "is_bot": self.is_bot,
+            "score": self.score,
+            "strategy": self.strategy,
+            "chor_count": self.chor_count,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        player = cls(data["name"], is_bot=data["is_bot"])
+        player.score = data["score"]
+        player.strategy = data["strategy"]
+        player.chor_count = data["chor_count"]
+        return player
+
 class GameEngine:
-    def __init__(self):
+    def __init__(self, rules=CLASSIC, seed=None):
+        self.rules = rules
+        # Own generator, so a seeded game deals the same roles every time
+        self.rng = random.Random(seed)
         self.players = []
         self.current_round = 0
         self.total_rounds = 5
-        self.roles = ["Raja", "Mantri", "Sipahi", "Chor"]
+        self.roles = list(rules.roles)
+        # One entry per finished round:
+        # (round, is_correct, [(name, strategy, role, points, score), ...])
+        self.round_log = []
+        
+    def to_dict(self):
+        """Engine state between rounds (roles are dealt again next round)"""
+        return {
+            "rules": self.rules.name,
+            "players": [p.to_dict() for p in self.players],
+            "current_round": self.current_round,
+            "total_rounds": self.total_rounds,
+            "roles": self.roles,
+            "round_log": self.round_log,
+        }
+
+    @classmethod
+    def from_dict(cls, data, rules=None):
+        game = cls(VARIANTS.get(data["rules"], rules or CLASSIC))
+        game.players = [Player.from_dict(p) for p in data["players"]]
+        game.current_round = data["current_round"]
+        game.total_rounds = data["total_rounds"]
+        game.roles = list(data["roles"])
+        game.round_log = [(r, correct, [tuple(e) for e in entries])
+                          for r, correct, entries in data["round_log"]]
+        return game
         
     def add_player(self, player):
-        if len(self.players) < 4:
+        if len(self.players) < self.rules.player_count:
             self.players.append(player)
             return True
         return False
         
     def fill_with_bots(self):
-        """Adds bots until there are 4 players"""
+        """Adds bots until every seat is taken"""
         strategies = ["random", "tracker", "hunter"]
-        bots_needed = 4 - len(self.players)
-        
-        for i in range(bots_needed):
-            bot_name = f"Bot_{i+1}"
+        bots_needed = self.rules.player_count - len(self.players)
+        # Results are keyed by name: skip names already at the table
+        # (e.g. a tournament entrant called Bot_1)
+        taken = {p.name for p in self.players}
+        number = 0
+
+        for _ in range(bots_needed):
+            number += 1
+            while f"Bot_{number}" in taken:
+                number += 1
+            bot_name = f"Bot_{number}"
             bot = Player(bot_name, is_bot=True)
-            bot.strategy = random.choice(strategies)
+            bot.strategy = self.rng.choice(strategies)
             self.players.append(bot)
             
     def start_round(self):
         self.current_round += 1
-        random.shuffle(self.roles)
+        self.rng.shuffle(self.roles)
         for i, player in enumerate(self.players):
             player.role = self.roles[i]
             
@@ -53,13 +100,13 @@ class GameEngine:
 
     def get_sipahi(self):
         for p in self.players:
-            if p.role == "Sipahi":
+            if p.role == self.rules.guesser:
                 return p
         return None
 
     def get_chor(self):
         for p in self.players:
-            if p.role == "Chor":
+            if p.role == self.rules.target:
                 return p
         return None
         
@@ -90,47 +137,44 @@ class GameEngine:
             
         is_correct = (guessed_player == chor)
         
-        # Calculate scores
+        # Calculate scores (wrong guess table already has the swaps applied)
+        table = self.rules.score_table(is_correct)
         updates = {}
+        entries = []
         for p in self.players:
-            points = 0
-            if is_correct:
-                if p.role == "Raja": points = POINTS_RAJA
-                elif p.role == "Mantri": points = POINTS_MANTRI
-                elif p.role == "Sipahi": points = POINTS_SIPAHI
-                elif p.role == "Chor": points = POINTS_CHOR
-            else:
-                # Wrong guess swap
-                if p.role == "Raja": points = POINTS_RAJA
-                elif p.role == "Mantri": points = POINTS_MANTRI
-                elif p.role == "Sipahi": points = 0       # Swapped
-                elif p.role == "Chor": points = POINTS_SIPAHI # Swapped
-            
+            points = table[p.role]
             p.score += points
             updates[p.name] = points
+            entries.append((p.name, p.strategy if p.is_bot else "human", p.role, points, p.score))
             
+        self.round_log.append((self.current_round, is_correct, entries))
         return is_correct, updates
 
     def get_bot_guess(self, sipahi_bot):
         """Ai Logic for bot guessing"""
         options = self.get_potential_chors(sipahi_bot)
-        strategy = sipahi_bot.strategy
+        return choose_guess(sipahi_bot.strategy, options, self.rng)
+
+def choose_guess(strategy, options, rng=random):
+    """
+    Picks a suspect from `options` (players with `score` and `chor_count`).
+    Shared by the server bots and the headless client bots.
+    """
+    if strategy == "tracker":
+        # Lowest chor count
+        best = options[0]
+        for p in options:
+            if p.chor_count < best.chor_count:
+                best = p
+        return best
         
-        if strategy == "tracker":
-            # Lowest chor count
-            best = options[0]
-            for p in options:
-                if p.chor_count < best.chor_count:
-                    best = p
-            return best
-            
-        elif strategy == "hunter":
-            # Highest score
-            best = options[0]
-            for p in options:
-                if p.score > best.score:
-                    best = p
-            return best
-            
-        else:
-            return random.choice(options)
+    elif strategy == "hunter":
+        # Highest score
+        best = options[0]
+        for p in options:
+            if p.score > best.score:
+                best = p
+        return best
+        
+    else:
+        return rng.choice(options)
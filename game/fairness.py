@@ -0,0 +1,351 @@
+"""
+Online fairness audit of role assignment.
+
+    python -m game.fairness nodes/localhost_8765/fairness.json [--players] [--json]
+
+Every finished round is added to running counts of which role each
+seat, each human player, each bot strategy (and humans as a group) got,
+and which role a seat got right after holding each role, so a deal
+that remembers the previous round shows up. Every count row keeps the
+sum of its squared cells as well, so its chi-square statistic against
+"every role equally often" is updated in O(1); only the rows a round
+touched are tested again, so a round costs O(seats) no matter how much
+history has been seen.
+
+Sipahi guesses are counted per guesser kind and compared with chance
+(1 in seats - 1); random bots are expected to sit right on it.
+
+A row that drops below ALERT_P raises an alert (printed and kept in
+`alerts`); it clears once the row is back above CLEAR_P. The counts
+are saved as JSON and loaded again on start, so evidence accumulates
+across restarts. Only the MAX_PLAYERS most recently seen humans keep a
+row; older player rows (and their alerts) are dropped.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+from collections import OrderedDict, deque
+
+# -- CONFIGURATION --
+FAIRNESS_PATH = "fairness.json"
+EXPORT_INTERVAL = 60.0  # Seconds between saves of a running server
+ALERT_P = 1e-6          # p-value below which a row is flagged
+CLEAR_P = 1e-3          # p-value above which a flagged row is cleared
+MIN_EXPECTED = 5        # Rows are tested once every cell expects this many
+MAX_ALERTS = 100        # Alerts kept for the report
+MAX_PLAYERS = 10000     # Player rows kept (least recently seen are dropped)
+FAIRNESS_VERSION = 1
+
+# Row kinds
+SEAT = "seat"
+PLAYER = "player"
+STRATEGY = "strategy"
+AFTER = "after"         # Label: the role the seat held the round before
+KINDS = (SEAT, STRATEGY, AFTER, PLAYER)
+
+
+def chi_square_p(x, df):
+    """Upper tail of the chi-square distribution (Wilson-Hilferty approximation)"""
+    if x <= 0:
+        return 1.0
+    h = 2.0 / (9.0 * df)
+    z = ((x / df) ** (1.0 / 3.0) - (1.0 - h)) / math.sqrt(h)
+    return 0.5 * math.erfc(z / math.sqrt(2.0))
+
+
+class RoleCounts:
+    """How often one seat / player / strategy got each role"""
+    __slots__ = ("counts", "n", "sum_sq")
+
+    def __init__(self, roles):
+        self.counts = [0] * roles
+        self.n = 0
+        self.sum_sq = 0
+
+    def add(self, role):
+        count = self.counts[role]
+        self.counts[role] = count + 1
+        self.n += 1
+        # (c + 1)^2 - c^2
+        self.sum_sq += 2 * count + 1
+
+    def chi_square(self):
+        """Sum of (observed - expected)^2 / expected for a uniform deal"""
+        if not self.n:
+            return 0.0
+        return len(self.counts) * self.sum_sq / self.n - self.n
+
+    def p_value(self):
+        return chi_square_p(self.chi_square(), len(self.counts) - 1)
+
+    def testable(self):
+        return self.n >= MIN_EXPECTED * len(self.counts)
+
+
+class GuessCounts:
+    """Sipahi guesses of one kind of guesser, against a chance of 1 in `suspects`"""
+    __slots__ = ("trials", "hits", "suspects")
+
+    def __init__(self, suspects):
+        self.trials = 0
+        self.hits = 0
+        self.suspects = suspects
+
+    @property
+    def n(self):
+        return self.trials
+
+    def add(self, correct):
+        self.trials += 1
+        self.hits += correct
+
+    def z_score(self):
+        if not self.trials:
+            return 0.0
+        chance = 1.0 / self.suspects
+        return (self.hits - self.trials * chance) / math.sqrt(self.trials * chance * (1.0 - chance))
+
+    def p_value(self):
+        return math.erfc(abs(self.z_score()) / math.sqrt(2.0))
+
+    def testable(self):
+        return self.trials * (self.suspects - 1) / self.suspects >= MIN_EXPECTED
+
+
+class FairnessAuditor:
+    def __init__(self, alert_p=ALERT_P, clear_p=CLEAR_P, max_players=MAX_PLAYERS):
+        self.alert_p = alert_p
+        self.clear_p = clear_p
+        # Map: variant -> list of roles (column order of its rows)
+        self.roles = {}
+        # Map: variant -> role -> column
+        self.columns = {}
+        # Map: variant -> rounds audited
+        self.rounds = {}
+        # Map: (kind, variant, label) -> RoleCounts
+        self.rows = {}
+        # Keys of the PLAYER rows, least recently counted first
+        self.players = OrderedDict()
+        self.max_players = max_players
+        # Map: (variant, guesser strategy or "human") -> GuessCounts
+        self.guesses = {}
+        # Keys currently flagged, and the most recent alerts
+        self.active = set()
+        self.alerts = deque(maxlen=MAX_ALERTS)
+
+    def add_variant(self, rules):
+        if rules.name not in self.columns:
+            self.roles[rules.name] = list(rules.roles)
+            self.columns[rules.name] = {role: i for i, role in enumerate(rules.roles)}
+            self.rounds[rules.name] = 0
+        return self.columns[rules.name]
+
+    def count(self, key, role):
+        row = self.rows.get(key)
+        if row is None:
+            row = self.rows[key] = RoleCounts(len(self.roles[key[1]]))
+        if key[0] == PLAYER:
+            self.touch_player(key)
+        row.add(role)
+        self.check(key, row)
+
+    def touch_player(self, key):
+        """Mark a player row as recently seen, dropping the oldest beyond `max_players`"""
+        self.players[key] = None
+        self.players.move_to_end(key)
+        while len(self.players) > self.max_players:
+            old, _ = self.players.popitem(last=False)
+            del self.rows[old]
+            self.active.discard(old)
+
+    def check(self, key, row):
+        """Raise or clear the alert of one row"""
+        if not row.testable():
+            return
+        p = row.p_value()
+        if key not in self.active and p < self.alert_p:
+            self.active.add(key)
+            alert = {"kind": key[0], "variant": key[1], "label": key[2], "samples": row.n,
+                     "p": p, "round": self.rounds[key[1]]}
+            self.alerts.append(alert)
+            print(f"Fairness alert: {key[0]} {key[2]} ({key[1]}) p={p:.2e} after {row.n} samples")
+        elif key in self.active and p > self.clear_p:
+            self.active.discard(key)
+            print(f"Fairness alert cleared: {key[0]} {key[2]} ({key[1]})")
+
+    def record_round(self, game):
+        """Audit the round `game` (a GameEngine) just scored"""
+        if not game.round_log or game.round_log[-1][0] != game.current_round:
+            # The current round was not scored: nothing new to count
+            return
+        columns = self.add_variant(game.rules)
+        variant = game.rules.name
+        self.rounds[variant] += 1
+        _, is_correct, entries = game.round_log[-1]
+        previous = game.round_log[-2][2] if len(game.round_log) > 1 else None
+
+        for seat, (name, strategy, role, _, _) in enumerate(entries):
+            column = columns[role]
+            self.count((SEAT, variant, str(seat + 1)), column)
+            self.count((STRATEGY, variant, strategy), column)
+            if strategy == "human":
+                self.count((PLAYER, variant, name), column)
+            if previous is not None and seat < len(previous):
+                self.count((AFTER, variant, previous[seat][2]), column)
+            if role == game.rules.guesser:
+                guesser = strategy
+
+        key = (variant, guesser)
+        guesses = self.guesses.get(key)
+        if guesses is None:
+            guesses = self.guesses[key] = GuessCounts(len(entries) - 1)
+        guesses.add(bool(is_correct))
+        if guesser == "random":
+            self.check(("guess",) + key, guesses)
+
+    def overview(self):
+        """Small status for the node summary"""
+        return {
+            "rounds": sum(self.rounds.values()),
+            "active_alerts": len(self.active),
+            "alerts": len(self.alerts),
+        }
+
+    def summary(self, players=True):
+        """Plain-data report; `players=False` leaves out the per-player rows"""
+        rows = []
+        for (kind, variant, label), row in self.rows.items():
+            if kind == PLAYER and not players:
+                continue
+            rows.append({
+                "kind": kind,
+                "variant": variant,
+                "label": label,
+                "samples": row.n,
+                "counts": dict(zip(self.roles[variant], row.counts)),
+                "chi_square": round(row.chi_square(), 3),
+                "p": row.p_value(),
+                "alert": (kind, variant, label) in self.active,
+            })
+        guesses = [{
+            "variant": variant,
+            "guesser": guesser,
+            "trials": g.trials,
+            "hits": g.hits,
+            "rate": g.hits / g.trials if g.trials else 0.0,
+            "chance": 1.0 / g.suspects,
+            "z": round(g.z_score(), 3),
+        } for (variant, guesser), g in self.guesses.items()]
+        return {
+            "rounds": dict(self.rounds),
+            "rows": rows,
+            "guesses": guesses,
+            "alerts": list(self.alerts),
+        }
+
+    def to_dict(self):
+        """Copy of the counts, safe to serialise while rounds are recorded"""
+        # Player rows last, least recently seen first, so `load` keeps their order
+        keys = [key for key in self.rows if key[0] != PLAYER] + list(self.players)
+        return {
+            "version": FAIRNESS_VERSION,
+            "roles": {variant: list(roles) for variant, roles in self.roles.items()},
+            "rounds": dict(self.rounds),
+            "rows": [[kind, variant, label, list(self.rows[(kind, variant, label)].counts)]
+                     for kind, variant, label in keys],
+            "guesses": [[variant, guesser, g.suspects, g.trials, g.hits]
+                        for (variant, guesser), g in self.guesses.items()],
+            "alerts": list(self.alerts),
+        }
+
+    def save(self, path):
+        write_audit(self.to_dict(), path)
+
+    @classmethod
+    def load(cls, path, alert_p=ALERT_P, clear_p=CLEAR_P, max_players=MAX_PLAYERS):
+        """Auditor with the counts saved at `path` (empty if there is no file)"""
+        auditor = cls(alert_p, clear_p, max_players)
+        if not os.path.exists(path):
+            return auditor
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != FAIRNESS_VERSION:
+            raise ValueError(f"Unsupported fairness file version: {data.get('version')}")
+        for variant, roles in data["roles"].items():
+            auditor.roles[variant] = roles
+            auditor.columns[variant] = {role: i for i, role in enumerate(roles)}
+        auditor.rounds = data["rounds"]
+        for kind, variant, label, counts in data["rows"]:
+            row = auditor.rows[(kind, variant, label)] = RoleCounts(len(counts))
+            row.counts = counts
+            row.n = sum(counts)
+            row.sum_sq = sum(c * c for c in counts)
+            if row.testable() and row.p_value() < alert_p:
+                auditor.active.add((kind, variant, label))
+            if kind == PLAYER:
+                auditor.touch_player((kind, variant, label))
+        for variant, guesser, suspects, trials, hits in data["guesses"]:
+            guesses = auditor.guesses[(variant, guesser)] = GuessCounts(suspects)
+            guesses.trials, guesses.hits = trials, hits
+        auditor.alerts.extend(data["alerts"])
+        return auditor
+
+
+def write_audit(data, path):
+    """Write `FairnessAuditor.to_dict()` output to `path` atomically"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+async def export_fairness(auditor, path, interval=EXPORT_INTERVAL):
+    """Save the audit every `interval` seconds"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            # Copy on the loop, encode and write in a worker thread
+            await asyncio.to_thread(write_audit, auditor.to_dict(), path)
+        except OSError as e:
+            print(f"Could not save the fairness audit: {e}")
+
+
+def print_report(summary):
+    for variant, rounds in sorted(summary["rounds"].items()):
+        print(f"\n{variant}: {rounds} rounds")
+        rows = [r for r in summary["rows"] if r["variant"] == variant]
+        rows.sort(key=lambda r: (KINDS.index(r["kind"]), r["label"]))
+        for r in rows:
+            flag = "  ALERT" if r["alert"] else ""
+            counts = " ".join(f"{role}={n}" for role, n in r["counts"].items())
+            print(f"  {r['kind']:<9}{r['label']:<16}{r['samples']:>9}  chi2={r['chi_square']:<9.2f}"
+                  f"p={r['p']:.3g}{flag}  {counts}")
+        for g in summary["guesses"]:
+            if g["variant"] == variant:
+                print(f"  sipahi   {g['guesser']:<16}{g['trials']:>9}  hit rate {g['rate']:.3f} "
+                      f"(chance {g['chance']:.3f}, z={g['z']:+.2f})")
+    if summary["alerts"]:
+        print("\nAlerts:")
+        for alert in summary["alerts"]:
+            print(f"  {alert['kind']} {alert['label']} ({alert['variant']}) p={alert['p']:.2e} "
+                  f"at round {alert['round']}, {alert['samples']} samples")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report the role assignment audit of a server")
+    parser.add_argument("path", help="file written by server.py --fairness (nodes/<node id>/fairness.json)")
+    parser.add_argument("--players", action="store_true", help="include a row per human player")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    summary = FairnessAuditor.load(args.path).summary(players=args.players)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print_report(summary)
+
+
+if __name__ == "__main__":
+    main()
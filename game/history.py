@@ -0,0 +1,133 @@
+"""
+On-disk game history.
+
+Every finished game appends one fixed-width record per player per round.
+All fields are little-endian int32, so a chunk of the file can be viewed
+as one flat int array and each column is a strided slice of it.
+Strings (player names, strategies, roles) are stored once in a side
+table and referenced by their line number.
+
+    <path>          header + records
+    <path>.strings  one string per line
+"""
+import os
+import struct
+
+MAGIC = b"RCMSHIST"
+VERSION = 1
+
+# Column layout of one record
+FIELDS = ["game", "round", "player", "strategy", "role",
+          "guesser", "correct", "points", "score", "flags"]
+COLUMNS = {name: i for i, name in enumerate(FIELDS)}
+RECORD = struct.Struct("<" + "i" * len(FIELDS))
+RECORD_SIZE = RECORD.size
+
+HEADER = struct.Struct("<8sII")  # magic, version, fields per record
+HEADER_SIZE = HEADER.size
+
+# Bits of the `flags` column
+FLAG_WON = 1         # Player won this game
+FLAG_LAST_ROUND = 2  # Last round of the game (`score` is the final score)
+
+
+class StringTable:
+    """Append-only string <-> id table backed by a text file"""
+    def __init__(self, path):
+        self.path = path
+        self.strings = []
+        self.ids = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    self._add(line.rstrip("\n"))
+
+    def _add(self, text):
+        self.ids[text] = len(self.strings)
+        self.strings.append(text)
+
+    def intern(self, text, pending):
+        """Returns the id of `text`, queueing new strings in `pending`"""
+        text = str(text).replace("\n", " ")
+        if text not in self.ids:
+            self._add(text)
+            pending.append(text)
+        return self.ids[text]
+
+    def flush(self, pending):
+        if pending:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("".join(s + "\n" for s in pending))
+
+    def __getitem__(self, index):
+        return self.strings[index]
+
+
+def record_count(path):
+    """Number of records in a history file (0 if it does not exist)"""
+    if not os.path.exists(path):
+        return 0
+    size = os.path.getsize(path)
+    return max(0, (size - HEADER_SIZE) // RECORD_SIZE)
+
+
+def check_header(f):
+    magic, version, fields = HEADER.unpack(f.read(HEADER_SIZE))
+    if magic != MAGIC or version != VERSION or fields != len(FIELDS):
+        raise ValueError("Not a game history file (or an incompatible version)")
+
+
+class HistoryWriter:
+    """Appends finished games to the history file"""
+    def __init__(self, path):
+        self.path = path
+        self.strings = StringTable(path + ".strings")
+
+        if os.path.exists(path) and os.path.getsize(path) >= HEADER_SIZE:
+            with open(path, "rb") as f:
+                check_header(f)
+                # Continue numbering after the last stored game
+                count = record_count(path)
+                self.next_game = 0
+                if count:
+                    f.seek(HEADER_SIZE + (count - 1) * RECORD_SIZE)
+                    self.next_game = RECORD.unpack(f.read(RECORD_SIZE))[0] + 1
+        else:
+            with open(path, "wb") as f:
+                f.write(HEADER.pack(MAGIC, VERSION, len(FIELDS)))
+            self.next_game = 0
+
+    def record_game(self, game, winner_name):
+        """Write every round of a finished GameEngine"""
+        if not game.round_log:
+            return
+
+        pending = []
+        game_id = self.next_game
+        last_round = game.round_log[-1][0]
+        chunks = []
+        for round_num, is_correct, entries in game.round_log:
+            for name, strategy, role, points, score in entries:
+                flags = 0
+                if name == winner_name:
+                    flags |= FLAG_WON
+                if round_num == last_round:
+                    flags |= FLAG_LAST_ROUND
+                chunks.append(RECORD.pack(
+                    game_id,
+                    round_num,
+                    self.strings.intern(name, pending),
+                    self.strings.intern(strategy, pending),
+                    self.strings.intern(role, pending),
+                    1 if role == game.rules.guesser else 0,
+                    1 if is_correct else 0,
+                    points,
+                    score,
+                    flags,
+                ))
+
+        # Strings first, so records never point at an unknown id
+        self.strings.flush(pending)
+        with open(self.path, "ab") as f:
+            f.write(b"".join(chunks))
+        self.next_game += 1
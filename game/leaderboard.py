@@ -0,0 +1,228 @@
+"""
+Player ratings and the leaderboard of one node.
+
+After each game every human's rating is updated with a multiplayer Elo:
+each pair of players counts as one match decided by the final scores.
+Ratings are kept in a SQLite file and indexed in memory by an indexable
+skip list, so "top N" and "rank of X" take O(log n) instead of a scan.
+Bots play with a fixed rating and are never ranked.
+
+The file and the index belong to one server process: with several nodes
+each keeps its own leaderboard of the games it hosted, and a query is
+answered by the node owning the room it was sent to.
+"""
+import math
+import random
+import sqlite3
+import threading
+
+# -- CONFIGURATION --
+DEFAULT_RATING = 1500.0
+K_FACTOR = 32.0
+MAX_LEVELS = 32  # Enough for 2**32 players
+
+
+class _Node:
+    __slots__ = ("key", "next", "width")
+
+    def __init__(self, key, levels):
+        self.key = key
+        self.next = [None] * levels
+        # width[i]: how many level-0 steps `next[i]` skips
+        self.width = [1] * levels
+
+
+class RankIndex:
+    """
+    Indexable skip list of sortable keys.
+    insert / remove / rank / item at position are all O(log n).
+    """
+    def __init__(self):
+        self.head = _Node(None, MAX_LEVELS)
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def _path(self, key):
+        """Last node before `key` on every level, and its position"""
+        chain = [None] * MAX_LEVELS
+        steps = [0] * MAX_LEVELS
+        node = self.head
+        position = 0
+        for level in reversed(range(MAX_LEVELS)):
+            while node.next[level] is not None and node.next[level].key < key:
+                position += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+            steps[level] = position
+        return chain, steps
+
+    def insert(self, key):
+        chain, steps = self._path(key)
+        position = steps[0]
+        levels = min(MAX_LEVELS, 1 - int(math.log(1.0 - random.random(), 2.0)))
+        node = _Node(key, levels)
+        for level in range(levels):
+            prev = chain[level]
+            skipped = position - steps[level]
+            node.next[level] = prev.next[level]
+            node.width[level] = prev.width[level] - skipped
+            prev.next[level] = node
+            prev.width[level] = skipped + 1
+        for level in range(levels, MAX_LEVELS):
+            chain[level].width[level] += 1
+        self.size += 1
+
+    def remove(self, key):
+        chain, _ = self._path(key)
+        node = chain[0].next[0]
+        if node is None or node.key != key:
+            raise KeyError(key)
+        for level in range(len(node.next)):
+            prev = chain[level]
+            prev.width[level] += node.width[level] - 1
+            prev.next[level] = node.next[level]
+        for level in range(len(node.next), MAX_LEVELS):
+            chain[level].width[level] -= 1
+        self.size -= 1
+
+    def rank(self, key):
+        """0-based position of `key` (number of smaller keys)"""
+        _, steps = self._path(key)
+        return steps[0]
+
+    def slice(self, start, count):
+        """Up to `count` keys starting at position `start`"""
+        if start >= self.size:
+            return []
+        node = self.head
+        remaining = start + 1
+        for level in reversed(range(MAX_LEVELS)):
+            while node.next[level] is not None and node.width[level] <= remaining:
+                remaining -= node.width[level]
+                node = node.next[level]
+        keys = []
+        while node is not None and node is not self.head and len(keys) < count:
+            keys.append(node.key)
+            node = node.next[0]
+        return keys
+
+
+class PlayerRating:
+    __slots__ = ("name", "rating", "games", "wins")
+
+    def __init__(self, name, rating=DEFAULT_RATING, games=0, wins=0):
+        self.name = name
+        self.rating = rating
+        self.games = games
+        self.wins = wins
+
+    @property
+    def key(self):
+        # Highest rating first, name breaks ties
+        return (-self.rating, self.name)
+
+
+class Leaderboard:
+    def __init__(self, path=None, k_factor=K_FACTOR):
+        self.k_factor = k_factor
+        # Map: name -> PlayerRating
+        self.players = {}
+        self.index = RankIndex()
+
+        self.db = None
+        # `save` runs in a worker thread (see GameServer.handle_game_loop)
+        self.lock = threading.Lock()
+        if path:
+            self.db = sqlite3.connect(path, check_same_thread=False)
+            self.db.execute("CREATE TABLE IF NOT EXISTS ratings ("
+                            "name TEXT PRIMARY KEY, rating REAL, games INTEGER, wins INTEGER)")
+            for name, rating, games, wins in self.db.execute("SELECT * FROM ratings"):
+                self._add(PlayerRating(name, rating, games, wins))
+
+    def _add(self, player):
+        self.players[player.name] = player
+        self.index.insert(player.key)
+
+    def record_game(self, results):
+        """
+        results: list of (name, final_score, is_bot)
+        Returns dict name -> (new_rating, change) for the human players.
+        Only the in-memory ratings change; write them with `save(rows(...))`.
+        """
+        if len(results) < 2:
+            return {}
+
+        ratings = []
+        for name, _, is_bot in results:
+            if is_bot:
+                ratings.append(DEFAULT_RATING)
+            else:
+                player = self.players.get(name)
+                ratings.append(player.rating if player else DEFAULT_RATING)
+
+        # Pairwise Elo, scaled so one game moves a rating by at most K
+        scale = self.k_factor / (len(results) - 1)
+        best = max(score for _, score, _ in results)
+        changes = {}
+        for i, (name, score, is_bot) in enumerate(results):
+            if is_bot:
+                continue
+            delta = 0.0
+            for j, (_, other_score, _) in enumerate(results):
+                if i == j:
+                    continue
+                expected = 1.0 / (1.0 + 10 ** ((ratings[j] - ratings[i]) / 400.0))
+                actual = 1.0 if score > other_score else 0.5 if score == other_score else 0.0
+                delta += actual - expected
+            changes[name] = (delta * scale, score == best)
+
+        updated = {}
+        for name, (change, won) in changes.items():
+            player = self.players.get(name)
+            if player is None:
+                player = PlayerRating(name)
+            else:
+                self.index.remove(player.key)
+                del self.players[name]
+            player.rating = round(player.rating + change, 1)
+            player.games += 1
+            player.wins += 1 if won else 0
+            self._add(player)
+            updated[name] = (player.rating, round(change, 1))
+        return updated
+
+    def rows(self, names):
+        """Database rows of these players, as they are now"""
+        return [(p.name, p.rating, p.games, p.wins) for p in (self.players[n] for n in names)]
+
+    def save(self, rows):
+        """Writes `rows` to the SQLite file (blocking: call it from a thread)"""
+        if not self.db or not rows:
+            return
+        with self.lock:
+            self.db.executemany("INSERT OR REPLACE INTO ratings VALUES (?, ?, ?, ?)", rows)
+            self.db.commit()
+
+    def entry(self, player, rank):
+        return {
+            "rank": rank,
+            "name": player.name,
+            "rating": player.rating,
+            "games": player.games,
+            "wins": player.wins,
+        }
+
+    def top(self, count=10, offset=0):
+        """The `count` best players starting at rank `offset + 1`"""
+        keys = self.index.slice(offset, count)
+        return [self.entry(self.players[name], offset + i + 1)
+                for i, (_, name) in enumerate(keys)]
+
+    def rank(self, name):
+        """Leaderboard entry of one player, or None if unrated"""
+        player = self.players.get(name)
+        if player is None:
+            return None
+        return self.entry(player, self.index.rank(player.key) + 1)
@@ -0,0 +1,220 @@
+"""
+Wire protocol shared by server.py and client.py.
+
+Every frame is a JSON object with a "type" and a few fields. Each type
+is a Message subclass with __slots__; its field checks are compiled once
+when the class is defined. `decode` parses a frame exactly once and
+returns the typed message, so handlers read attributes instead of
+looking keys up in dicts, and dispatch on the class through a table.
+
+Fields left at None are not sent.
+"""
+import json
+
+REQUIRED = object()  # Field default meaning "must be present"
+VALUE = (str, int, float, bool, type(None))
+
+# Map: "type" string -> Message subclass
+MESSAGE_TYPES = {}
+
+
+class ProtocolError(ValueError):
+    """Frame that is not valid JSON or not a valid message"""
+
+
+class Message:
+    """
+    Base of all messages. Subclasses set TYPE, FIELDS as
+    (name, allowed types, default) and __slots__ with the field names.
+    """
+    __slots__ = ()
+    TYPE = None
+    FIELDS = ()
+
+    def __init_subclass__(cls):
+        super().__init_subclass__()
+        names = tuple(name for name, _, _ in cls.FIELDS)
+        if tuple(cls.__slots__) != names:
+            raise TypeError(f"{cls.__name__}.__slots__ must list its FIELDS")
+        # Precompiled checks: (name, types, default, type names for errors)
+        cls._checks = tuple(
+            (name, types if isinstance(types, tuple) else (types,), default,
+             "/".join(t.__name__ for t in (types if isinstance(types, tuple) else (types,))))
+            for name, types, default in cls.FIELDS)
+        MESSAGE_TYPES[cls.TYPE] = cls
+
+    def __init__(self, *args, **kwargs):
+        for i, (name, _, default, _) in enumerate(self._checks):
+            if i < len(args):
+                value = args[i]
+            else:
+                value = kwargs.pop(name, None if default is REQUIRED else default)
+            setattr(self, name, value)
+        if kwargs:
+            raise TypeError(f"Unknown fields for {self.TYPE}: {', '.join(kwargs)}")
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+    def to_dict(self):
+        data = {"type": self.TYPE}
+        for name in self.__slots__:
+            value = getattr(self, name)
+            if value is not None:
+                data[name] = value
+        return data
+
+    def encode(self):
+        return json.dumps(self.to_dict())
+
+    @classmethod
+    def from_dict(cls, data):
+        message = cls.__new__(cls)
+        for name, types, default, expected in cls._checks:
+            value = data.get(name, default)
+            if value is REQUIRED:
+                raise ProtocolError(f"{cls.TYPE}: missing field '{name}'")
+            if value is not None and not isinstance(value, types):
+                raise ProtocolError(f"{cls.TYPE}: '{name}' must be {expected}")
+            setattr(message, name, value)
+        return message
+
+
+def decode(frame):
+    """Parse one frame into its Message. Raises ProtocolError."""
+    try:
+        data = json.loads(frame)
+    except (TypeError, ValueError):
+        raise ProtocolError("Frame is not JSON")
+    if not isinstance(data, dict):
+        raise ProtocolError("Frame is not a JSON object")
+    cls = MESSAGE_TYPES.get(data.get("type"))
+    if cls is None:
+        raise ProtocolError(f"Unknown message type: {data.get('type')!r}")
+    return cls.from_dict(data)
+
+
+# -- client -> server --
+
+class Response(Message):
+    """Answer to an InputRequest"""
+    TYPE = "response"
+    FIELDS = (("value", VALUE, None),)
+    __slots__ = ("value",)
+
+
+class Command(Message):
+    """start / leaderboard / rank"""
+    TYPE = "command"
+    FIELDS = (
+        ("command", str, REQUIRED),
+        ("count", int, None),
+        ("offset", int, None),
+        ("name", str, None),
+    )
+    __slots__ = ("command", "count", "offset", "name")
+
+
+# -- server -> client --
+
+class InputRequest(Message):
+    """prompt: "name", "choose_chor" (pick one of `options`) or "number_input" """
+    TYPE = "input_request"
+    FIELDS = (
+        ("prompt", str, REQUIRED),
+        ("title", str, None),
+        ("options", list, None),
+        ("min", int, None),
+        ("max", int, None),
+    )
+    __slots__ = ("prompt", "title", "options", "min", "max")
+
+
+class Info(Message):
+    TYPE = "info"
+    FIELDS = (("message", str, ""),)
+    __slots__ = ("message",)
+
+
+class Error(Message):
+    TYPE = "error"
+    FIELDS = (("message", str, ""),)
+    __slots__ = ("message",)
+
+
+class RoundStart(Message):
+    TYPE = "round_start"
+    FIELDS = (("round", int, REQUIRED), ("total", int, REQUIRED))
+    __slots__ = ("round", "total")
+
+
+class RoleReveal(Message):
+    TYPE = "role_reveal"
+    FIELDS = (("role", str, REQUIRED),)
+    __slots__ = ("role",)
+
+
+class SipahiTurn(Message):
+    TYPE = "sipahi_turn"
+    FIELDS = (("sipahi", str, REQUIRED), ("chor_options", list, None))
+    __slots__ = ("sipahi", "chor_options")
+
+
+class RoundEnd(Message):
+    TYPE = "round_end"
+    FIELDS = (
+        ("correct", bool, REQUIRED),
+        ("all_roles", dict, REQUIRED),
+        ("scores", dict, REQUIRED),
+    )
+    __slots__ = ("correct", "all_roles", "scores")
+
+
+class Scoreboard(Message):
+    TYPE = "scoreboard"
+    FIELDS = (("scores", dict, REQUIRED),)
+    __slots__ = ("scores",)
+
+
+class GameOver(Message):
+    """`tournament` is set for tournament tables (the client stays connected)"""
+    TYPE = "game_over"
+    FIELDS = (
+        ("winner", str, REQUIRED),
+        ("final_scores", dict, REQUIRED),
+        ("ratings", dict, None),
+        ("tournament", str, None),
+    )
+    __slots__ = ("winner", "final_scores", "ratings", "tournament")
+
+
+class LeaderboardPage(Message):
+    TYPE = "leaderboard"
+    FIELDS = (("offset", int, 0), ("total", int, 0), ("entries", list, REQUIRED))
+    __slots__ = ("offset", "total", "entries")
+
+
+class Rank(Message):
+    """`entry` is None for a player without a rating"""
+    TYPE = "rank"
+    FIELDS = (("name", str, REQUIRED), ("entry", dict, None))
+    __slots__ = ("name", "entry")
+
+
+class Standings(Message):
+    TYPE = "standings"
+    FIELDS = (
+        ("round", int, REQUIRED),
+        ("total", int, REQUIRED),
+        ("final", bool, False),
+        ("entries", list, REQUIRED),
+        ("you", dict, None),
+    )
+    __slots__ = ("round", "total", "final", "entries", "you")
+
+
+class TournamentOver(Message):
+    TYPE = "tournament_over"
+    FIELDS = (("winner", str, REQUIRED),)
+    __slots__ = ("winner",)
@@ -0,0 +1,164 @@
+"""
+Session recordings of the websocket traffic of a server.
+
+Every connection gets an id; its open, every frame in either direction
+and its close are appended to one binary file as fixed-width event
+headers followed by the raw payload:
+
+    header  MAGIC, VERSION, seed of the server (-1 if none)
+    event   time (float64 seconds since recording start), connection id,
+            kind, payload length, payload
+
+Replay a recording against another server with `python -m game.replay`.
+"""
+import asyncio
+import struct
+import time
+
+import websockets
+
+MAGIC = b"RCMSREC\0"
+VERSION = 1
+HEADER = struct.Struct("<8sIq")
+EVENT = struct.Struct("<dIBI")  # time, connection, kind, payload length
+
+# Event kinds
+OPEN = 0          # payload: request path
+IN = 1            # frame from the client
+OUT = 2           # frame to the client
+CLOSE_CLIENT = 3  # client went away; payload: close code
+CLOSE_SERVER = 4  # server closed the connection; payload: close code
+BINARY = 0x80     # flag on IN / OUT for binary frames
+
+FLUSH_INTERVAL = 1.0  # Most seconds an event waits in the buffer
+
+
+class SessionRecorder:
+    """Appends events to a recording file"""
+    def __init__(self, path, seed=None, clock=time.monotonic):
+        self.path = path
+        self.clock = clock
+        self.started = clock()
+        self.last_flush = self.started
+        self.next_id = 0
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, -1 if seed is None else seed))
+
+    def record(self, conn_id, kind, payload):
+        if isinstance(payload, str):
+            payload = payload.encode("utf-8")
+        elif kind in (IN, OUT):
+            kind |= BINARY
+        now = self.clock()
+        self.file.write(EVENT.pack(now - self.started, conn_id, kind, len(payload)))
+        self.file.write(payload)
+        # A closed connection is complete on disk right away
+        if kind in (CLOSE_CLIENT, CLOSE_SERVER) or now - self.last_flush > FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        if not self.file.closed:
+            self.file.flush()
+            self.last_flush = self.clock()
+
+    def wrap(self, websocket, path):
+        """Returns a websocket that records everything going through it"""
+        conn_id = self.next_id
+        self.next_id += 1
+        self.record(conn_id, OPEN, path)
+        return RecordedSocket(websocket, self, conn_id)
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+
+async def flush_recording(recorder, interval=FLUSH_INTERVAL):
+    """Flush every `interval` seconds, so a quiet server's last events reach the file too"""
+    while True:
+        await asyncio.sleep(interval)
+        recorder.flush()
+
+
+class RecordedSocket:
+    """
+    Stands in for a server-side websocket. send / recv / iteration / close
+    are recorded, anything else goes straight to the real connection.
+    """
+    def __init__(self, websocket, recorder, conn_id):
+        self.websocket = websocket
+        self.recorder = recorder
+        self.conn_id = conn_id
+        # Only the first close (by either side) is recorded
+        self.close_recorded = False
+
+    def __getattr__(self, name):
+        return getattr(self.websocket, name)
+
+    def _client_closed(self, error):
+        if not self.close_recorded:
+            self.close_recorded = True
+            code = error.rcvd.code if error.rcvd is not None else 1006
+            self.recorder.record(self.conn_id, CLOSE_CLIENT, str(code))
+
+    async def send(self, message):
+        self.recorder.record(self.conn_id, OUT, message)
+        await self.websocket.send(message)
+
+    async def recv(self):
+        try:
+            message = await self.websocket.recv()
+        except websockets.exceptions.ConnectionClosed as e:
+            self._client_closed(e)
+            raise
+        self.recorder.record(self.conn_id, IN, message)
+        return message
+
+    async def __aiter__(self):
+        try:
+            while True:
+                yield await self.recv()
+        except websockets.exceptions.ConnectionClosedOK:
+            return
+
+    async def close(self, code=1000, reason=""):
+        if not self.close_recorded:
+            self.close_recorded = True
+            self.recorder.record(self.conn_id, CLOSE_SERVER, str(code))
+        await self.websocket.close(code, reason)
+
+
+def read_header(f, path):
+    """Checks the header, returns the seed (or None)"""
+    head = f.read(HEADER.size)
+    if len(head) < HEADER.size:
+        raise ValueError(f"{path} is not a session recording")
+    magic, version, seed = HEADER.unpack(head)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a session recording")
+    if version != VERSION:
+        raise ValueError(f"Unsupported recording version: {version}")
+    return None if seed < 0 else seed
+
+
+def recording_seed(path):
+    with open(path, "rb") as f:
+        return read_header(f, path)
+
+
+def read_session(path):
+    """Yields (time, connection id, kind, payload) for every event of a recording"""
+    with open(path, "rb") as f:
+        read_header(f, path)
+        while True:
+            head = f.read(EVENT.size)
+            if len(head) < EVENT.size:
+                return  # End of file (or a half-written last event)
+            at, conn_id, kind, length = EVENT.unpack(head)
+            payload = f.read(length)
+            if len(payload) < length:
+                return
+            if kind & BINARY:
+                yield at, conn_id, kind & ~BINARY, payload
+            else:
+                yield at, conn_id, kind, payload.decode("utf-8")
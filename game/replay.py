@@ -0,0 +1,255 @@
+"""
+Replay a session recording (see `game/recorder.py`) against a server.
+
+    python -m game.replay session.rec --url ws://localhost:8765 --speed 10
+
+Every recorded connection is opened again and its client frames are
+sent back in order. A frame is not sent before the server has sent the
+frames that came before it in the recording (so an accelerated replay
+never answers a prompt that was not asked yet); after that the recorded
+think time is waited, divided by --speed (0 = no waiting). Clients that
+disconnected mid-game disconnect at the same point.
+
+Start the server under test with the seed of the recording (printed
+here) so games deal the same roles, and for a 10x replay with
+`--pace 0.1` so its own pauses shrink as well. The frames the server sends are compared with the
+recorded ones (message types by default, full payloads with --exact)
+and the server's response times are reported.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import websockets
+
+from game.recorder import (CLOSE_CLIENT, CLOSE_SERVER, IN, OPEN, OUT, read_session,
+                           recording_seed)
+
+STALL_TIMEOUT = 60.0  # Seconds to wait for a frame the server never sends
+
+
+class Step:
+    """
+    One client action (open, frame, close). Performed once the previous
+    action of any connection is done and the server has sent `after`
+    frames on this connection, `delay` seconds after the later of the two.
+    """
+    __slots__ = ("kind", "after", "delay", "payload", "previous", "done")
+
+    def __init__(self, kind, after, delay, payload=None, previous=None):
+        self.kind = kind
+        self.after = after
+        self.delay = delay
+        self.payload = payload
+        self.previous = previous
+        self.done = None
+
+
+class RecordedConnection:
+    def __init__(self, conn_id, path):
+        self.conn_id = conn_id
+        self.path = path
+        # Client actions (OPEN, IN frames, CLOSE_CLIENT), in order
+        self.steps = []
+        # Server frames as recorded
+        self.outbound = []
+        self.last_event = 0.0
+        # Set while replaying
+        self.received = []
+        self.arrived = None
+        self.latencies = []
+        self.stalled = False
+        self.error = None
+
+
+def load_connections(path):
+    """
+    Recording -> (list of RecordedConnection in the order they were
+    opened, list of every Step in recorded order)
+    """
+    connections = {}
+    steps = []
+    # Time of the last client action and of the last frame per connection
+    last_step = 0.0
+    last_frame = {}
+    for at, conn_id, kind, payload in read_session(path):
+        if kind == OPEN:
+            connections[conn_id] = RecordedConnection(conn_id, payload)
+        conn = connections.get(conn_id)
+        if conn is None:
+            continue
+        conn.last_event = at
+        if kind == OUT:
+            conn.outbound.append(payload)
+            last_frame[conn_id] = at
+        elif kind in (OPEN, IN, CLOSE_CLIENT):
+            cause = max(last_step, last_frame.get(conn_id, 0.0))
+            step = Step(kind, len(conn.outbound), at - cause, payload,
+                        steps[-1] if steps else None)
+            conn.steps.append(step)
+            steps.append(step)
+            last_step = at
+        elif kind == CLOSE_SERVER:
+            pass  # The replayed server closes on its own
+    return list(connections.values()), steps
+
+
+def shape(frame):
+    """The part of a frame compared without --exact: message type and prompt"""
+    try:
+        data = json.loads(frame)
+    except (TypeError, ValueError):
+        return frame
+    if not isinstance(data, dict):
+        return frame
+    return (data.get("type"), data.get("prompt"))
+
+
+class Replayer:
+    def __init__(self, connections, steps, url, speed=1.0, stall_timeout=STALL_TIMEOUT):
+        self.connections = connections
+        self.steps = steps
+        self.url = url.rstrip("/")
+        self.speed = speed
+        self.stall_timeout = stall_timeout
+
+    def scaled(self, seconds):
+        return seconds / self.speed if self.speed > 0 else 0.0
+
+    async def wait_for(self, conn, step):
+        """Wait until `step` may be performed"""
+        if step.previous is not None:
+            await asyncio.wait_for(step.previous.done.wait(), self.stall_timeout)
+        while len(conn.received) < step.after:
+            conn.arrived.clear()
+            await asyncio.wait_for(conn.arrived.wait(), self.stall_timeout)
+        await asyncio.sleep(self.scaled(step.delay))
+
+    async def play(self, conn):
+        steps = iter(conn.steps)
+        sent_at = None
+        try:
+            await self.wait_for(conn, next(steps))
+            async with websockets.connect(self.url + conn.path, max_size=None) as websocket:
+                async def read():
+                    nonlocal sent_at
+                    async for frame in websocket:
+                        if sent_at is not None:
+                            conn.latencies.append(time.monotonic() - sent_at)
+                            sent_at = None
+                        conn.received.append(frame)
+                        conn.arrived.set()
+
+                reader = asyncio.create_task(read())
+                try:
+                    conn.steps[0].done.set()
+                    for step in steps:
+                        await self.wait_for(conn, step)
+                        if step.kind == CLOSE_CLIENT:
+                            await websocket.close()
+                            step.done.set()
+                            break
+                        sent_at = time.monotonic()
+                        await websocket.send(step.payload)
+                        step.done.set()
+                    # Let the server finish talking (or close on us)
+                    await asyncio.wait_for(reader, self.stall_timeout)
+                finally:
+                    reader.cancel()
+        except asyncio.TimeoutError:
+            conn.stalled = True
+        except (OSError, websockets.exceptions.WebSocketException) as e:
+            conn.error = str(e)
+        finally:
+            # Never hold up the other connections
+            for step in conn.steps:
+                step.done.set()
+
+    async def run(self):
+        for conn in self.connections:
+            conn.arrived = asyncio.Event()
+        for step in self.steps:
+            step.done = asyncio.Event()
+        started = time.monotonic()
+        await asyncio.gather(*(self.play(conn) for conn in self.connections))
+        return time.monotonic() - started
+
+
+def compare(conn, exact=False):
+    """Returns (matching frames, index of the first difference or None)"""
+    key = (lambda frame: frame) if exact else shape
+    matching = 0
+    for recorded, replayed in zip(conn.outbound, conn.received):
+        if key(recorded) != key(replayed):
+            return matching, matching
+        matching += 1
+    if len(conn.outbound) != len(conn.received):
+        return matching, matching
+    return matching, None
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def report(connections, elapsed, exact=False, verbose=False):
+    recorded_span = max((c.last_event for c in connections), default=0.0)
+    latencies = [t for c in connections for t in c.latencies]
+    identical = 0
+    frames = matching = 0
+    print(f"Replayed {len(connections)} connection(s) in {elapsed:.1f}s "
+          f"(recorded: {recorded_span:.1f}s)")
+
+    for conn in connections:
+        same, diverged = compare(conn, exact)
+        frames += len(conn.outbound)
+        matching += same
+        if diverged is None and not conn.stalled and not conn.error:
+            identical += 1
+            if not verbose:
+                continue
+        status = "error: " + conn.error if conn.error else "stalled" if conn.stalled else \
+            "ok" if diverged is None else f"differs at frame {diverged + 1}"
+        print(f"  #{conn.conn_id:<5} {conn.path:<16} {len(conn.received):>5}/{len(conn.outbound):<5} frames  {status}")
+        if diverged is not None:
+            expected = conn.outbound[diverged] if diverged < len(conn.outbound) else "(nothing)"
+            got = conn.received[diverged] if diverged < len(conn.received) else "(nothing)"
+            print(f"      recorded: {expected[:120]}")
+            print(f"      replayed: {got[:120]}")
+
+    print(f"Identical connections: {identical}/{len(connections)}; "
+          f"matching frames: {matching}/{frames} ({'payloads' if exact else 'message types'})")
+    print(f"Time to the next server frame: p50 {percentile(latencies, 0.5) * 1000:.1f} ms, "
+          f"p95 {percentile(latencies, 0.95) * 1000:.1f} ms, "
+          f"max {max(latencies, default=0.0) * 1000:.1f} ms ({len(latencies)} responses)")
+    return identical == len(connections)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay recorded client traffic against a server")
+    parser.add_argument("path", help="recording written by server.py --record")
+    parser.add_argument("--url", default="ws://localhost:8765", help="server to replay against")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="1 = real time, 10 = ten times faster, 0 = as fast as possible")
+    parser.add_argument("--exact", action="store_true", help="compare full payloads, not just message types")
+    parser.add_argument("--stall-timeout", type=float, default=STALL_TIMEOUT,
+                        help="seconds to wait for a frame the server never sends")
+    parser.add_argument("--verbose", action="store_true", help="list identical connections too")
+    args = parser.parse_args(argv)
+
+    connections, steps = load_connections(args.path)
+    seed = recording_seed(args.path)
+    if seed is not None:
+        print(f"Recorded with --seed {seed}; the server under test should use the same seed")
+    replayer = Replayer(connections, steps, args.url, args.speed, args.stall_timeout)
+    elapsed = asyncio.run(replayer.run())
+    if not report(connections, elapsed, args.exact, args.verbose):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""
+Room ownership across server nodes.
+
+Every room is owned by exactly one live node. Nodes heartbeat into a
+shared RoomStore; the gateway asks the store who owns a room and forwards
+the websocket there. When a node leaves, its rooms are handed to the
+remaining nodes. A node that drains for a restart keeps the rooms it
+snapshotted: it stays in the store marked as draining (no new rooms, no
+address for the gateway) until it comes back under the same id, or for
+at most DRAIN_HOLD seconds.
+
+Two stores are provided:
+- MemoryRoomStore: everything in one process (tests, single machine)
+- SQLiteRoomStore: a SQLite file shared by processes on one host
+"""
+import hashlib
+import sqlite3
+import threading
+import time
+
+# -- CONFIGURATION --
+NODE_TTL = 15.0          # Seconds a node stays live after its last heartbeat
+HEARTBEAT_INTERVAL = 5.0
+DRAIN_HOLD = 120.0       # Seconds a drained node keeps its snapshotted rooms for its restart
+DEFAULT_ROOM = "main"
+
+
+def room_from_path(path):
+    """'/' -> DEFAULT_ROOM, '/abc' -> 'abc'"""
+    room = (path or "/").split("?", 1)[0].strip("/")
+    return room or DEFAULT_ROOM
+
+
+def rendezvous(room, node_ids):
+    """Highest-random-weight hashing: same room always lands on the same node"""
+    best, best_weight = None, None
+    for node_id in node_ids:
+        weight = hashlib.sha1(f"{room}@{node_id}".encode()).digest()
+        if best_weight is None or weight > best_weight:
+            best, best_weight = node_id, weight
+    return best
+
+
+class RoomStore:
+    """
+    Interface for room ownership state. Subclasses implement the storage
+    methods; placement and handoff are shared.
+    """
+    # True if calls may wait on another process (run them off the event loop)
+    blocking = False
+
+    def __init__(self, ttl=NODE_TTL, clock=time.time, hold=DRAIN_HOLD):
+        self.ttl = ttl
+        self.clock = clock
+        self.hold = hold
+
+    # -- storage (implemented by subclasses) --
+    def heartbeat(self, node_id, address):
+        """Register a node or extend its lease (and end its drain)"""
+        raise NotImplementedError
+
+    def remove_node(self, node_id):
+        raise NotImplementedError
+
+    def hold_node(self, node_id, until):
+        """Mark a node as draining; its rooms stay its own until `until`"""
+        raise NotImplementedError
+
+    def live_nodes(self):
+        """Returns dict node_id -> address of nodes with a valid lease (draining nodes excluded)"""
+        raise NotImplementedError
+
+    def owner(self, room):
+        """Returns the live or draining node owning `room`, or None"""
+        raise NotImplementedError
+
+    def claim(self, room, node_id):
+        """
+        Take `room` for `node_id` unless a live or draining node owns it.
+        Returns the owner after the attempt.
+        """
+        raise NotImplementedError
+
+    def assign(self, room, node_id):
+        """Unconditionally move `room` to `node_id`"""
+        raise NotImplementedError
+
+    def release(self, room, node_id):
+        """Drop ownership if `node_id` still owns `room`"""
+        raise NotImplementedError
+
+    def rooms_of(self, node_id):
+        raise NotImplementedError
+
+    # -- shared logic --
+    def address(self, node_id):
+        return self.live_nodes().get(node_id)
+
+    def place(self, room):
+        """Owner of `room`, choosing and claiming a node if it has none"""
+        owner = self.owner(room)
+        if owner is not None:
+            return owner
+        target = rendezvous(room, self.live_nodes())
+        if target is None:
+            return None
+        return self.claim(room, target)
+
+    def handoff(self, node_id, keep=()):
+        """
+        Move every room of a leaving node to the remaining nodes. Rooms in
+        `keep` stay with the node, marked as draining, so nobody else takes
+        them before it restarts (for at most `hold` seconds).
+        Returns dict room -> new owner (None if released, `node_id` if kept).
+        """
+        if keep:
+            self.hold_node(node_id, self.clock() + self.hold)
+        else:
+            self.remove_node(node_id)
+        others = [other for other in self.live_nodes() if other != node_id]
+        moved = {}
+        for room in self.rooms_of(node_id):
+            if room in keep:
+                moved[room] = node_id
+                continue
+            target = rendezvous(room, others)
+            if target is None:
+                self.release(room, node_id)
+            else:
+                self.assign(room, target)
+            moved[room] = target
+        return moved
+
+
+class MemoryRoomStore(RoomStore):
+    """In-process store (one process, many nodes for tests)"""
+    def __init__(self, ttl=NODE_TTL, clock=time.time, hold=DRAIN_HOLD):
+        super().__init__(ttl, clock, hold)
+        # Map: node_id -> (address, expires_at, draining)
+        self.nodes = {}
+        # Map: room -> node_id
+        self.rooms = {}
+
+    def heartbeat(self, node_id, address):
+        self.nodes[node_id] = (address, self.clock() + self.ttl, False)
+
+    def remove_node(self, node_id):
+        self.nodes.pop(node_id, None)
+
+    def hold_node(self, node_id, until):
+        address = self.nodes.get(node_id, (None,))[0]
+        self.nodes[node_id] = (address, until, True)
+
+    def live_nodes(self):
+        now = self.clock()
+        return {n: addr for n, (addr, expires, draining) in self.nodes.items()
+                if expires > now and not draining}
+
+    def owner(self, room):
+        node_id = self.rooms.get(room)
+        if node_id is not None and node_id in self.nodes and self.nodes[node_id][1] > self.clock():
+            return node_id
+        return None
+
+    def claim(self, room, node_id):
+        current = self.owner(room)
+        if current is None:
+            self.rooms[room] = node_id
+            return node_id
+        return current
+
+    def assign(self, room, node_id):
+        self.rooms[room] = node_id
+
+    def release(self, room, node_id):
+        if self.rooms.get(room) == node_id:
+            del self.rooms[room]
+
+    def rooms_of(self, node_id):
+        return [room for room, owner in self.rooms.items() if owner == node_id]
+
+
+class SQLiteRoomStore(RoomStore):
+    """
+    Store in a SQLite file, shared by every node and gateway on the host.
+    A call waits up to 5 s for another process's write lock; servers run
+    them in a worker thread, so one connection is shared under a lock.
+    """
+    blocking = True
+
+    def __init__(self, path, ttl=NODE_TTL, clock=time.time, hold=DRAIN_HOLD):
+        super().__init__(ttl, clock, hold)
+        self.path = path
+        self.lock = threading.RLock()
+        # Autocommit; claims open their own write transaction
+        self.db = sqlite3.connect(path, isolation_level=None, timeout=5.0, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS nodes ("
+                        "node_id TEXT PRIMARY KEY, address TEXT, expires_at REAL, draining INTEGER DEFAULT 0)")
+        columns = [row[1] for row in self.db.execute("PRAGMA table_info(nodes)")]
+        if "draining" not in columns:
+            # Store created before drains kept their rooms
+            self.db.execute("ALTER TABLE nodes ADD COLUMN draining INTEGER DEFAULT 0")
+        self.db.execute("CREATE TABLE IF NOT EXISTS rooms ("
+                        "room TEXT PRIMARY KEY, node_id TEXT)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS rooms_by_node ON rooms(node_id)")
+
+    def heartbeat(self, node_id, address):
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO nodes VALUES (?, ?, ?, 0)",
+                            (node_id, address, self.clock() + self.ttl))
+
+    def remove_node(self, node_id):
+        with self.lock:
+            self.db.execute("DELETE FROM nodes WHERE node_id = ?", (node_id,))
+
+    def hold_node(self, node_id, until):
+        with self.lock:
+            self.db.execute("UPDATE nodes SET expires_at = ?, draining = 1 WHERE node_id = ?",
+                            (until, node_id))
+
+    def live_nodes(self):
+        with self.lock:
+            rows = self.db.execute("SELECT node_id, address FROM nodes "
+                                   "WHERE expires_at > ? AND draining = 0", (self.clock(),))
+            return dict(rows.fetchall())
+
+    def owner(self, room):
+        with self.lock:
+            row = self.db.execute(
+                "SELECT rooms.node_id FROM rooms JOIN nodes USING (node_id) "
+                "WHERE rooms.room = ? AND nodes.expires_at > ?", (room, self.clock())).fetchone()
+            return row[0] if row else None
+
+    def claim(self, room, node_id):
+        # Compare-and-set inside one write transaction
+        with self.lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                current = self.owner(room)
+                if current is None:
+                    self.db.execute("INSERT OR REPLACE INTO rooms VALUES (?, ?)", (room, node_id))
+                    current = node_id
+                self.db.execute("COMMIT")
+            except Exception:
+                self.db.execute("ROLLBACK")
+                raise
+            return current
+
+    def assign(self, room, node_id):
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO rooms VALUES (?, ?)", (room, node_id))
+
+    def release(self, room, node_id):
+        with self.lock:
+            self.db.execute("DELETE FROM rooms WHERE room = ? AND node_id = ?", (room, node_id))
+
+    def rooms_of(self, node_id):
+        with self.lock:
+            rows = self.db.execute("SELECT room FROM rooms WHERE node_id = ?", (node_id,))
+            return [row[0] for row in rows.fetchall()]
+
+
+def open_store(spec):
+    """'memory' or 'sqlite:<path>' (a bare path also means SQLite)"""
+    if not spec or spec == "memory":
+        return MemoryRoomStore()
+    if spec.startswith("sqlite:"):
+        spec = spec[len("sqlite:"):]
+    return SQLiteRoomStore(spec)
@@ -0,0 +1,85 @@
+"""
+Declarative rule sets.
+
+A rule set lists the roles dealt each round, what each role scores and
+which roles swap points when the guess is wrong. It is compiled once into
+two lookup tables (correct / wrong guess) so scoring a round is a single
+dict lookup per player.
+"""
+
+# -- CONFIGURATION --
+# Points for the classic 4-player game
+POINTS_RAJA = 1000
+POINTS_MANTRI = 800
+POINTS_SIPAHI = 500
+POINTS_CHOR = 0
+
+
+class RuleSet:
+    def __init__(self, name, points, guesser="Sipahi", target="Chor", swaps=None):
+        """
+        name: Variant name shown to players
+        points: List of (role, points), one entry per seat
+        guesser: Role that has to find the target
+        target: Role the guesser is looking for
+        swaps: List of (role_a, role_b) whose points swap on a wrong guess
+               (defaults to the guesser swapping with the target)
+        """
+        self.name = name
+        self.roles = [role for role, _ in points]
+        self.points = dict(points)
+        self.guesser = guesser
+        self.target = target
+        self.swaps = swaps if swaps is not None else [(guesser, target)]
+
+        if len(self.points) != len(self.roles):
+            raise ValueError(f"{name}: duplicate role")
+        for role in [guesser, target] + [r for pair in self.swaps for r in pair]:
+            if role not in self.points:
+                raise ValueError(f"{name}: unknown role '{role}'")
+
+        # Compiled score tables: role -> points
+        self.correct_scores = dict(self.points)
+        self.wrong_scores = dict(self.points)
+        for role_a, role_b in self.swaps:
+            self.wrong_scores[role_a] = self.points[role_b]
+            self.wrong_scores[role_b] = self.points[role_a]
+
+    @property
+    def player_count(self):
+        return len(self.roles)
+
+    def score_table(self, is_correct):
+        """Returns the role -> points table for this guess outcome"""
+        return self.correct_scores if is_correct else self.wrong_scores
+
+
+CLASSIC = RuleSet("classic", [
+    ("Raja", POINTS_RAJA),
+    ("Mantri", POINTS_MANTRI),
+    ("Sipahi", POINTS_SIPAHI),
+    ("Chor", POINTS_CHOR),
+])
+
+# Larger tables played in some regions: extra court roles join in,
+# the Sipahi still hunts the Chor.
+VARIANTS = {
+    "classic": CLASSIC,
+    "rani": RuleSet("rani", [
+        ("Raja", 1000), ("Rani", 900), ("Mantri", 800),
+        ("Sipahi", 500), ("Chor", 0),
+    ]),
+    "senapati": RuleSet("senapati", [
+        ("Raja", 1000), ("Rani", 900), ("Mantri", 800),
+        ("Senapati", 700), ("Sipahi", 500), ("Chor", 0),
+    ]),
+    "darbar": RuleSet("darbar", [
+        ("Raja", 1000), ("Rani", 900), ("Mantri", 800), ("Senapati", 700),
+        ("Sipahi", 500), ("Daku", 100), ("Chor", 0),
+    ]),
+    # On a wrong guess the Kotwal also swaps points with the Daku
+    "mahal": RuleSet("mahal", [
+        ("Raja", 1000), ("Rani", 900), ("Mantri", 800), ("Senapati", 700),
+        ("Kotwal", 600), ("Sipahi", 500), ("Daku", 100), ("Chor", 0),
+    ], swaps=[("Sipahi", "Chor"), ("Kotwal", "Daku")]),
+}
@@ -0,0 +1,325 @@
+"""
+Run the real server on a virtual clock.
+
+    python -m game.simulation --games 1000 --rounds 20 --timeout-rate 0.1 --disconnect-rate 0.05
+
+A Node is served over in-memory connections (`game/transport.py`) on an
+event loop whose clock only moves when nothing is left to run: it then
+jumps straight to the next timer. Pauses, Sipahi deadlines, handshake
+timeouts and reapers all run unmodified, but take no real time, so a
+20-round game finishes in milliseconds.
+
+Scripted players join every table, answer prompts after a random think
+time, sometimes let the Sipahi deadline run out, and sometimes drop
+their connection and come back by name. Everything is drawn from
+--seed, so the same seed and code give the same games; the digest of
+every frame the players received changes when server behaviour does.
+"""
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import os
+import random
+import selectors
+import time
+
+from websockets.exceptions import ConnectionClosed
+
+from game.fairness import FairnessAuditor
+from game.protocol import Error, GameOver, InputRequest, ProtocolError, Response, RoundStart, decode
+from game.rooms import MemoryRoomStore
+from game.rules import CLASSIC, VARIANTS
+from game.transport import MemoryNetwork
+
+# -- CONFIGURATION --
+THINK_TIME = 2.0       # Mean seconds a player takes to answer a prompt
+REJOIN_DELAY = 5.0     # Mean seconds before a dropped player reconnects
+JOIN_GAP = 0.5         # Seconds between players joining a table
+TABLE_TIMEOUT = 3600.0 # Virtual seconds a table may take before it counts as stalled
+
+
+class VirtualSelector:
+    """
+    Stands in for the loop's selector. Instead of blocking until the next
+    timer is due, the clock is advanced to it. Only the loop's self-pipe
+    is registered (there are no sockets), so the real selector is only
+    asked when nothing at all is scheduled.
+    """
+    def __init__(self, loop):
+        self.loop = loop
+        self.selector = selectors.DefaultSelector()
+
+    def __getattr__(self, name):
+        return getattr(self.selector, name)
+
+    def select(self, timeout=None):
+        if timeout is None:
+            # Only another thread can wake us now
+            return self.selector.select(None)
+        self.loop.now += timeout
+        return []
+
+
+class VirtualClockLoop(asyncio.SelectorEventLoop):
+    """Event loop on virtual time (starts at 0, never waits for timers)"""
+    def __init__(self):
+        self.now = 0.0
+        super().__init__(VirtualSelector(self))
+
+    def time(self):
+        return self.now
+
+
+def run(coro):
+    """`asyncio.run` on a VirtualClockLoop"""
+    with asyncio.Runner(loop_factory=VirtualClockLoop) as runner:
+        return runner.run(coro)
+
+
+class Scenario:
+    """Knobs of a simulation run"""
+    def __init__(self, games=100, concurrency=50, humans=None, rounds=5, rules=CLASSIC,
+                 think_time=THINK_TIME, timeout_rate=0.0, disconnect_rate=0.0,
+                 rejoin_rate=1.0, latency=0.0, pace=1.0, seed=0):
+        self.games = games
+        self.concurrency = concurrency
+        self.rules = rules
+        self.humans = humans or rules.player_count
+        self.rounds = rounds
+        self.think_time = think_time
+        # Chance a Sipahi ignores the prompt and lets the deadline pass
+        self.timeout_rate = timeout_rate
+        # Chance per round that a player drops the connection
+        self.disconnect_rate = disconnect_rate
+        # Chance a dropped player comes back
+        self.rejoin_rate = rejoin_rate
+        self.latency = latency
+        self.pace = pace
+        self.seed = seed
+
+
+class SimulationStats:
+    def __init__(self):
+        self.games = 0        # Finished games (reported by the server)
+        self.rounds = 0
+        self.correct = 0      # Rounds the Sipahi caught the Chor
+        self.tables = 0
+        self.stalled = 0      # Tables that did not finish within TABLE_TIMEOUT
+        self.frames = 0
+        self.answers = 0
+        self.ignored = 0      # Prompts left to time out on purpose
+        self.disconnects = 0
+        self.rejoins = 0
+        self.rejected = 0     # Connections the server closed on us
+        # Map: player name -> running hash of the frames it received
+        self.digests = {}
+
+    def record_game(self, game, winner):
+        """Stands in for the history writer of every room"""
+        self.games += 1
+        self.rounds += len(game.round_log)
+        self.correct += sum(1 for _, is_correct, _ in game.round_log if is_correct)
+
+    def digest(self):
+        total = hashlib.sha256()
+        for name in sorted(self.digests):
+            total.update(f"{name}={self.digests[name].hexdigest()};".encode())
+        return total.hexdigest()[:16]
+
+
+class SimulatedPlayer:
+    """A scripted human speaking the real protocol over a MemorySocket"""
+    def __init__(self, name, path, network, scenario, stats, rng):
+        self.name = name
+        self.path = path
+        self.network = network
+        self.scenario = scenario
+        self.stats = stats
+        self.rng = rng
+        self.rejoining = False
+        # Set once the host has configured the table
+        self.hosted = asyncio.Event()
+        self.digest = stats.digests.setdefault(name, hashlib.sha256())
+
+    async def run(self):
+        while not await self.session():
+            if self.rng.random() >= self.scenario.rejoin_rate:
+                return
+            await asyncio.sleep(self.rng.uniform(0, 2 * REJOIN_DELAY))
+            self.rejoining = True
+            self.stats.rejoins += 1
+
+    async def session(self):
+        """One connection. Returns False if we dropped it and may come back."""
+        websocket = self.network.connect(self.path)
+        try:
+            async for frame in websocket:
+                self.stats.frames += 1
+                self.digest.update(frame.encode())
+                try:
+                    message = decode(frame)
+                except ProtocolError:
+                    continue
+                if isinstance(message, InputRequest):
+                    if not await self.answer(websocket, message):
+                        await websocket.close()
+                        return True
+                elif isinstance(message, RoundStart):
+                    if self.rng.random() < self.scenario.disconnect_rate:
+                        self.stats.disconnects += 1
+                        websocket.abort()
+                        return False
+                elif isinstance(message, (GameOver, Error)):
+                    return True
+        except ConnectionClosed:
+            pass
+        # Closed by the server before the game ended
+        self.stats.rejected += 1
+        self.hosted.set()
+        return True
+
+    async def answer(self, websocket, request):
+        """Reply to a prompt; returns False to leave instead"""
+        value = None
+        if request.prompt == "name":
+            value = self.name
+        elif request.prompt == "number_input":
+            value = self.scenario.rounds
+        elif request.options and all(o.endswith(("Human", "Humans")) for o in request.options):
+            if self.rejoining:
+                # Came back after the game ended: do not host a new one
+                return False
+            value = next((o for o in request.options if int(o.split()[0]) == self.scenario.humans),
+                         request.options[-1])
+        elif request.options:
+            if self.rng.random() < self.scenario.timeout_rate:
+                self.stats.ignored += 1
+                return True
+            value = self.rng.choice(request.options)
+
+        await asyncio.sleep(self.rng.uniform(0, 2 * self.scenario.think_time))
+        self.stats.answers += 1
+        try:
+            await websocket.send(Response(value).encode())
+        except ConnectionClosed:
+            pass
+        if request.prompt == "number_input":
+            self.hosted.set()
+        return True
+
+
+class Simulation:
+    def __init__(self, scenario):
+        self.scenario = scenario
+        self.stats = SimulationStats()
+        self.fairness = FairnessAuditor()
+        self.connections = 0
+        self.virtual_time = 0.0
+
+    async def play_table(self, network, number):
+        scenario = self.scenario
+        path = f"/sim{number}"
+        players = [SimulatedPlayer(f"P{number}_{i + 1}", path, network, scenario, self.stats,
+                                   random.Random(f"{scenario.seed}:{number}:{i}"))
+                   for i in range(scenario.humans)]
+        tasks = [asyncio.create_task(players[0].run())]
+        try:
+            # Others join once the host has set the table up
+            await asyncio.wait_for(players[0].hosted.wait(), TABLE_TIMEOUT)
+            for player in players[1:]:
+                await asyncio.sleep(JOIN_GAP)
+                tasks.append(asyncio.create_task(player.run()))
+            await asyncio.wait_for(asyncio.gather(*tasks), TABLE_TIMEOUT)
+        except asyncio.TimeoutError:
+            self.stats.stalled += 1
+        finally:
+            for task in tasks:
+                task.cancel()
+        self.stats.tables += 1
+
+    async def run(self):
+        # Imported here: server.py is a script at the top of the tree
+        from server import Node
+
+        scenario = self.scenario
+        loop = asyncio.get_running_loop()
+        node = Node("sim", "memory://sim", MemoryRoomStore(clock=loop.time),
+                    rules=scenario.rules, history=self.stats)
+        node.pace = scenario.pace
+        node.seed = scenario.seed
+        node.fairness = self.fairness
+        node.store.heartbeat(node.node_id, node.address)
+        heartbeat = asyncio.create_task(node.heartbeat())
+        network = MemoryNetwork(node.handler, scenario.latency)
+
+        slots = asyncio.Semaphore(scenario.concurrency)
+
+        async def table(number):
+            async with slots:
+                await self.play_table(network, number)
+
+        try:
+            await asyncio.gather(*(table(n) for n in range(scenario.games)))
+            # Games whose players all left still play out
+            while any(server.game_started for server in node.rooms.values()):
+                await asyncio.sleep(1)
+        finally:
+            heartbeat.cancel()
+            self.connections = network.opened
+            self.virtual_time = loop.time()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run scripted games against the real server on a virtual clock")
+    parser.add_argument("--games", type=int, default=100, help="tables to play (one game each)")
+    parser.add_argument("--concurrency", type=int, default=50, help="tables playing at the same time")
+    parser.add_argument("--variant", default="classic", choices=sorted(VARIANTS), help="rule set to play")
+    parser.add_argument("--humans", type=int, default=None, help="scripted humans per table (default: all seats)")
+    parser.add_argument("--rounds", type=int, default=5, help="rounds per game")
+    parser.add_argument("--think", type=float, default=THINK_TIME, help="mean seconds to answer a prompt")
+    parser.add_argument("--timeout-rate", type=float, default=0.0,
+                        help="chance a Sipahi lets the deadline run out")
+    parser.add_argument("--disconnect-rate", type=float, default=0.0,
+                        help="chance per round that a player drops the connection")
+    parser.add_argument("--rejoin-rate", type=float, default=1.0, help="chance a dropped player comes back")
+    parser.add_argument("--latency", type=float, default=0.0, help="one-way latency of every connection (seconds)")
+    parser.add_argument("--pace", type=float, default=1.0, help="pace of the game loop (see server.py --pace)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the server and every player")
+    parser.add_argument("--expect", default=None, metavar="DIGEST",
+                        help="exit with an error unless the frame digest matches")
+    parser.add_argument("--verbose", action="store_true", help="show the server log")
+    args = parser.parse_args(argv)
+
+    rules = VARIANTS[args.variant]
+    if args.humans is not None and not 1 <= args.humans <= rules.player_count:
+        parser.error(f"--humans must be between 1 and {rules.player_count}")
+    scenario = Scenario(args.games, args.concurrency, args.humans, args.rounds, rules,
+                        args.think, args.timeout_rate, args.disconnect_rate, args.rejoin_rate,
+                        args.latency, args.pace, args.seed)
+    simulation = Simulation(scenario)
+
+    started = time.perf_counter()
+    with open(os.devnull, "w") as devnull:
+        quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(devnull)
+        with quiet:
+            run(simulation.run())
+    elapsed = time.perf_counter() - started
+
+    stats = simulation.stats
+    virtual = simulation.virtual_time
+    print(f"Games: {stats.games}/{scenario.games} finished, {stats.rounds} rounds "
+          f"({stats.correct} caught), {stats.stalled} stalled")
+    print(f"Players: {simulation.connections} connections, {stats.frames} frames, {stats.answers} answers, "
+          f"{stats.ignored} timeouts, {stats.disconnects} disconnects, {stats.rejoins} rejoins, "
+          f"{stats.rejected} rejected")
+    fairness = simulation.fairness.overview()
+    print(f"Fairness: {fairness['rounds']} rounds audited, {fairness['alerts']} alert(s)")
+    print(f"Virtual time: {virtual:.0f}s in {elapsed:.2f}s real ({virtual / max(elapsed, 1e-9):.0f}x)")
+    print(f"Digest: {stats.digest()}")
+    if args.expect and args.expect != stats.digest():
+        raise SystemExit(f"Digest differs from {args.expect}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""
+Room snapshots for restarts.
+
+A draining server parks every game at a round boundary and writes all
+rooms to one gzip-compressed JSON file; the next process reads it back
+and lets players re-attach by name.
+"""
+import gzip
+import json
+import os
+
+SNAPSHOT_VERSION = 1
+
+
+def save_snapshot(path, rooms):
+    """rooms: dict room name -> GameServer.snapshot()"""
+    data = {"version": SNAPSHOT_VERSION, "rooms": rooms}
+    tmp_path = path + ".tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"))
+    # Never leave a half-written snapshot behind
+    os.replace(tmp_path, path)
+
+
+def load_snapshot(path):
+    """Returns dict room name -> snapshot, or {} if there is no snapshot"""
+    if not os.path.exists(path):
+        return {}
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version: {data.get('version')}")
+    return data["rooms"]
@@ -0,0 +1,180 @@
+"""
+Tournament pairings.
+
+Entrants (humans and server-side bots) are seated at tables of the
+variant's size, round after round:
+- knockout: only the best entrant of every table advances, until one is left
+- swiss: everybody plays every round; tables are cut from the standings so
+  players with similar records meet, avoiding rematches where possible
+
+This module only decides who plays whom and keeps the standings;
+server.py plays the tables.
+"""
+import math
+
+# -- CONFIGURATION --
+FORMATS = ("swiss", "knockout")
+REMATCH_WINDOW = 3  # Swiss looks this many tables ahead to avoid rematches
+BOT_STRATEGIES = ("random", "tracker", "hunter")
+
+
+class Entrant:
+    __slots__ = ("name", "is_bot", "strategy", "seed", "points", "score", "wins",
+                 "games", "opponents", "eliminated")
+
+    def __init__(self, name, is_bot=False, strategy="random", seed=0):
+        self.name = name
+        self.is_bot = is_bot
+        self.strategy = strategy
+        self.seed = seed
+        # Tournament points: one per opponent finished ahead of
+        self.points = 0
+        # Sum of game scores, breaks ties on points
+        self.score = 0
+        self.wins = 0
+        self.games = 0
+        self.opponents = set()
+        self.eliminated = False
+
+    @property
+    def key(self):
+        # Best first; the entry list order (seed) breaks full ties
+        return (-self.points, -self.score, self.seed)
+
+
+def load_entrants(path):
+    """
+    One entrant per line: `name` for a human who checks in over the
+    websocket, `name bot [strategy]` for a bot the server plays itself.
+    Blank lines and lines starting with # are ignored.
+    """
+    entrants = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            parts = line.split()
+            if not parts or parts[0].startswith("#"):
+                continue
+            is_bot = len(parts) > 1 and parts[1] == "bot"
+            strategy = parts[2] if is_bot and len(parts) > 2 else "random"
+            if strategy not in BOT_STRATEGIES:
+                raise ValueError(f"Unknown bot strategy '{strategy}' for {parts[0]}")
+            entrants.append((parts[0], is_bot, strategy))
+    return entrants
+
+
+def split_evenly(count, size):
+    """Table sizes for `count` players: as few tables as possible, sizes differing by at most one"""
+    tables = math.ceil(count / size)
+    base, extra = divmod(count, tables)
+    return [base + 1 if i < extra else base for i in range(tables)]
+
+
+class Tournament:
+    def __init__(self, entrants, table_size=4, fmt="swiss", rounds=3):
+        """entrants: list of (name, is_bot, strategy), best seed first"""
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown tournament format: {fmt}")
+        names = [name for name, _, _ in entrants]
+        if len(set(names)) != len(names):
+            raise ValueError("Entrant names must be unique")
+        if len(entrants) < 2:
+            raise ValueError("A tournament needs at least 2 entrants")
+
+        self.format = fmt
+        self.table_size = table_size
+        # Map: name -> Entrant
+        self.entrants = {}
+        for seed, (name, is_bot, strategy) in enumerate(entrants):
+            self.entrants[name] = Entrant(name, is_bot, strategy, seed)
+
+        self.round = 0
+        if fmt == "knockout":
+            # Every round keeps one entrant per table
+            self.total_rounds, remaining = 0, len(entrants)
+            while remaining > 1:
+                remaining = math.ceil(remaining / table_size)
+                self.total_rounds += 1
+        else:
+            self.total_rounds = rounds
+
+    @property
+    def finished(self):
+        if self.format == "knockout":
+            return len(self.active()) <= 1
+        return self.round >= self.total_rounds
+
+    def active(self):
+        return [e for e in self.entrants.values() if not e.eliminated]
+
+    def standings(self):
+        """Entrants best first (eliminated entrants after everybody still in)"""
+        return sorted(self.entrants.values(), key=lambda e: (e.eliminated, e.key))
+
+    def champion(self):
+        return self.standings()[0] if self.finished else None
+
+    def next_tables(self):
+        """Seat the next round. Returns a list of tables (lists of Entrant)."""
+        if self.finished:
+            return []
+        self.round += 1
+        players = sorted(self.active(), key=lambda e: e.key)
+        sizes = split_evenly(len(players), self.table_size)
+
+        if self.format == "knockout":
+            # Snake seeding spreads the strongest players over the tables
+            tables = [[] for _ in sizes]
+            order = list(range(len(tables)))
+            i = 0
+            while i < len(players):
+                for t in order:
+                    if i < len(players) and len(tables[t]) < sizes[t]:
+                        tables[t].append(players[i])
+                        i += 1
+                order.reverse()
+            return tables
+
+        tables = []
+        for size in sizes:
+            table = [players.pop(0)]
+            window = REMATCH_WINDOW * self.table_size
+            while len(table) < size:
+                # Closest in the standings among those met least often
+                best = min(range(min(window, len(players))),
+                           key=lambda i: sum(o.name in players[i].opponents for o in table))
+                table.append(players.pop(best))
+            tables.append(table)
+        return tables
+
+    def record(self, table, scores):
+        """
+        Store the result of one table.
+        scores: dict name -> final game score (may include fill-in bots)
+        Returns the entrant who won the table.
+        """
+        # Stable sort keeps the better seed first on equal scores
+        ranked = sorted(table, key=lambda e: -scores.get(e.name, 0))
+        for place, entrant in enumerate(ranked):
+            entrant.games += 1
+            entrant.score += scores.get(entrant.name, 0)
+            entrant.points += sum(1 for other in ranked[place + 1:]
+                                  if scores.get(other.name, 0) < scores.get(entrant.name, 0))
+            entrant.opponents.update(o.name for o in table if o is not entrant)
+            if self.format == "knockout" and place > 0:
+                entrant.eliminated = True
+
+        winner = ranked[0]
+        winner.wins += 1
+        return winner
+
+    def entry(self, entrant, rank):
+        return {
+            "rank": rank,
+            "name": entrant.name,
+            "bot": entrant.is_bot,
+            "points": entrant.points,
+            "score": entrant.score,
+            "wins": entrant.wins,
+            "games": entrant.games,
+            "eliminated": entrant.eliminated,
+        }
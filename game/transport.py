@@ -0,0 +1,160 @@
+"""
+In-memory websocket transport.
+
+The server only needs a small part of a websocket connection: `send`,
+`recv`, `async for`, `close(code, reason)` and `request.path`. Anything
+providing those can be handed to `Node.handler` / `GameServer.handler`
+instead of a `websockets` connection (RecordedSocket in
+`game/recorder.py` is another one).
+
+MemorySocket is such a connection without a socket: a pair of them
+passes frames through in-process queues, with an optional one-way
+latency, and closes with the same ConnectionClosedOK / ConnectionClosedError
+exceptions (and close codes) as `websockets`. MemoryNetwork plays the
+part of `websockets.serve` + `websockets.connect`.
+
+Used by `game/simulation.py` to run the real server logic on a virtual clock.
+"""
+import asyncio
+import itertools
+from collections import deque
+
+from websockets.exceptions import ConnectionClosedError, ConnectionClosedOK
+from websockets.frames import Close
+
+OK_CODES = (1000, 1001)  # Close codes that end `async for` quietly
+ABNORMAL_CLOSURE = 1006  # Dropped without a close frame
+
+
+def closed_error(code, reason=""):
+    """The exception `websockets` raises after a close with `code`"""
+    if code == ABNORMAL_CLOSURE:
+        return ConnectionClosedError(None, None)
+    frame = Close(code, reason)
+    if code in OK_CODES:
+        return ConnectionClosedOK(frame, frame, True)
+    return ConnectionClosedError(frame, frame, True)
+
+
+class MemoryRequest:
+    __slots__ = ("path",)
+
+    def __init__(self, path):
+        self.path = path
+
+
+class MemorySocket:
+    """One end of an in-memory connection (see `memory_pipe`)"""
+    def __init__(self, path="/", latency=0.0, conn_id=0):
+        self.request = MemoryRequest(path)
+        self.latency = latency
+        # Fixed hash: sets of sockets iterate in the same order every run
+        self.conn_id = conn_id
+        self.peer = None
+        # Frames (and the peer's close) as (deliver at, frame or exception)
+        self.inbox = deque()
+        self.arrived = asyncio.Event()
+        # Exception raised by recv/send once this end is closed
+        self.closed = None
+
+    def __hash__(self):
+        return self.conn_id
+
+    def __repr__(self):
+        return f"MemorySocket(#{self.conn_id} {self.request.path})"
+
+    def deliver(self, item):
+        """Called by the peer; `item` is a frame or a close exception"""
+        self.inbox.append((asyncio.get_running_loop().time() + self.peer.latency, item))
+        self.arrived.set()
+
+    async def send(self, message):
+        if self.closed:
+            raise self.closed
+        self.peer.deliver(message)
+
+    async def recv(self):
+        while not self.inbox:
+            if self.closed:
+                raise self.closed
+            self.arrived.clear()
+            await self.arrived.wait()
+        at, item = self.inbox[0]
+        delay = at - asyncio.get_running_loop().time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        self.inbox.popleft()
+        if isinstance(item, Exception):
+            self.closed = item
+            raise item
+        return item
+
+    async def __aiter__(self):
+        try:
+            while True:
+                yield await self.recv()
+        except ConnectionClosedOK:
+            return
+
+    def _shut(self, error, peer_error):
+        if self.closed:
+            return
+        self.closed = error
+        # Wake our own reader; the peer learns about it after the latency
+        self.arrived.set()
+        if not self.peer.closed:
+            self.peer.deliver(peer_error)
+
+    async def close(self, code=1000, reason=""):
+        error = closed_error(code, reason)
+        self._shut(error, error)
+
+    def abort(self):
+        """Drop the connection without a close frame (a crash or a lost network)"""
+        error = closed_error(ABNORMAL_CLOSURE)
+        self._shut(error, error)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+def memory_pipe(path="/", latency=0.0, conn_id=0):
+    """Returns (client end, server end) of a new in-memory connection"""
+    client = MemorySocket(path, latency, conn_id)
+    server = MemorySocket(path, latency, conn_id)
+    client.peer, server.peer = server, client
+    return client, server
+
+
+class MemoryNetwork:
+    """
+    Serves `handler` (e.g. `Node.handler`) over in-memory connections.
+    Like `websockets.serve`, the server end is closed when the handler
+    returns (1011 if it raised).
+    """
+    def __init__(self, handler, latency=0.0):
+        self.handler = handler
+        self.latency = latency
+        self.ids = itertools.count()
+        self.tasks = set()
+        self.opened = 0
+
+    def connect(self, path="/"):
+        """Open a connection; returns the client end (usable with `async with`)"""
+        client, server = memory_pipe(path, self.latency, next(self.ids))
+        self.opened += 1
+        task = asyncio.create_task(self.serve(server))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return client
+
+    async def serve(self, websocket):
+        try:
+            await self.handler(websocket)
+        except Exception:
+            await websocket.close(1011, "Internal error")
+            raise
+        await websocket.close()
@@ -0,0 +1,103 @@
+import argparse
+import asyncio
+import websockets
+from game.compression import (CompressionPolicy, add_arguments as add_compression_arguments,
+                              disable_compression, opted_out, policy_from_args)
+from game.connections import request_path
+from game.rooms import open_store, room_from_path
+
+# Constants
+GATEWAY_PORT = 8760
+
+class Gateway:
+    """
+    Public entry point in front of several server nodes.
+    Looks up (or picks) the node owning the room in the URL and
+    forwards the websocket there, frame by frame.
+    """
+    def __init__(self, store):
+        self.store = store
+
+    def route(self, room):
+        """(owner, address) of the node for `room`, or (None, None)"""
+        owner = self.store.place(room)
+        return owner, self.store.address(owner) if owner else None
+
+    async def handler(self, websocket):
+        path = request_path(websocket)
+        if opted_out(path):
+            disable_compression(websocket)
+        room = room_from_path(path)
+        if self.store.blocking:
+            # A shared store may wait on a node's write lock
+            owner, address = await asyncio.to_thread(self.route, room)
+        else:
+            owner, address = self.route(room)
+        if address is None:
+            # An owner without an address is draining: its restart will
+            # restore the room, so the client should come back shortly
+            reason = f"Room '{room}' is moving, try again shortly" if owner else "No game server available"
+            await websocket.close(code=1013, reason=reason)
+            return
+
+        try:
+            # Same path and query as the client asked for (per-connection
+            # options such as ?compress=0 reach the node); frames are only
+            # compressed on the client side of the gateway
+            async with websockets.connect(f"{address}{path}", compression=None) as upstream:
+                await self.pipe(websocket, upstream)
+        except (OSError, websockets.exceptions.InvalidHandshake) as e:
+            print(f"Could not reach {owner} for room '{room}': {e}")
+            await websocket.close(code=1011, reason="Game server unavailable")
+
+    async def pipe(self, client, upstream):
+        """Copy frames both ways until one side closes"""
+        async def forward(source, target):
+            try:
+                async for message in source:
+                    await target.send(message)
+            except websockets.exceptions.ConnectionClosed:
+                pass
+
+        tasks = [
+            asyncio.create_task(forward(client, upstream)),
+            asyncio.create_task(forward(upstream, client)),
+        ]
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in tasks:
+            task.cancel()
+
+        # Pass the server's close reason (e.g. "Game already in progress") on
+        code = upstream.close_code
+        if code is None or code == 1005:
+            code = 1000
+        elif code == 1006:
+            code = 1011
+        await client.close(code=code, reason=upstream.close_reason or "")
+        await upstream.close()
+
+async def main(store_spec, host="localhost", port=GATEWAY_PORT, compression=None):
+    """Gateway entry point"""
+    gateway = Gateway(open_store(store_spec))
+    compression = compression or CompressionPolicy()
+    print(f"Raja Mantri Chor Sipahi Gateway")
+    print(f"Room store: {store_spec}")
+    print(f"Compression: {compression.mode}")
+    print(f"Connect via ws://{host}:{port}/<room>")
+
+    async with websockets.serve(gateway.handler, host, port, **compression.serve_kwargs()):
+        await asyncio.Future()  # run forever
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Routes players to the node hosting their room")
+    parser.add_argument("--store", default="sqlite:rooms.db",
+                        help="room store shared with the server nodes")
+    parser.add_argument("--host", default="localhost", help="interface to listen on")
+    parser.add_argument("--port", type=int, default=GATEWAY_PORT, help="port to listen on")
+    add_compression_arguments(parser)
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(main(args.store, args.host, args.port, policy_from_args(args)))
+    except KeyboardInterrupt:
+        print("\nGateway stopping...")
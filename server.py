@@ -1,37 +1,125 @@
+import argparse
 import asyncio
+import os
+import re
+import signal
+import sqlite3
 import websockets
-import json
 import random
 from game.engine import GameEngine, Player
+from game.rules import CLASSIC, VARIANTS
+from game.history import HistoryWriter
+from game.connections import ConnectionPolicy, ConnectionTracker, request_path
+from game.connections import add_arguments as add_connection_arguments
+from game.connections import policy_from_args as connection_policy_from_args
+from game.rooms import HEARTBEAT_INTERVAL, open_store, room_from_path
+from game.snapshot import load_snapshot, save_snapshot
+from game.leaderboard import Leaderboard
+from game.tournament import Tournament, load_entrants
+from game.recorder import SessionRecorder, flush_recording
+from game.admin import ADMIN_PORT, AdminServer
+from game.compression import add_arguments as add_compression_arguments
+from game.compression import disable_compression, opted_out, policy_from_args
+from game.fairness import FAIRNESS_PATH, FairnessAuditor, export_fairness
+from game.protocol import (Command, Error, GameOver, Info, InputRequest, LeaderboardPage,
+                           ProtocolError, Rank, Response, RoleReveal, RoundEnd, RoundStart,
+                           Scoreboard, SipahiTurn, Standings, TournamentOver, decode)
 
 # Constants
 PORT = 8765
+SNAPSHOT_PATH = "snapshot.json.gz"
+HISTORY_PATH = "history.bin"
+LEADERBOARD_PATH = "leaderboard.db"
+DATA_DIR = "nodes"     # Default files of a node go to nodes/<node id>/
+DRAIN_TIMEOUT = 60.0   # Seconds to wait for running games to reach a round boundary
+RESUME_GRACE = 30.0    # Seconds a restored game waits for its humans to re-attach
+LEADERBOARD_PAGE = 100  # Most leaderboard entries returned per query
+TOURNAMENT_ROOM = "tournament"
+CHECK_IN_TIMEOUT = 120.0  # Seconds humans get to check in before round 1
+MAX_TABLES = 100          # Tournament tables played at the same time
+PROGRESS_INTERVAL = 5.0   # Seconds between tournament progress updates
+STANDINGS_SHOWN = 10      # Rows of the standings sent to every participant
+
+# Commands any connection may send, even before joining a game
+QUERY_COMMANDS = ("leaderboard", "rank")
+
+def node_file(node_id, name):
+    """Default path of a file only this node writes: nodes/<node id>/<name>"""
+    directory = os.path.join(DATA_DIR, re.sub(r"[^\w.-]", "_", node_id))
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, name)
+
+def reply_value(message, default):
+    """`value` of a Response, or `default` for anything else"""
+    if isinstance(message, Response) and message.value is not None:
+        return message.value
+    return default
 
 class GameServer:
-    def __init__(self):
-        self.game = GameEngine()
+    def __init__(self, policy=None, rules=CLASSIC, history=None, leaderboard=None):
+        self.rules = rules
+        self.game = GameEngine(rules)
         self.connected_clients = set()
         self.game_started = False
         
         # Game Settings (Defaults)
-        self.required_humans = 4
+        self.required_humans = rules.player_count
         self.total_rounds = 5
         
         # Map: websocket -> asyncio.Future
         self.waiting_for_input = {}
         
+        # Heartbeat / deadline settings and per-socket accounting
+        self.policy = policy or ConnectionPolicy()
+        self.tracker = ConnectionTracker(self.policy)
+        # When the host opened the lobby (None while no lobby is open)
+        self.lobby_opened_at = None
+        
+        # Finished games are appended here for `python -m game.analytics`
+        self.history = history
+        # Player ratings, shared by every room of the node
+        self.leaderboard = leaderboard
+        
+        # Restart support: when draining, the game loop stops at the next
+        # round boundary and sets `parked`; `resuming` marks a restored game.
+        self.draining = False
+        self.parked = asyncio.Event()
+        self.resuming = False
+        
+        # Set for tournament tables; clients stay connected after game_over
+        self.tournament = None
+        
+        # Role assignment audit, shared by every room of the node
+        self.fairness = None
+        
+        # Multiplies every delay of the game loop (0.1 = ten times faster)
+        self.pace = 1.0
+        
+        # Dispatch tables for decoded frames (see `handler`)
+        # Map: message class -> coroutine(websocket, message)
+        self.handlers = {Response: self.on_response, Command: self.on_command}
+        # Map: command name -> coroutine(websocket, command)
+        self.commands = {"start": self.on_start, "leaderboard": self.handle_query, "rank": self.handle_query}
+        
+        # With a seed, the n-th game of a room always plays out the same
+        # (given the same player input); used to replay recorded sessions.
+        self.seed = None
+        self.room = None
+        self.games_played = 0
+        
     async def broadcast(self, message):
-        """Send a JSON message to all connected clients"""
+        """Send a message (game/protocol.py) to all connected clients"""
         # If nobody is connected, don't do anything
         if not self.connected_clients:
             return
             
-        json_msg = json.dumps(message)
+        json_msg = message.encode()
         tasks = []
         for ws in self.connected_clients:
             try:
                 # Add the send task to our list
                 tasks.append(ws.send(json_msg))
+                self.tracker.sent(ws, json_msg)
             except:
                 pass 
         
@@ -39,13 +127,43 @@ class GameServer:
         if tasks:
             await asyncio.gather(*tasks, return_exceptions=True)
 
+    async def pause(self, seconds):
+        """Dramatic pause between game steps, scaled by `pace`"""
+        await asyncio.sleep(seconds * self.pace)
+
     async def personal_message(self, websocket, message):
         """Send to one specific client"""
         try:
-            await websocket.send(json.dumps(message))
+            json_msg = message.encode()
+            await websocket.send(json_msg)
+            self.tracker.sent(websocket, json_msg)
         except:
             pass
 
+    async def handle_query(self, websocket, command):
+        """Answer a leaderboard / rank command"""
+        if not self.leaderboard:
+            await self.personal_message(websocket, Error("Leaderboard disabled"))
+            return
+            
+        if command.command == "leaderboard":
+            count = max(1, min(command.count or 10, LEADERBOARD_PAGE))
+            offset = max(0, command.offset or 0)
+            await self.personal_message(websocket, LeaderboardPage(
+                offset=offset,
+                total=len(self.leaderboard.index),
+                entries=self.leaderboard.top(count, offset)
+            ))
+        else:
+            name = command.name or ""
+            await self.personal_message(websocket, Rank(name, self.leaderboard.rank(name)))
+
+    async def recv_register(self, websocket):
+        """Read and decode one reply during registration, bounded by the handshake deadline"""
+        message = await asyncio.wait_for(websocket.recv(), timeout=self.policy.handshake_timeout)
+        self.tracker.received(websocket, message)
+        return decode(message)
+
     async def wait_for_input(self, websocket, timeout=30.0):
         """
         Wait for a message from a specific client.
@@ -74,26 +192,109 @@ class GameServer:
                 del self.waiting_for_input[websocket]
             raise e
 
+    def snapshot(self):
+        """Room state at a round boundary, for `game/snapshot.py`"""
+        engine = self.game.to_dict()
+        scored = self.game.round_log[-1][0] if self.game.round_log else 0
+        if engine["current_round"] > scored:
+            # Taken mid-round (drain timed out): back to the last boundary,
+            # the restored game plays the unscored round again
+            engine["current_round"] = scored
+        return {
+            "game_started": self.game_started,
+            "required_humans": self.required_humans,
+            "total_rounds": self.total_rounds,
+            "engine": engine,
+        }
+
+    def restore(self, data):
+        """Load a snapshot; humans re-attach later by name"""
+        self.game = GameEngine.from_dict(data["engine"], self.rules)
+        self.required_humans = data["required_humans"]
+        self.total_rounds = data["total_rounds"]
+        self.game_started = data["game_started"]
+        self.resuming = self.game_started
+        if not self.game_started and self.game.players:
+            self.lobby_opened_at = self.tracker.clock()
+
+    def status(self):
+        """Plain-data view of the room for the admin API (see game/admin.py)"""
+        waiting = {ws for ws, future in self.waiting_for_input.items() if not future.done()}
+        if self.parked.is_set():
+            state = "parked"
+        elif self.game_started:
+            state = "playing"
+        elif self.game.players:
+            state = "lobby"
+        else:
+            state = "empty"
+        return {
+            "state": state,
+            "variant": self.rules.name,
+            "round": self.game.current_round,
+            "total_rounds": self.total_rounds,
+            "required_humans": self.required_humans,
+            "players": [{
+                "name": p.name,
+                "bot": p.is_bot,
+                "strategy": p.strategy if p.is_bot else None,
+                "score": p.score,
+                "connected": p.is_bot or p.websocket in self.connected_clients,
+            } for p in self.game.players],
+            "pending_inputs": [p.name for p in self.game.players if p.websocket in waiting],
+            "connections": len(self.connected_clients),
+            "games_played": self.games_played,
+            "tournament": self.tournament,
+        }
+
+    def detached_humans(self):
+        """Human seats without a live connection"""
+        return [p for p in self.game.players
+                if not p.is_bot and p.websocket not in self.connected_clients]
+
+    async def resume(self, grace=RESUME_GRACE):
+        """Continue a restored game once its humans are back (or after `grace` seconds)"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + grace
+        while self.detached_humans() and loop.time() < deadline:
+            await asyncio.sleep(0.5)
+        if self.draining:
+            # Drained before it got going; it is still at its restored boundary
+            return
+        await self.handle_game_loop()
+
     async def handle_game_loop(self):
         """The main game loop running on the server"""
         print("Starting Game Loop...")
         self.game_started = True
+        self.lobby_opened_at = None
         
-        # 1. Fill empty slots with bots
-        # This will add bots until we have 4 players total
-        self.game.fill_with_bots()
-        
-        bot_count = sum(1 for p in self.game.players if p.is_bot)
-        await self.broadcast({
-            "type": "info", 
-            "message": f"Game Starting! {bot_count} Bots added."
-        })
+        if self.resuming:
+            self.resuming = False
+            await self.broadcast(Info(f"Game resumed after round {self.game.current_round}!"))
+        else:
+            if self.seed is not None:
+                self.game.rng.seed(f"{self.seed}:{self.room}:{self.games_played}")
+            self.games_played += 1
+            
+            # 1. Fill empty slots with bots
+            # This will add bots until every seat of the variant is taken
+            self.game.fill_with_bots()
+            
+            bot_count = sum(1 for p in self.game.players if p.is_bot)
+            await self.broadcast(Info(f"Game Starting! {bot_count} Bots added."))
 
         # 2. Loop through rounds
         # Use the number of rounds set by the Host
-        for r in range(self.total_rounds):
-            round_num = r + 1
-            await self.broadcast({"type": "round_start", "round": round_num, "total": self.total_rounds})
+        while self.game.current_round < self.total_rounds:
+            if self.draining:
+                # Round boundary: safe to snapshot
+                print(f"Game parked after round {self.game.current_round}.")
+                self.parked.set()
+                return
+                
+            round_num = self.game.current_round + 1
+            await self.broadcast(RoundStart(round_num, self.total_rounds))
             
             # Start Round Logic (Shuffle roles)
             self.game.start_round()
@@ -101,12 +302,9 @@ class GameServer:
             # Send roles to players
             for player in self.game.players:
                 if player.websocket:
-                    await self.personal_message(player.websocket, {
-                        "type": "role_reveal",
-                        "role": player.role
-                    })
+                    await self.personal_message(player.websocket, RoleReveal(player.role))
             
-            await asyncio.sleep(3)
+            await self.pause(3)
             
             # Identify Sipahi and Chor Options
             sipahi = self.game.get_sipahi()
@@ -114,153 +312,179 @@ class GameServer:
             chor_names = [p.name for p in chor_candidates]
             
             # Tell everyone who the Sipahi is
-            await self.broadcast({
-                "type": "sipahi_turn",
-                "sipahi": sipahi.name,
-                "chor_options": chor_names
-            })
+            await self.broadcast(SipahiTurn(sipahi.name, chor_names))
             
             guessed_player_name = None
             
             # 3. Get Sipahi's Guess
-            if sipahi.is_bot:
+            if not sipahi.is_bot and sipahi.websocket not in self.connected_clients:
+                # Human left (or has not re-attached after a restart)
+                await self.broadcast(Info("Sipahi is away! Choosing randomly."))
+                guessed_player_name = self.game.rng.choice(chor_candidates).name
+            elif sipahi.is_bot:
                 # Bot Logic
-                await asyncio.sleep(2)
+                await self.pause(2)
                 guess = self.game.get_bot_guess(sipahi)
                 guessed_player_name = guess.name
-                await self.broadcast({"type": "info", "message": f"{sipahi.name} (Bot) is thinking..."})
-                await asyncio.sleep(1)
+                await self.broadcast(Info(f"{sipahi.name} (Bot) is thinking..."))
+                await self.pause(1)
             else:
                 # Human Logic
                 try:
-                    await self.personal_message(sipahi.websocket, {
-                        "type": "input_request",
-                        "prompt": "choose_chor",
-                        "title": "Who is the Chor?",
-                        "options": chor_names
-                    })
+                    await self.personal_message(sipahi.websocket, InputRequest(
+                        "choose_chor", title="Who is the Chor?", options=chor_names))
                     
-                    # Wait for the player to reply
-                    response_json = await self.wait_for_input(sipahi.websocket, timeout=30.0)
-                    response = json.loads(response_json)
-                    guessed_player_name = response.get("value")
+                    # Wait for the player to reply (an already decoded Response)
+                    response = await self.wait_for_input(sipahi.websocket, timeout=30.0 * self.pace)
+                    guessed_player_name = response.value
                     
                 except asyncio.TimeoutError:
-                    await self.broadcast({"type": "info", "message": "Sipahi timed out! Choosing randomly."})
-                    guess = random.choice(chor_candidates)
+                    await self.broadcast(Info("Sipahi timed out! Choosing randomly."))
+                    guess = self.game.rng.choice(chor_candidates)
                     guessed_player_name = guess.name
                 except Exception as e:
                     print(f"Error getting guess: {e}")
-                    guess = random.choice(chor_candidates)
+                    guess = self.game.rng.choice(chor_candidates)
                     guessed_player_name = guess.name
 
+            # Anything but one of the offered names counts as no answer
+            if guessed_player_name not in chor_names:
+                guessed_player_name = self.game.rng.choice(chor_names)
+            
             # 4. Process Result
-            await self.broadcast({"type": "info", "message": f"{sipahi.name} guessed: {guessed_player_name}"})
-            await asyncio.sleep(1)
+            await self.broadcast(Info(f"{sipahi.name} guessed: {guessed_player_name}"))
+            await self.pause(1)
             
             is_correct, score_updates = self.game.process_guess(sipahi, guessed_player_name)
+            if self.fairness:
+                self.fairness.record_round(self.game)
             
             # Reveal Roles
             all_roles = self.game.get_role_info()
-            await self.broadcast({
-                "type": "round_end",
-                "correct": is_correct,
-                "all_roles": all_roles,
-                "scores": score_updates
-            })
+            await self.broadcast(RoundEnd(is_correct, all_roles, score_updates))
             
             # Show Scoreboard
             scoreboard = {p.name: p.score for p in self.game.players}
-            await self.broadcast({"type": "scoreboard", "scores": scoreboard})
+            await self.broadcast(Scoreboard(scoreboard))
             
-            await asyncio.sleep(4)
+            await self.pause(4)
 
         # 5. Game Over
         winner = max(self.game.players, key=lambda p: p.score)
-        await self.broadcast({
-            "type": "game_over",
-            "winner": winner.name,
-            "final_scores": {p.name: p.score for p in self.game.players}
-        })
+        
+        ratings = {}
+        updated = {}
+        if self.leaderboard:
+            results = [(p.name, p.score, p.is_bot) for p in self.game.players]
+            updated = self.leaderboard.record_game(results)
+            for name, (rating, change) in updated.items():
+                ratings[name] = {"rating": rating, "change": change}
+                
+        await self.broadcast(GameOver(
+            winner.name,
+            {p.name: p.score for p in self.game.players},
+            ratings,
+            self.tournament
+        ))
+
+        if updated:
+            # The SQLite commit waits on the disk: keep it off the event loop
+            try:
+                await asyncio.to_thread(self.leaderboard.save, self.leaderboard.rows(updated))
+            except sqlite3.Error as e:
+                print(f"Could not save ratings: {e}")
+        
+        if self.history:
+            try:
+                self.history.record_game(self.game, winner.name)
+            except OSError as e:
+                print(f"Could not save game history: {e}")
         
         print("Game Finished.")
+        self.reset()
+
+    def reset(self):
+        """Forget the current game and go back to an empty lobby"""
         self.game_started = False
-        self.game = GameEngine()
+        self.lobby_opened_at = None
+        self.game = GameEngine(self.rules)
         self.connected_clients.clear()
         self.waiting_for_input.clear()
         # Reset defaults
-        self.required_humans = 4
+        self.required_humans = self.rules.player_count
         self.total_rounds = 5
 
     async def register(self, websocket):
         """Handle new connections"""
-        if self.game_started:
+        if self.game_started and not self.detached_humans():
             await websocket.close(reason="Game already in progress")
             return
 
         print("New connection...")
+        self.tracker.add(websocket)
         try:
             # We are here BEFORE the handler loop starts for this client.
             # So we can use `websocket.recv()` directly.
             
             # 1. Ask for Name
-            await websocket.send(json.dumps({"type": "input_request", "prompt": "name"}))
-            name_response = await websocket.recv()
+            await self.personal_message(websocket, InputRequest("name"))
+            reply = await self.recv_register(websocket)
+            
+            # Leaderboard queries may come before (or instead of) a name
+            while isinstance(reply, Command) and reply.command in QUERY_COMMANDS:
+                await self.handle_query(websocket, reply)
+                reply = await self.recv_register(websocket)
+            
+            player_name = reply_value(reply, "Unknown")
             
-            data = json.loads(name_response)
-            player_name = data.get("value", "Unknown")
+            # Re-attach to a seat left by a disconnect or a restart
+            for seat in self.detached_humans():
+                if seat.name == player_name:
+                    return await self.reattach(websocket, seat)
+                    
+            if self.game_started:
+                await websocket.close(reason="Game already in progress")
+                return False
             
             # 2. Host Logic (First player configures the game)
             is_host = (len(self.game.players) == 0)
             
             if is_host:
                 print(f"{player_name} is the HOST.")
-                await self.personal_message(websocket, {
-                    "type": "info", 
-                    "message": "You are the HOST! Please configure the game."
-                })
+                await self.personal_message(websocket, Info("You are the HOST! Please configure the game."))
                 
                 # Ask: How many humans?
-                await websocket.send(json.dumps({
-                    "type": "input_request", 
-                    "prompt": "choose_chor", 
-                    "title": "How many humans?",
-                    "options": ["1 Human", "2 Humans", "3 Humans", "4 Humans"] 
-                }))
+                seats = self.rules.player_count
+                await self.personal_message(websocket, InputRequest(
+                    "choose_chor",
+                    title="How many humans?",
+                    options=["1 Human"] + [f"{n} Humans" for n in range(2, seats + 1)]
+                ))
                 
                 # Wait for answer
-                resp1 = await websocket.recv()
-                data1 = json.loads(resp1)
+                reply = await self.recv_register(websocket)
                 # The client sends the string value selected from options
                 # e.g., "1 Human"
-                choice_str = data1.get("value", "4 Humans")
+                choice_str = str(reply_value(reply, f"{seats} Humans"))
                 # Parse the number (first character)
                 self.required_humans = int(choice_str.split()[0])
                 
-                await self.personal_message(websocket, {
-                    "type": "info", 
-                    "message": f"Set to {self.required_humans} human players."
-                })
+                await self.personal_message(websocket, Info(f"Set to {self.required_humans} human players."))
 
                 # Ask: How many rounds?
                 # We use the new "number_input" type for free input with limits
-                await websocket.send(json.dumps({
-                    "type": "input_request",
-                    "prompt": "number_input",
-                    "title": "How many rounds would you like to play?",
-                    "min": 3,
-                    "max": 20
-                }))
+                await self.personal_message(websocket, InputRequest(
+                    "number_input",
+                    title="How many rounds would you like to play?",
+                    min=3,
+                    max=20
+                ))
                 
-                resp2 = await websocket.recv()
-                data2 = json.loads(resp2)
+                reply = await self.recv_register(websocket)
                 # Client guarantees it's a valid number between min and max
-                self.total_rounds = data2.get("value", 5)
+                self.total_rounds = int(reply_value(reply, 5))
                 
-                await self.personal_message(websocket, {
-                    "type": "info",
-                    "message": f"Game set for {self.total_rounds} rounds!"
-                })
+                await self.personal_message(websocket, Info(f"Game set for {self.total_rounds} rounds!"))
 
             
             # Create Player
@@ -271,85 +495,720 @@ class GameServer:
             
             if success:
                 self.connected_clients.add(websocket)
+                if self.lobby_opened_at is None:
+                    self.lobby_opened_at = self.tracker.clock()
                 current_count = len(self.game.players)
                 print(f"Player joined: {player_name} ({current_count}/{self.required_humans})")
                 
-                await self.broadcast({
-                    "type": "info", 
-                    "message": f"{player_name} joined! ({current_count}/{self.required_humans})"
-                })
+                await self.broadcast(Info(f"{player_name} joined! ({current_count}/{self.required_humans})"))
                 
                 # Auto-start if we have enough humans
                 if current_count >= self.required_humans:
                     print("Requirement met! Starting game...")
                     asyncio.create_task(self.handle_game_loop())
                 else:
-                    await self.personal_message(websocket, {
-                        "type": "info",
-                        "message": f"Waiting for {self.required_humans - current_count} more player(s)..."
-                    })
+                    await self.personal_message(websocket, Info(
+                        f"Waiting for {self.required_humans - current_count} more player(s)..."))
 
             else:
-                await websocket.send(json.dumps({"type": "error", "message": "Game Full"}))
+                await self.personal_message(websocket, Error("Game Full"))
                 await websocket.close()
                 return False
                 
             return True 
                 
+        except asyncio.TimeoutError:
+            print("Registration timed out.")
+            await websocket.close(code=1001, reason="Registration timed out")
+            return False
         except Exception as e:
             print(f"Registration Error: {e}")
             return False
 
+    async def reattach(self, websocket, seat):
+        """Give a returning human their old seat (score and history kept)"""
+        seat.websocket = websocket
+        self.connected_clients.add(websocket)
+        print(f"Player re-attached: {seat.name}")
+        await self.broadcast(Info(f"{seat.name} is back!"))
+        
+        # A restored lobby starts once everybody is back
+        if (not self.game_started and not self.detached_humans()
+                and len(self.game.players) >= self.required_humans):
+            asyncio.create_task(self.handle_game_loop())
+        return True
+
     async def handler(self, websocket):
         """Main WebSocket handler"""
         # 1. Register Phase (Exclusive read access)
         registered = await self.register(websocket)
         if not registered:
+            self.tracker.remove(websocket)
             return
 
         # 2. Main Loop (Shared read access via Futures)
         try:
             async for message in websocket:
-                # Check if someone is waiting for input from this socket
-                if websocket in self.waiting_for_input:
-                    future = self.waiting_for_input.pop(websocket)
-                    if not future.done():
-                        future.set_result(message)
-                    continue
-                
-                # Check commands
+                self.tracker.received(websocket, message)
                 try:
-                    data = json.loads(message)
-                    if data.get("type") == "command" and data.get("command") == "start":
-                       if not self.game_started and len(self.game.players) > 0:
-                           asyncio.create_task(self.handle_game_loop())
-                except:
-                    pass
+                    # The only decode of this frame
+                    message = decode(message)
+                except ProtocolError:
+                    continue
+                handler = self.handlers.get(type(message))
+                if handler:
+                    await handler(websocket, message)
                     
         except websockets.exceptions.ConnectionClosed:
             pass
         finally:
+            self.tracker.remove(websocket)
             if websocket in self.connected_clients:
                 self.connected_clients.remove(websocket)
                 if websocket in self.waiting_for_input:
                     future = self.waiting_for_input.pop(websocket)
                     if not future.done():
                         future.set_exception(Exception("Client Disconnected"))
+                        
+                # Leaving the lobby frees the seat
+                if not self.game_started:
+                    self.game.players = [p for p in self.game.players if p.websocket != websocket]
+                    if not self.game.players:
+                        self.reset()
+
+    async def on_response(self, websocket, response):
+        """Hand an answer to the game loop if it is waiting for this socket"""
+        future = self.waiting_for_input.pop(websocket, None)
+        if future and not future.done():
+            future.set_result(response)
+
+    async def on_command(self, websocket, command):
+        handler = self.commands.get(command.command)
+        if handler:
+            await handler(websocket, command)
+
+    async def on_start(self, websocket, command):
+        if not self.game_started and len(self.game.players) > 0:
+            asyncio.create_task(self.handle_game_loop())
+
+    async def reap_connections(self):
+        """
+        Periodically close sockets that stopped talking to us, that hold
+        more memory than their budget, or that sit in a lobby which never fills.
+        """
+        while True:
+            await asyncio.sleep(self.policy.reap_interval)
+            
+            # Seated players may stay quiet for many rounds (or a whole
+            # lobby wait, bounded by lobby_timeout below); websocket pings
+            # already detect if they are gone.
+            exempt = {p.websocket for p in self.game.players if p.websocket}
+                
+            # Closed side by side: a half-open peer holds its close up
+            # for close_timeout, which must not add up over a sweep
+            closing = []
+            for ws, reason in self.tracker.stale(exempt):
+                print(f"Reaping connection: {reason}")
+                self.tracker.reaped += 1
+                self.tracker.remove(ws)
+                closing.append(ws.close(code=1001, reason=reason))
+            await asyncio.gather(*closing, return_exceptions=True)
+            
+            # Abandoned lobby
+            if (not self.game_started and self.lobby_opened_at is not None
+                    and self.tracker.clock() - self.lobby_opened_at > self.policy.lobby_timeout):
+                print("Lobby timed out.")
+                await self.broadcast(Error("Lobby timed out waiting for players"))
+                lobby = list(self.connected_clients)
+                self.tracker.reaped += len(lobby)
+                self.reset()
+                await asyncio.gather(*(ws.close(code=1001, reason="Lobby timed out") for ws in lobby),
+                                     return_exceptions=True)
+
+class TournamentRoom:
+    """
+    Runs a Tournament (game/tournament.py) on one node. Humans check in by
+    name at /tournament and keep that connection for the whole event; every
+    round's tables are ordinary games (GameServer.handle_game_loop), at most
+    `max_tables` at a time, while progress and standings are streamed to
+    everybody who checked in.
+    """
+    def __init__(self, tournament, policy=None, rules=CLASSIC, history=None, leaderboard=None,
+                 max_tables=MAX_TABLES, game_rounds=3, check_in=CHECK_IN_TIMEOUT):
+        self.tournament = tournament
+        self.policy = policy or ConnectionPolicy()
+        self.rules = rules
+        self.history = history
+        self.leaderboard = leaderboard
+        self.max_tables = max_tables
+        self.game_rounds = game_rounds
+        self.check_in = check_in
+        # One tracker for the lobby and every table
+        self.tracker = ConnectionTracker(self.policy)
+        # Map: name -> websocket of checked-in humans
+        self.connections = {}
+        # Map: name -> GameServer of the table the player sits at
+        self.tables = {}
+        self.started = False
+        self.all_checked_in = asyncio.Event()
+        if not self.humans():
+            # Only bots: nobody to wait for
+            self.all_checked_in.set()
+        self.finished = asyncio.Event()
+        # Tables finished in the current round (for progress updates)
+        self.done_tables = 0
+        # Game loop pace and seed of every table (see GameServer)
+        self.pace = 1.0
+        self.seed = None
+        self.fairness = None
+
+    def humans(self):
+        return [e for e in self.tournament.entrants.values() if not e.is_bot]
+
+    async def broadcast(self, message):
+        json_msg = message.encode()
+        sockets = list(self.connections.values())
+        for ws in sockets:
+            self.tracker.sent(ws, json_msg)
+        await asyncio.gather(*(ws.send(json_msg) for ws in sockets), return_exceptions=True)
+
+    async def personal_message(self, websocket, message):
+        try:
+            json_msg = message.encode()
+            await websocket.send(json_msg)
+            self.tracker.sent(websocket, json_msg)
+        except:
+            pass
 
-async def main():
+    async def register(self, websocket):
+        """Check a listed human in (or back in) by name. Returns the name or None."""
+        await self.personal_message(websocket, InputRequest("name"))
+        message = await asyncio.wait_for(websocket.recv(), timeout=self.policy.handshake_timeout)
+        self.tracker.received(websocket, message)
+        name = str(reply_value(decode(message), ""))
+        
+        entrant = self.tournament.entrants.get(name)
+        if entrant is None or entrant.is_bot:
+            await self.personal_message(websocket, Error(f"{name} is not entered in this tournament"))
+            await websocket.close()
+            return None
+        if name in self.connections:
+            await self.personal_message(websocket, Error(f"{name} is already checked in"))
+            await websocket.close()
+            return None
+            
+        self.connections[name] = websocket
+        # Back at a running table: take the seat over
+        table = self.tables.get(name)
+        if table:
+            for player in table.game.players:
+                if player.name == name:
+                    player.websocket = websocket
+            table.connected_clients.add(websocket)
+            
+        checked_in = sum(1 for e in self.humans() if e.name in self.connections)
+        await self.broadcast(Info(f"{name} checked in ({checked_in}/{len(self.humans())})"))
+        if not self.started:
+            await self.personal_message(websocket, Info(
+                f"Welcome to the {self.tournament.format} tournament! "
+                f"{len(self.tournament.entrants)} entrants, tables of {self.tournament.table_size}."))
+        if checked_in == len(self.humans()):
+            self.all_checked_in.set()
+        return name
+
+    async def handler(self, websocket):
+        """Keeps one participant's connection and feeds their answers to their table"""
+        self.tracker.add(websocket)
+        name = None
+        try:
+            name = await self.register(websocket)
+            if name is None:
+                return
+            async for message in websocket:
+                self.tracker.received(websocket, message)
+                try:
+                    message = decode(message)
+                except ProtocolError:
+                    continue
+                # Only answers are accepted; they go to the player's current table
+                table = self.tables.get(name)
+                if table and isinstance(message, Response):
+                    await table.on_response(websocket, message)
+        except (asyncio.TimeoutError, ValueError, websockets.exceptions.ConnectionClosed):
+            pass
+        finally:
+            self.tracker.remove(websocket)
+            if name and self.connections.get(name) is websocket:
+                del self.connections[name]
+                table = self.tables.get(name)
+                if table:
+                    # The table plays on; an away Sipahi guesses randomly
+                    table.connected_clients.discard(websocket)
+                    future = table.waiting_for_input.pop(websocket, None)
+                    if future and not future.done():
+                        future.set_exception(Exception("Client Disconnected"))
+
+    async def play_table(self, slots, number, table):
+        """Play one table as a normal game and record the result"""
+        async with slots:
+            server = GameServer(self.policy, self.rules, self.history, self.leaderboard)
+            server.tracker = self.tracker
+            server.tournament = f"Round {self.tournament.round}, table {number}"
+            server.total_rounds = self.game_rounds
+            server.pace = self.pace
+            server.seed = self.seed
+            server.fairness = self.fairness
+            server.room = f"{TOURNAMENT_ROOM}-{self.tournament.round}-{number}"
+            for entrant in table:
+                player = Player(entrant.name, is_bot=entrant.is_bot)
+                player.strategy = entrant.strategy
+                ws = self.connections.get(entrant.name)
+                if not entrant.is_bot:
+                    player.websocket = ws
+                    self.tables[entrant.name] = server
+                    if ws:
+                        server.connected_clients.add(ws)
+                server.game.add_player(player)
+                
+            others = ", ".join(e.name for e in table)
+            for entrant in table:
+                ws = self.connections.get(entrant.name)
+                if ws:
+                    await self.personal_message(ws, Info(f"{server.tournament}: {others}"))
+            
+            # handle_game_loop resets the server, keep the finished game
+            game = server.game
+            try:
+                await server.handle_game_loop()
+            finally:
+                for entrant in table:
+                    self.tables.pop(entrant.name, None)
+            
+            self.tournament.record(table, {p.name: p.score for p in game.players})
+            self.done_tables += 1
+
+    async def report_progress(self, total):
+        while True:
+            await asyncio.sleep(PROGRESS_INTERVAL)
+            await self.broadcast(Info(f"Round {self.tournament.round}: {self.done_tables}/{total} tables finished"))
+
+    async def send_standings(self):
+        """Top of the standings to everybody, plus each player's own row"""
+        standings = self.tournament.standings()
+        entries = [self.tournament.entry(e, rank) for rank, e in enumerate(standings, 1)]
+        by_name = {entry["name"]: entry for entry in entries}
+        for name, ws in list(self.connections.items()):
+            await self.personal_message(ws, Standings(
+                self.tournament.round,
+                self.tournament.total_rounds,
+                self.tournament.finished,
+                entries[:STANDINGS_SHOWN],
+                by_name[name]
+            ))
+
+    async def run(self):
+        """Check-in, then every round until the tournament is decided"""
+        print(f"Tournament: waiting up to {self.check_in:.0f}s for {len(self.humans())} human(s) to check in...")
+        try:
+            await asyncio.wait_for(self.all_checked_in.wait(), self.check_in)
+        except asyncio.TimeoutError:
+            missing = [e.name for e in self.humans() if e.name not in self.connections]
+            print(f"Tournament: starting without {len(missing)} player(s): {', '.join(missing)}")
+        self.started = True
+        
+        slots = asyncio.Semaphore(self.max_tables)
+        while not self.tournament.finished:
+            tables = self.tournament.next_tables()
+            self.done_tables = 0
+            message = (f"Round {self.tournament.round}/{self.tournament.total_rounds}: "
+                       f"{len(tables)} table(s), {self.max_tables} at a time")
+            print(f"Tournament: {message}")
+            await self.broadcast(Info(message))
+            
+            progress = asyncio.create_task(self.report_progress(len(tables)))
+            try:
+                await asyncio.gather(*(self.play_table(slots, i, table)
+                                       for i, table in enumerate(tables, 1)))
+            finally:
+                progress.cancel()
+            await self.send_standings()
+            
+        champion = self.tournament.champion()
+        print(f"Tournament finished. Winner: {champion.name}")
+        await self.broadcast(TournamentOver(champion.name))
+        self.finished.set()
+
+class Node:
+    """
+    One server process. Hosts any number of rooms (one GameServer each),
+    selected by the URL path, and records which rooms it owns in a
+    shared RoomStore so a gateway can route players to it.
+    """
+    def __init__(self, node_id, address, store, policy=None, rules=CLASSIC, history=None,
+                 leaderboard=None, tournament=None):
+        self.node_id = node_id
+        self.address = address
+        self.store = store
+        self.policy = policy or ConnectionPolicy()
+        self.rules = rules
+        self.history = history
+        # This node's ratings only; they are not shared through the store
+        self.leaderboard = leaderboard
+        # TournamentRoom served at /tournament (None if no event is running)
+        self.tournament = tournament
+        # Map: room name -> GameServer
+        self.rooms = {}
+        # Map: room name -> reaper task
+        self.reapers = {}
+        # Set once a drain has finished and the process may exit
+        self.draining = False
+        self.drained = asyncio.Event()
+        # Set once our rooms were handed off; the lock keeps a heartbeat
+        # from renewing the lease while the handoff marks it as draining
+        self.left = False
+        self.lease = asyncio.Lock()
+        # SessionRecorder capturing every connection (None = not recording)
+        self.recorder = None
+        # Game loop pace and seed of new rooms (see GameServer)
+        self.pace = 1.0
+        self.seed = None
+        # FairnessAuditor fed by every room (None = no audit)
+        self.fairness = None
+
+    def get_room(self, name):
+        if name not in self.rooms:
+            self.rooms[name] = GameServer(self.policy, self.rules, self.history, self.leaderboard)
+            self.rooms[name].pace = self.pace
+            self.rooms[name].seed = self.seed
+            self.rooms[name].fairness = self.fairness
+            self.rooms[name].room = name
+            self.reapers[name] = asyncio.create_task(self.rooms[name].reap_connections())
+        return self.rooms[name]
+
+    async def store_call(self, method, *args):
+        """
+        Call a RoomStore method. A shared store may wait for another
+        process's lock, so its calls run in a worker thread and never
+        hold up the games of this node.
+        """
+        if self.store.blocking:
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    async def drop_room_if_empty(self, name):
+        """Forget a room once its game is over and everybody left"""
+        server = self.rooms.get(name)
+        if server and not server.game_started and not server.game.players and not server.tracker.connections:
+            del self.rooms[name]
+            self.reapers.pop(name).cancel()
+            await self.store_call(self.store.release, name, self.node_id)
+            if name in self.rooms:
+                # A new connection opened the room again meanwhile
+                await self.store_call(self.store.claim, name, self.node_id)
+
+    async def handler(self, websocket):
+        """Route a connection to its room, if this node owns the room"""
+        path = request_path(websocket)
+        if opted_out(path):
+            disable_compression(websocket)
+        if self.recorder:
+            websocket = self.recorder.wrap(websocket, path)
+        name = room_from_path(path)
+        if self.draining and name not in self.rooms:
+            await websocket.close(code=1013, reason="Server draining, try again shortly")
+            return
+            
+        owner = await self.store_call(self.store.claim, name, self.node_id)
+        if owner != self.node_id:
+            await websocket.close(code=1013, reason=f"Room '{name}' is hosted by {owner}")
+            return
+            
+        if self.tournament and name == TOURNAMENT_ROOM:
+            await self.tournament.handler(websocket)
+            return
+            
+        try:
+            await self.get_room(name).handler(websocket)
+        finally:
+            await self.drop_room_if_empty(name)
+
+    async def heartbeat(self):
+        """Keep our lease in the store alive"""
+        while True:
+            async with self.lease:
+                if self.left:
+                    return
+                await self.store_call(self.store.heartbeat, self.node_id, self.address)
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+
+    async def restore(self, path):
+        """Re-create rooms from a snapshot written by `drain`"""
+        rooms = load_snapshot(path)
+        for name, data in rooms.items():
+            owner = await self.store_call(self.store.claim, name, self.node_id)
+            if owner != self.node_id:
+                print(f"Room '{name}' is already hosted by {owner}, not restoring it")
+                continue
+            server = self.get_room(name)
+            server.restore(data)
+            if server.game_started:
+                asyncio.create_task(server.resume())
+            print(f"Restored room '{name}' (round {server.game.current_round}/{server.total_rounds})")
+        if rooms:
+            # Do not restore the same games twice
+            os.remove(path)
+
+    async def drain(self, path, timeout=DRAIN_TIMEOUT):
+        """
+        Stop taking new rooms, let running games reach a round boundary,
+        write every room to a snapshot and close all connections.
+        """
+        if self.draining:
+            # Second signal: stop now
+            print("Forced stop.")
+            await self.leave()
+            self.drained.set()
+            return
+        self.draining = True
+        print("Draining: waiting for games to reach a round boundary...")
+        
+        running = []
+        for server in self.rooms.values():
+            server.draining = True
+            if server.resuming:
+                # Restored and still waiting for its humans: already at a boundary
+                server.parked.set()
+            if server.game_started and not server.parked.is_set():
+                running.append(server.parked.wait())
+        try:
+            await asyncio.wait_for(asyncio.gather(*running), timeout)
+        except asyncio.TimeoutError:
+            print("Drain timed out; snapshotting games mid-round.")
+            
+        rooms = {name: server.snapshot() for name, server in self.rooms.items() if server.game.players}
+        if rooms:
+            save_snapshot(path, rooms)
+            print(f"Snapshot of {len(rooms)} room(s) written to {path}")
+        
+        # 1012 = service restart; clients reconnect after a random delay
+        for server in self.rooms.values():
+            for ws in list(server.tracker.connections):
+                await ws.close(code=1012, reason="Server restarting")
+        
+        # Snapshotted rooms stay ours (marked as draining) until the next
+        # process with our node id restores them; the others go to the
+        # remaining nodes
+        await self.leave(rooms)
+        self.drained.set()
+
+    def status(self):
+        """
+        Plain-data view of the node for the admin API: node summary and
+        a list of (room name, GameServer.status()), tournament tables included.
+        """
+        rooms = [(name, server.status()) for name, server in self.rooms.items()]
+        reports = [server.tracker.report() for server in self.rooms.values()]
+        tournament = None
+        if self.tournament:
+            event = self.tournament
+            tables = {id(server): server for server in event.tables.values()}
+            rooms.extend((server.room, server.status()) for server in tables.values())
+            reports.append(event.tracker.report())
+            tournament = {
+                "format": event.tournament.format,
+                "round": event.tournament.round,
+                "total_rounds": event.tournament.total_rounds,
+                "entrants": len(event.tournament.entrants),
+                "checked_in": len(event.connections),
+                "tables_running": len(tables),
+                "tables_finished": event.done_tables,
+                "finished": event.finished.is_set(),
+            }
+        
+        totals = {}
+        for report in reports:
+            for key in ("connections", "memory_bytes", "frames_in", "frames_out",
+                        "bytes_in", "bytes_out", "reaped"):
+                totals[key] = totals.get(key, 0) + report[key]
+        node = {
+            "node_id": self.node_id,
+            "address": self.address,
+            "variant": self.rules.name,
+            "draining": self.draining,
+            "tournament": tournament,
+            "traffic": totals,
+            "fairness": self.fairness.overview() if self.fairness else None,
+        }
+        return node, rooms
+
+    async def leave(self, parked=()):
+        """Hand our rooms to the remaining nodes; rooms in `parked` are kept for our restart"""
+        async with self.lease:
+            if self.left:
+                return
+            self.left = True
+            moved = await self.store_call(self.store.handoff, self.node_id, parked)
+        for room, target in moved.items():
+            if target == self.node_id:
+                print(f"Room '{room}' held for the restart of {self.node_id}")
+            elif target:
+                print(f"Room '{room}' handed off to {target}")
+            else:
+                print(f"Room '{room}' released")
+
+async def main(rules=CLASSIC, history_path=None, host="localhost", port=PORT,
+               node_id=None, store_spec="memory", snapshot_path=SNAPSHOT_PATH, reuse_port=False,
+               leaderboard_path=None, tournament=None, max_tables=MAX_TABLES, game_rounds=3,
+               check_in=CHECK_IN_TIMEOUT, record_path=None, pace=1.0, seed=None,
+               admin_host="127.0.0.1", admin_port=None, fairness_path=None, policy=None):
     """Main server entry point"""
-    server = GameServer()
+    history = HistoryWriter(history_path) if history_path else None
+    leaderboard = Leaderboard(leaderboard_path) if leaderboard_path else None
+    address = f"ws://{host}:{port}"
+    node = Node(node_id or f"{host}:{port}", address, open_store(store_spec),
+                policy=policy, rules=rules, history=history, leaderboard=leaderboard)
+    if record_path and seed is None:
+        # A recording can only be replayed against the same seed
+        seed = random.randrange(2 ** 31)
+    node.pace = pace
+    node.seed = seed
+    if fairness_path:
+        node.fairness = FairnessAuditor.load(fairness_path)
+    if record_path:
+        node.recorder = SessionRecorder(record_path, seed)
+    if tournament:
+        node.tournament = TournamentRoom(tournament, node.policy, rules, history, leaderboard,
+                                         max_tables, game_rounds, check_in)
+        node.tournament.pace = pace
+        node.tournament.seed = seed
+        node.tournament.fairness = node.fairness
     print(f"Raja Mantri Chor Sipahi Server")
-    print(f"Starting on port {PORT}...")
-    print(f"Connect via ws://localhost:{PORT}")
+    print(f"Variant: {rules.name} ({rules.player_count} players)")
+    print(f"Node: {node.node_id} (store: {store_spec})")
+    print(f"Compression: {node.policy.compression.mode}")
+    print(f"Starting on port {port}...")
+    print(f"Connect via {address}  (or {address}/<room> for another room)")
+    if node.tournament:
+        print(f"Tournament check-in: {address}/{TOURNAMENT_ROOM}")
+    if node.recorder:
+        print(f"Recording sessions to {record_path} (seed {seed})")
 
-    async with websockets.serve(server.handler, "localhost", PORT):
+    node.store.heartbeat(node.node_id, node.address)
+    await node.restore(snapshot_path)
+    
+    # SIGTERM / Ctrl-C drain the node instead of killing running games
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, lambda: asyncio.create_task(node.drain(snapshot_path)))
+        except (NotImplementedError, AttributeError):
+            pass  # Windows: Ctrl-C stops the server without a snapshot
+    
+    serve_kwargs = node.policy.serve_kwargs()
+    if reuse_port:
+        # Lets the next process bind while this one is still draining
+        serve_kwargs["reuse_port"] = True
+    
+    async with websockets.serve(node.handler, host, port, **serve_kwargs):
         print(f"Server running! Waiting for players...")
-        await asyncio.Future()  # run forever
+        heartbeat = asyncio.create_task(node.heartbeat())
+        if node.tournament:
+            event = asyncio.create_task(node.tournament.run())
+        if admin_port:
+            admin = asyncio.create_task(AdminServer(node).serve(admin_host, admin_port))
+            print(f"Admin API on http://{admin_host}:{admin_port}/stats")
+        if node.fairness:
+            exporter = asyncio.create_task(export_fairness(node.fairness, fairness_path))
+        if node.recorder:
+            flusher = asyncio.create_task(flush_recording(node.recorder))
+        try:
+            await node.drained.wait()
+        finally:
+            heartbeat.cancel()
+            if node.fairness:
+                exporter.cancel()
+                node.fairness.save(fairness_path)
+            if node.tournament:
+                event.cancel()
+            if node.recorder:
+                flusher.cancel()
+                node.recorder.close()
+            if admin_port:
+                admin.cancel()
+            if not node.drained.is_set():
+                # A drain has already handed off our rooms
+                await node.leave()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Raja Mantri Chor Sipahi server")
+    parser.add_argument("--variant", default="classic", choices=sorted(VARIANTS),
+                        help="rule set to play")
+    parser.add_argument("--history", default=None,
+                        help=f"file finished games are appended to (default: {DATA_DIR}/<node id>/{HISTORY_PATH}, '' to disable)")
+    parser.add_argument("--host", default="localhost", help="interface to listen on")
+    parser.add_argument("--port", type=int, default=PORT, help="port to listen on")
+    parser.add_argument("--node-id", default=None, help="name of this node (default: host:port)")
+    parser.add_argument("--store", default="memory",
+                        help="room store: 'memory' or 'sqlite:<file>' to share rooms with other nodes")
+    parser.add_argument("--leaderboard", default=None,
+                        help=f"SQLite file for this node's player ratings (default: {DATA_DIR}/<node id>/{LEADERBOARD_PATH}, '' to disable)")
+    parser.add_argument("--snapshot", default=None,
+                        help=f"file rooms are saved to on shutdown and restored from on start "
+                             f"(default: {DATA_DIR}/<node id>/{SNAPSHOT_PATH})")
+    parser.add_argument("--reuse-port", action="store_true",
+                        help="allow a new process to bind the port while this one drains")
+    parser.add_argument("--tournament", default=None, metavar="FILE",
+                        help="run a tournament for the entrants listed in FILE")
+    parser.add_argument("--format", default="swiss", choices=["swiss", "knockout"],
+                        help="tournament format")
+    parser.add_argument("--tournament-rounds", type=int, default=3,
+                        help="rounds of a swiss tournament")
+    parser.add_argument("--game-rounds", type=int, default=3,
+                        help="rounds played at every tournament table")
+    parser.add_argument("--max-tables", type=int, default=MAX_TABLES,
+                        help="tournament tables played at the same time")
+    parser.add_argument("--check-in", type=float, default=CHECK_IN_TIMEOUT,
+                        help="seconds humans get to check in before the first round")
+    parser.add_argument("--record", default=None, metavar="FILE",
+                        help="record every websocket frame to FILE (replay with python -m game.replay)")
+    parser.add_argument("--pace", type=float, default=1.0,
+                        help="scale the pauses and input deadlines of the game loop (0.1 = 10x faster)")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="deal roles and bot guesses from this seed (to replay a recording)")
+    parser.add_argument("--admin-port", type=int, default=0, nargs="?", const=ADMIN_PORT,
+                        help=f"serve the read-only admin API on this port (default {ADMIN_PORT} if given without a value)")
+    parser.add_argument("--admin-host", default="127.0.0.1",
+                        help="interface for the admin API (keep it private)")
+    parser.add_argument("--fairness", default=None,
+                        help=f"file the role assignment audit is kept in (default: {DATA_DIR}/<node id>/{FAIRNESS_PATH}, '' to disable)")
+    add_compression_arguments(parser)
+    add_connection_arguments(parser)
+    args = parser.parse_args()
+    
+    rules = VARIANTS[args.variant]
+    # Every node writes its own files: the history string table, the
+    # leaderboard index and the audit counts live in memory, so two
+    # processes sharing one file would corrupt it.
+    node_id = args.node_id or f"{args.host}:{args.port}"
+    history_path, leaderboard_path, snapshot_path, fairness_path = (
+        node_file(node_id, name) if value is None else value
+        for value, name in ((args.history, HISTORY_PATH), (args.leaderboard, LEADERBOARD_PATH),
+                            (args.snapshot, SNAPSHOT_PATH), (args.fairness, FAIRNESS_PATH)))
+    try:
+        policy = connection_policy_from_args(args, policy_from_args(args))
+    except ValueError as e:
+        parser.error(str(e))
+    tournament = None
+    if args.tournament:
+        tournament = Tournament(load_entrants(args.tournament), rules.player_count,
+                                args.format, args.tournament_rounds)
+    
     try:
-        asyncio.run(main())
+        asyncio.run(main(rules, history_path, args.host, args.port,
+                         node_id, args.store, snapshot_path, args.reuse_port,
+                         leaderboard_path, tournament, args.max_tables, args.game_rounds,
+                         args.check_in, args.record, args.pace, args.seed,
+                         args.admin_host, args.admin_port, fairness_path, policy))
     except KeyboardInterrupt:
         print("\n\nServer stopping...")
         print("Goodbye!\n")
\ No newline at end of file
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# server.py and client.py are scripts at the top of the tree
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
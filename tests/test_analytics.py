@@ -0,0 +1,57 @@
+import pytest
+
+from game.analytics import analyze
+from game.engine import GameEngine, Player
+from game.history import HistoryWriter
+
+GAMES = 5
+
+
+@pytest.fixture
+def history(tmp_path):
+    path = str(tmp_path / "history.bin")
+    writer = HistoryWriter(path)
+    for number in range(GAMES):
+        game = GameEngine(seed=number)
+        game.add_player(Player("Alice"))
+        game.fill_with_bots()
+        for _ in range(3):
+            game.start_round()
+            sipahi = game.get_sipahi()
+            game.process_guess(sipahi, game.get_bot_guess(sipahi).name)
+        winner = max(game.players, key=lambda p: p.score)
+        writer.record_game(game, winner.name)
+    return path
+
+
+@pytest.mark.parametrize("chunk_records", [1, 3, 4, 7, 1000])
+def test_each_game_is_counted_once(history, chunk_records):
+    totals = analyze(history, workers=1, chunk_records=chunk_records)
+    assert totals.records == GAMES * 3 * 4
+    assert totals.games == GAMES
+    # Counters are keyed by string id: one game per seat per game
+    assert sum(totals.games_played.values()) == GAMES * 4
+
+
+def test_chunks_merge_like_a_single_scan(history):
+    whole = analyze(history, workers=1, chunk_records=1000)
+    split = analyze(history, workers=2, chunk_records=5)
+    assert split.games == whole.games
+    assert split.wins == whole.wins
+    assert split.final_scores == whole.final_scores
+
+
+def test_games_are_counted_without_a_winner_row(tmp_path):
+    # Counted by game id, not by winner rows: no winner row (or several
+    # tied ones) still makes one game
+    path = str(tmp_path / "history.bin")
+    writer = HistoryWriter(path)
+    game = GameEngine(seed=1)
+    game.fill_with_bots()
+    game.start_round()
+    game.process_guess(game.get_sipahi(), game.get_chor().name)
+    writer.record_game(game, "")
+    writer.record_game(game, game.players[0].name)
+    totals = analyze(path, workers=1, chunk_records=3)
+    assert totals.games == 2
+    assert sum(totals.wins.values()) == 1
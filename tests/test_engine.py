@@ -0,0 +1,135 @@
+import pytest
+
+from game.engine import GameEngine, Player, choose_guess
+from game.rules import CLASSIC, VARIANTS, RuleSet
+
+
+def table(rules=CLASSIC, humans=1, seed=1):
+    game = GameEngine(rules, seed=seed)
+    for i in range(humans):
+        game.add_player(Player(f"P{i + 1}"))
+    game.fill_with_bots()
+    return game
+
+
+def wrong_suspect(game, sipahi):
+    chor = game.get_chor()
+    return next(p for p in game.get_potential_chors(sipahi) if p is not chor)
+
+
+# -- rules --
+
+def test_classic_score_tables():
+    assert CLASSIC.player_count == 4
+    assert CLASSIC.score_table(True) == {"Raja": 1000, "Mantri": 800, "Sipahi": 500, "Chor": 0}
+    # Wrong guess: the Sipahi and the Chor swap points
+    assert CLASSIC.score_table(False) == {"Raja": 1000, "Mantri": 800, "Sipahi": 0, "Chor": 500}
+
+
+def test_mahal_applies_every_swap():
+    wrong = VARIANTS["mahal"].score_table(False)
+    assert (wrong["Sipahi"], wrong["Chor"]) == (0, 500)
+    assert (wrong["Kotwal"], wrong["Daku"]) == (100, 600)
+
+
+@pytest.mark.parametrize("rules", VARIANTS.values(), ids=list(VARIANTS))
+def test_variants_deal_one_role_per_seat(rules):
+    assert len(set(rules.roles)) == rules.player_count
+    assert rules.guesser in rules.roles and rules.target in rules.roles
+
+
+def test_rule_set_rejects_unknown_and_duplicate_roles():
+    with pytest.raises(ValueError):
+        RuleSet("bad", [("Raja", 1000), ("Sipahi", 500)])
+    with pytest.raises(ValueError):
+        RuleSet("bad", [("Raja", 1000), ("Raja", 900), ("Sipahi", 500), ("Chor", 0)])
+
+
+# -- engine --
+
+def test_fill_with_bots_takes_every_seat_and_skips_taken_names():
+    game = GameEngine(VARIANTS["rani"], seed=3)
+    game.add_player(Player("Bot_1"))
+    game.fill_with_bots()
+    names = [p.name for p in game.players]
+    assert len(names) == 5 and len(set(names)) == 5
+    assert all(p.is_bot and p.strategy in ("random", "tracker", "hunter") for p in game.players[1:])
+    assert not game.add_player(Player("late"))
+
+
+def test_start_round_deals_every_role_once():
+    game = table(VARIANTS["mahal"])
+    game.start_round()
+    assert game.current_round == 1
+    assert sorted(p.role for p in game.players) == sorted(game.rules.roles)
+    assert game.get_sipahi().role == "Sipahi"
+    assert game.get_chor().role == "Chor"
+
+
+def test_same_seed_deals_the_same_roles():
+    first, second = table(seed=42), table(seed=42)
+    for _ in range(5):
+        first.start_round()
+        second.start_round()
+        assert first.get_role_info() == second.get_role_info()
+
+
+def test_correct_guess_scores_the_role_table():
+    game = table()
+    game.start_round()
+    sipahi = game.get_sipahi()
+    chor = game.get_chor()
+    is_correct, updates = game.process_guess(sipahi, chor.name)
+    assert is_correct
+    assert updates == {p.name: CLASSIC.points[p.role] for p in game.players}
+    assert chor.chor_count == 1
+
+
+def test_wrong_guess_swaps_sipahi_and_chor():
+    game = table()
+    game.start_round()
+    sipahi = game.get_sipahi()
+    is_correct, updates = game.process_guess(sipahi, wrong_suspect(game, sipahi).name)
+    assert not is_correct
+    assert updates[sipahi.name] == 0
+    assert updates[game.get_chor().name] == 500
+
+
+def test_scores_accumulate_and_round_log_records_each_round():
+    game = table(humans=2)
+    for _ in range(3):
+        game.start_round()
+        sipahi = game.get_sipahi()
+        game.process_guess(sipahi, game.get_chor().name)
+    assert [entry[0] for entry in game.round_log] == [1, 2, 3]
+    assert sum(p.score for p in game.players) == 3 * sum(CLASSIC.points.values())
+    # Entries: (name, strategy or "human", role, points, running score)
+    name, strategy, role, points, score = game.round_log[-1][2][0]
+    assert (name, strategy) == ("P1", "human")
+    assert score == game.players[0].score
+
+
+def test_unknown_guess_changes_nothing():
+    game = table()
+    game.start_round()
+    assert game.process_guess(game.get_sipahi(), "nobody") == (False, {})
+    assert game.round_log == []
+
+
+def test_to_dict_round_trip():
+    game = table(VARIANTS["darbar"], humans=2)
+    game.total_rounds = 7
+    game.start_round()
+    game.process_guess(game.get_sipahi(), game.get_chor().name)
+    copy = GameEngine.from_dict(game.to_dict())
+    assert copy.rules is VARIANTS["darbar"]
+    assert copy.to_dict() == game.to_dict()
+
+
+def test_choose_guess_strategies():
+    a, b, c = Player("a"), Player("b"), Player("c")
+    a.score, b.score, c.score = 100, 900, 500
+    a.chor_count, b.chor_count, c.chor_count = 3, 2, 0
+    assert choose_guess("hunter", [a, b, c]) is b
+    assert choose_guess("tracker", [a, b, c]) is c
+    assert choose_guess("random", [a, b, c]) in (a, b, c)
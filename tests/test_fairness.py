@@ -0,0 +1,115 @@
+import random
+
+from game.engine import GameEngine, Player
+from game.fairness import PLAYER, SEAT, STRATEGY, FairnessAuditor
+
+
+def play_round(game, correct=None):
+    """Deal and score one round; the Sipahi guesses like a bot unless `correct` is given"""
+    game.start_round()
+    sipahi = game.get_sipahi()
+    chor = game.get_chor()
+    if correct is None:
+        guess = game.get_bot_guess(sipahi)
+    elif correct:
+        guess = chor
+    else:
+        guess = next(p for p in game.get_potential_chors(sipahi) if p is not chor)
+    game.process_guess(sipahi, guess.name)
+
+
+def table(humans=("Alice",), seed=1):
+    game = GameEngine(seed=seed)
+    for name in humans:
+        game.add_player(Player(name))
+    game.fill_with_bots()
+    return game
+
+
+def test_record_round_counts_each_seat_once():
+    auditor = FairnessAuditor()
+    game = table()
+    play_round(game)
+    auditor.record_round(game)
+    assert auditor.rounds == {"classic": 1}
+    seats = [auditor.rows[(SEAT, "classic", str(seat))] for seat in range(1, 5)]
+    assert [row.n for row in seats] == [1, 1, 1, 1]
+    assert auditor.rows[(PLAYER, "classic", "Alice")].n == 1
+    assert sum(row.n for key, row in auditor.rows.items() if key[0] == STRATEGY) == 4
+    assert sum(g.trials for g in auditor.guesses.values()) == 1
+
+
+def test_record_round_skips_rounds_that_were_not_scored():
+    auditor = FairnessAuditor()
+    game = table()
+    # Dealt but never guessed (e.g. the game was stopped mid-round)
+    game.start_round()
+    auditor.record_round(game)
+    assert auditor.rounds == {} and auditor.rows == {}
+
+    play_round(game)
+    auditor.record_round(game)
+    # The same scored round offered twice is only counted once
+    game.start_round()
+    auditor.record_round(game)
+    assert auditor.rounds == {"classic": 1}
+
+
+def test_guesses_are_counted_by_guesser():
+    auditor = FairnessAuditor()
+    game = table(humans=())
+    for i in range(20):
+        play_round(game, correct=i % 2 == 0)
+        auditor.record_round(game)
+    guesses = list(auditor.guesses.values())
+    assert sum(g.trials for g in guesses) == 20
+    assert sum(g.hits for g in guesses) == 10
+
+
+def test_fair_deals_raise_no_alert():
+    auditor = FairnessAuditor()
+    game = table(seed=7)
+    for _ in range(2000):
+        play_round(game)
+        auditor.record_round(game)
+    assert auditor.overview() == {"rounds": 2000, "active_alerts": 0, "alerts": 0}
+
+
+def test_rigged_seat_raises_an_alert():
+    auditor = FairnessAuditor()
+    game = table()
+    for _ in range(200):
+        play_round(game)
+        # Seat 1 is always the Chor
+        chor_seat = next(i for i, p in enumerate(game.players) if p.role == "Chor")
+        entries = game.round_log[-1][2]
+        entries[0], entries[chor_seat] = entries[chor_seat], entries[0]
+        auditor.record_round(game)
+    assert (SEAT, "classic", "1") in auditor.active
+    assert auditor.alerts
+
+
+def test_player_rows_are_capped_oldest_first():
+    auditor = FairnessAuditor(max_players=3)
+    for i in range(6):
+        game = table(humans=(f"H{i}",), seed=i)
+        play_round(game)
+        auditor.record_round(game)
+    labels = [key[2] for key in auditor.players]
+    assert labels == ["H3", "H4", "H5"]
+    assert sorted(key[2] for key in auditor.rows if key[0] == PLAYER) == labels
+
+
+def test_save_and_load_keep_the_counts(tmp_path):
+    path = str(tmp_path / "fairness.json")
+    auditor = FairnessAuditor(max_players=2)
+    rng = random.Random(3)
+    for i in range(30):
+        game = table(humans=(f"H{rng.randrange(4)}",), seed=i)
+        play_round(game)
+        auditor.record_round(game)
+    auditor.save(path)
+    loaded = FairnessAuditor.load(path, max_players=2)
+    assert loaded.to_dict() == auditor.to_dict()
+    assert list(loaded.players) == list(auditor.players)
+    assert FairnessAuditor.load(str(tmp_path / "missing.json")).rows == {}
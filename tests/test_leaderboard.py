@@ -0,0 +1,75 @@
+import random
+
+import pytest
+
+from game.leaderboard import DEFAULT_RATING, Leaderboard, RankIndex
+
+
+def test_rank_index_matches_a_sorted_list():
+    rng = random.Random(5)
+    index = RankIndex()
+    keys = []
+    for _ in range(500):
+        if keys and rng.random() < 0.3:
+            key = keys.pop(rng.randrange(len(keys)))
+            index.remove(key)
+        else:
+            key = (rng.randrange(1000), rng.random())
+            keys.append(key)
+            index.insert(key)
+    keys.sort()
+    assert len(index) == len(keys)
+    for position, key in enumerate(keys):
+        assert index.rank(key) == position
+    for start in (0, 1, len(keys) // 2, len(keys) - 1):
+        assert index.slice(start, 7) == keys[start:start + 7]
+    assert index.slice(len(keys), 5) == []
+
+
+def test_rank_index_remove_missing_key():
+    index = RankIndex()
+    index.insert((1, "a"))
+    with pytest.raises(KeyError):
+        index.remove((2, "b"))
+
+
+def test_record_game_rates_humans_only():
+    board = Leaderboard()
+    updated = board.record_game([("Alice", 3000, False), ("Bob", 1500, False), ("Bot_1", 0, True)])
+    assert set(updated) == {"Alice", "Bob"}
+    alice, change = updated["Alice"]
+    assert alice > DEFAULT_RATING and change > 0
+    assert updated["Bob"][0] < alice
+    assert board.rank("Bot_1") is None
+    assert board.rank("Alice")["wins"] == 1 and board.rank("Bob")["wins"] == 0
+
+
+def test_single_player_game_is_not_rated():
+    board = Leaderboard()
+    assert board.record_game([("Alice", 3000, False)]) == {}
+    assert len(board.index) == 0
+
+
+def test_top_and_rank_follow_the_ratings():
+    board = Leaderboard()
+    for _ in range(3):
+        board.record_game([("Alice", 3000, False), ("Bob", 2000, False), ("Carol", 1000, False)])
+    assert [e["name"] for e in board.top(10)] == ["Alice", "Bob", "Carol"]
+    assert [e["rank"] for e in board.top(2, offset=1)] == [2, 3]
+    assert board.rank("Carol")["rank"] == 3
+    assert board.rank("nobody") is None
+    # A comeback moves Carol up the index
+    for _ in range(10):
+        board.record_game([("Carol", 3000, False), ("Alice", 0, False)])
+    assert board.rank("Carol")["rank"] < board.rank("Alice")["rank"]
+    assert len(board.index) == len(board.players) == 3
+
+
+def test_saved_ratings_are_loaded_again(tmp_path):
+    path = str(tmp_path / "leaderboard.db")
+    board = Leaderboard(path)
+    updated = board.record_game([("Alice", 3000, False), ("Bob", 1000, False)])
+    # Nothing is written until the rows are saved
+    assert Leaderboard(path).top() == []
+    board.save(board.rows(updated))
+    assert Leaderboard(path).top() == board.top()
@@ -0,0 +1,84 @@
+import pytest
+
+from game.rooms import MemoryRoomStore, SQLiteRoomStore, rendezvous, room_from_path
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    clock = Clock()
+    if request.param == "memory":
+        return MemoryRoomStore(ttl=15, clock=clock, hold=120)
+    return SQLiteRoomStore(str(tmp_path / "rooms.db"), ttl=15, clock=clock, hold=120)
+
+
+def test_room_from_path():
+    assert room_from_path("/") == "main"
+    assert room_from_path("/friday?compress=0") == "friday"
+
+
+def test_rendezvous_is_stable():
+    nodes = ["a", "b", "c"]
+    assert rendezvous("friday", nodes) == rendezvous("friday", list(reversed(nodes)))
+    assert rendezvous("friday", []) is None
+
+
+def test_claim_keeps_the_first_owner(store):
+    store.heartbeat("a", "ws://a")
+    store.heartbeat("b", "ws://b")
+    assert store.claim("friday", "a") == "a"
+    assert store.claim("friday", "b") == "a"
+    assert store.place("friday") == "a"
+
+
+def test_rooms_of_an_expired_node_can_be_taken(store):
+    store.heartbeat("a", "ws://a")
+    store.claim("friday", "a")
+    store.clock.now += 16
+    store.heartbeat("b", "ws://b")
+    assert store.owner("friday") is None
+    assert store.place("friday") == "b"
+
+
+def test_handoff_moves_rooms_to_live_nodes(store):
+    store.heartbeat("a", "ws://a")
+    store.heartbeat("b", "ws://b")
+    store.claim("one", "a")
+    store.claim("two", "a")
+    assert store.handoff("a") == {"one": "b", "two": "b"}
+    assert "a" not in store.live_nodes()
+    assert store.owner("one") == "b"
+
+
+def test_handoff_keeps_parked_rooms_for_the_restart(store):
+    store.heartbeat("a", "ws://a")
+    store.heartbeat("b", "ws://b")
+    store.claim("parked", "a")
+    store.claim("empty", "a")
+    assert store.handoff("a", keep=["parked"]) == {"parked": "a", "empty": "b"}
+    # Draining: owns the room, takes no new ones, has no address
+    assert store.owner("parked") == "a"
+    assert store.claim("parked", "b") == "a"
+    assert store.address("a") is None
+    assert store.place("new") == "b"
+    # Same node id again: the hold ends
+    store.heartbeat("a", "ws://a2")
+    assert store.address("a") == "ws://a2"
+    assert store.claim("parked", "a") == "a"
+
+
+def test_held_rooms_are_released_after_the_hold(store):
+    store.heartbeat("a", "ws://a")
+    store.claim("parked", "a")
+    store.handoff("a", keep=["parked"])
+    store.clock.now += 121
+    store.heartbeat("b", "ws://b")
+    assert store.owner("parked") is None
+    assert store.place("parked") == "b"
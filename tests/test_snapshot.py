@@ -0,0 +1,99 @@
+import gzip
+import json
+
+import pytest
+
+from game.engine import Player
+from game.rooms import MemoryRoomStore
+from game.simulation import run
+from game.snapshot import load_snapshot, save_snapshot
+from server import GameServer, Node
+
+
+def started_room(rounds_scored, deal_next=False):
+    """A room with one human and three bots, `rounds_scored` rounds into its game"""
+    server = GameServer()
+    server.game.add_player(Player("Alice"))
+    server.game.fill_with_bots()
+    server.required_humans = 1
+    server.total_rounds = 5
+    server.game_started = True
+    for _ in range(rounds_scored):
+        server.game.start_round()
+        sipahi = server.game.get_sipahi()
+        server.game.process_guess(sipahi, server.game.get_chor().name)
+    if deal_next:
+        server.game.start_round()
+    return server
+
+
+def test_snapshot_at_a_round_boundary_keeps_the_round():
+    server = started_room(2)
+    snapshot = server.snapshot()
+    assert snapshot["engine"]["current_round"] == 2
+    assert len(snapshot["engine"]["round_log"]) == 2
+
+
+def test_snapshot_mid_round_goes_back_to_the_last_boundary():
+    server = started_room(1, deal_next=True)
+    snapshot = server.snapshot()
+    assert snapshot["engine"]["current_round"] == 1
+    # The running game itself is left alone
+    assert server.game.current_round == 2
+
+
+def test_snapshot_before_the_first_round():
+    server = started_room(0, deal_next=True)
+    assert server.snapshot()["engine"]["current_round"] == 0
+
+
+def test_restore_replays_the_unscored_round():
+    live = started_room(2, deal_next=True)
+    restored = GameServer()
+    restored.restore(live.snapshot())
+    assert restored.resuming and restored.game_started
+    assert restored.total_rounds == 5
+    assert [p.score for p in restored.game.players] == [p.score for p in live.game.players]
+    assert [p.name for p in restored.detached_humans()] == ["Alice"]
+    restored.game.start_round()
+    assert restored.game.current_round == 3
+
+
+def test_snapshot_file_round_trip(tmp_path):
+    path = str(tmp_path / "snapshot.json.gz")
+    rooms = {"friday": started_room(1).snapshot()}
+    save_snapshot(path, rooms)
+    assert load_snapshot(path) == json.loads(json.dumps(rooms))
+    assert load_snapshot(str(tmp_path / "missing.json.gz")) == {}
+
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump({"version": 0, "rooms": {}}, f)
+    with pytest.raises(ValueError):
+        load_snapshot(path)
+
+
+def test_drain_and_restore_keep_the_game(tmp_path):
+    path = str(tmp_path / "snapshot.json.gz")
+
+    async def scenario():
+        store = MemoryRoomStore()
+        old = Node("a", "ws://a", store)
+        store.heartbeat(old.node_id, old.address)
+        store.claim("friday", old.node_id)
+        old.rooms["friday"] = live = started_room(2, deal_next=True)
+        # Mark it parked so the drain does not wait for a game loop
+        live.parked.set()
+        await old.drain(path, timeout=1)
+        # Held for our restart: no other node may take it
+        assert store.claim("friday", "b") == "a"
+
+        new = Node("a", "ws://a2", store)
+        store.heartbeat(new.node_id, new.address)
+        await new.restore(path)
+        room = new.rooms["friday"]
+        assert room.game.current_round == 2
+        assert [p.score for p in room.game.players] == [p.score for p in live.game.players]
+        for task in new.reapers.values():
+            task.cancel()
+
+    run(scenario())